@@ -4,6 +4,7 @@
 
 uniform int MAX_ITER;
 uniform vec2 RES;
+uniform vec2 FRAG_OFFSET;
 uniform dvec2 OFFSET;
 uniform double ZOOM;
 uniform int DRAW_LINES;
@@ -12,6 +13,19 @@ uniform float PHI;
 uniform vec4 COLOR;
 uniform float POWER;
 uniform int AA;
+uniform int STAGE;
+uniform int PERIODICITY;
+uniform int DEBUG_MODE;
+uniform double PERIOD_EPS;
+uniform sampler2D ITERATIONS;
+
+layout(binding = 0, offset = 0) uniform atomic_uint PERIODIC;
+
+out vec4 frag_color;
+
+// Iterations done for the current sample, the compute stage stores them instead of
+// the smooth count when DEBUG_MODE is on
+int work = 0;
 
 dvec2 zsqr(dvec2 z) { return dvec2(z.x * z.x - z.y * z.y, 2.0 * z.x * z.y); }
 dvec2 zmul(dvec2 a, dvec2 b) { return dvec2(a.x*b.x - a.y*b.y, a.x*b.y + a.y*b.x); }
@@ -31,6 +45,13 @@ vec3 apply_color(float i)
 	return 0.5 - 0.5 * cos(i*POWER*0.025 + COLOR.rgb);
 }
 
+// Black to red to yellow to white as `t` goes from 0 to 1, the cost heatmap
+vec3 heat(float t)
+{
+	t = clamp(t, 0.0, 1.0);
+	return clamp(vec3(3.0 * t, 3.0 * t - 1.0, 3.0 * t - 2.0), 0.0, 1.0);
+}
+
 float compute(vec2 frag_coord)
 {
 	// Computing z value
@@ -41,13 +62,33 @@ float compute(vec2 frag_coord)
 
 	// Main computing
 	int i = 0;
+	dvec2 saved = z;
+	int check = 1;
 	const float lim = 512.0;
 	while (dot(z, z) < lim && ++i < MAX_ITER)
 	{
+		work++;
 		dvec2 z0 = z;
 		for (int j = 1; j < POWER; j++)
 			z = zmul(z0, z);
 		z += C;
+
+		// Brent's cycle detection: an orbit back within PERIOD_EPS of the point saved
+		// at the last power of two iteration is periodic and the point is inside
+		if (bool(PERIODICITY))
+		{
+			dvec2 d = z - saved;
+			if (dot(d, d) < PERIOD_EPS)
+			{
+				atomicCounterIncrement(PERIODIC);
+				return 0.0;
+			}
+			if (i == check)
+			{
+				saved = z;
+				check *= 2;
+			}
+		}
 	}
 	if (i == MAX_ITER) return 0.0;
 
@@ -58,21 +99,35 @@ float compute(vec2 frag_coord)
 	return sl;
 }
 
-vec3 render(vec2 frag_coord)
-{
-	float iterations = compute(frag_coord);
-	vec3 color = apply_color(iterations);
-	return color;
-}
-
 void main()
 {
+	if (STAGE == 0)
+	{
+		// Compute stage: one AA sample per texel of a texture AA times the frame size
+		vec2 frag = (gl_FragCoord.xy - 0.5) / float(AA) + 0.5 + FRAG_OFFSET;
+		float iterations = compute(frag);
+		frag_color = vec4(DEBUG_MODE != 0 ? float(work) : iterations, 0, 0, 1);
+		return;
+	}
+
+	if (DEBUG_MODE != 0)
+	{
+		// Cost view: iterations of all the samples of the pixel, raw or as a heatmap
+		float cost = 0.0;
+		for (int i = 0; i < AA; i++)
+		for (int j = 0; j < AA; j++)
+			cost += texelFetch(ITERATIONS, ivec2(gl_FragCoord.xy) * AA + ivec2(i, j), 0).r;
+		frag_color = DEBUG_MODE == 1 ? vec4(cost, 0, 0, 1) : vec4(heat(cost / float(AA * AA * MAX_ITER)), 1);
+		return;
+	}
+
+	// Color stage: maps the stored iteration counts of the pixel's samples to RGB
 	if (bool(DRAW_LINES))
 	{
-		vec2 pos = gl_FragCoord.xy;
+		vec2 pos = gl_FragCoord.xy + FRAG_OFFSET;
 		if (int(pos.x) == int(RES.x / 2) || int(pos.y) == int(RES.y / 2))
 		{
-			gl_FragColor = vec4(1, 0, 0, 1);
+			frag_color = vec4(1, 0, 0, 1);
 			return;
 		}
 	}
@@ -80,7 +135,7 @@ void main()
 	vec3 col = vec3(0);
     for (int i = 0; i < AA; i++)
     for (int j = 0; j < AA; j++)
-        col += render(gl_FragCoord.xy + vec2(i, j) / float(AA));
+        col += apply_color(texelFetch(ITERATIONS, ivec2(gl_FragCoord.xy) * AA + ivec2(i, j), 0).r);
     col /= float(AA*AA);
-	gl_FragColor = vec4(col, 1);
+	frag_color = vec4(col, 1);
 }
\ No newline at end of file
@@ -4,6 +4,7 @@
 
 uniform int MAX_ITER;
 uniform vec2 RES;
+uniform vec2 FRAG_OFFSET;
 uniform float POWER;
 uniform float ZOOM;
 uniform float PHI;
@@ -17,6 +18,12 @@ uniform float ROTATE_Y;
 uniform float AO_COEF;
 uniform int SHADOWS;
 uniform int AA;
+uniform int DEBUG_MODE;
+
+// Work of the pixel for the cost view, summed over its samples
+int march_steps = 0;
+int shadow_steps = 0;
+int de_calls = 0;
 
 
 // Rotation around the X axis
@@ -90,6 +97,7 @@ float get_julia_distance(vec3 pos)
 // Calculates the distance to all objects and returns the minimum
 float get_distance(vec3 position)
 {
+    de_calls++;
     float julia_distance = get_julia_distance(position);
     float dist = julia_distance;
 
@@ -108,6 +116,7 @@ float ray_march(vec3 ray_origin, vec3 ray_direction, out float ao)
     int i;
     for (i = 0; i < MAX_STEPS; i++)
     {
+        march_steps++;
         // Distance from the current position
         float dist = get_distance(current_position);
         all_distance += dist;
@@ -156,7 +165,11 @@ float get_light(vec3 position)
     {
         // Temporary variable
         float t;
+        int primary_steps = march_steps;
         float dist = ray_march(position + normal * 0.001, light_direction, t);
+        // Steps of the shadow ray are counted separately
+        shadow_steps += march_steps - primary_steps;
+        march_steps = primary_steps;
         // If there is something between the object and the source, create a shadow (darken)
         if (dist < length(light_source - position))
             diffusion *= 0.3;
@@ -164,6 +177,13 @@ float get_light(vec3 position)
     return diffusion;
 }
 
+// Black to red to yellow to white as `t` goes from 0 to 1, the cost heatmap
+vec3 heat(float t)
+{
+    t = clamp(t, 0.0, 1.0);
+    return clamp(vec3(3.0 * t, 3.0 * t - 1.0, 3.0 * t - 2.0), 0.0, 1.0);
+}
+
 vec3 render(vec2 frag_coord)
 {
     // Final pixel color
@@ -207,9 +227,15 @@ void main()
     vec3 col = vec3(0);
     for (int j = 0; j < AA; j++)
     for (int i = 0; i < AA; i++)
-        col += render(gl_FragCoord.xy + vec2(i,j) / float(AA));
+        col += render(gl_FragCoord.xy + FRAG_OFFSET + vec2(i,j) / float(AA));
     col /= float(AA*AA);
 
+    // Cost view: work of the pixel instead of its color, raw or as a heatmap
+    if (DEBUG_MODE == 1)
+        col = vec3(march_steps, shadow_steps, de_calls);
+    else if (DEBUG_MODE == 2)
+        col = heat(float(de_calls) / float(AA * AA * (MAX_STEPS * (1 + SHADOWS) + 4)));
+
     // Assign the calculated pixel color
     gl_FragColor = vec4(col, 1.0);
 }
\ No newline at end of file
@@ -5,6 +5,7 @@
 
 uniform int MAX_ITER;
 uniform vec2 RES;
+uniform vec2 FRAG_OFFSET;
 uniform float PHI;
 uniform float THETA;
 uniform vec4 COLOR;
@@ -19,6 +20,12 @@ uniform float FOLDING;
 uniform float OUT_RAD;
 uniform float IN_RAD;
 uniform int AA;
+uniform int DEBUG_MODE;
+
+// Work of the pixel for the cost view, summed over its samples
+int march_steps = 0;
+int shadow_steps = 0;
+int de_calls = 0;
 
 float OUT_RAD_SQR = OUT_RAD * OUT_RAD;
 float IN_RAD_SQR = IN_RAD * IN_RAD;
@@ -89,6 +96,7 @@ float get_mandelbox_distance(vec3 pos)
 // Calculates the distance to all objects and returns the minimum
 float get_distance(vec3 position)
 {
+    de_calls++;
 //  position = mod(position - 0.5*OFF, OFF) - 0.5*OFF;
     float dist = get_mandelbox_distance(position);
     return dist;
@@ -106,6 +114,7 @@ float ray_march(vec3 ray_origin, vec3 ray_direction, out float ao)
     int i;
     for (i = 0; i < MAX_STEPS; i++)
     {
+        march_steps++;
         // Distance from the current position
         float dist = get_distance(current_position);
         all_distance += dist;
@@ -153,7 +162,11 @@ float get_light(vec3 position)
     if (bool(SHADOWS))
     {
         float t; // Temporary variable
+        int primary_steps = march_steps;
         float dist = ray_march(position + normal * 0.001, light_direction, t);
+        // Steps of the shadow ray are counted separately
+        shadow_steps += march_steps - primary_steps;
+        march_steps = primary_steps;
         // If there is something between the object and the source, then darken
         if (dist < length(light_source - position))
             light *= 0.3;
@@ -161,6 +174,13 @@ float get_light(vec3 position)
     return light;
 }
 
+// Black to red to yellow to white as `t` goes from 0 to 1, the cost heatmap
+vec3 heat(float t)
+{
+    t = clamp(t, 0.0, 1.0);
+    return clamp(vec3(3.0 * t, 3.0 * t - 1.0, 3.0 * t - 2.0), 0.0, 1.0);
+}
+
 vec3 render(vec2 frag_coord)
 {
     // Final pixel color
@@ -203,9 +223,15 @@ void main()
     vec3 col = vec3(0);
     for (int i = 0; i < AA; i++)
     for (int j = 0; j < AA; j++)
-        col += render(gl_FragCoord.xy + vec2(i, j) / float(AA));
+        col += render(gl_FragCoord.xy + FRAG_OFFSET + vec2(i, j) / float(AA));
     col /= float(AA*AA);
 
+    // Cost view: work of the pixel instead of its color, raw or as a heatmap
+    if (DEBUG_MODE == 1)
+        col = vec3(march_steps, shadow_steps, de_calls);
+    else if (DEBUG_MODE == 2)
+        col = heat(float(de_calls) / float(AA * AA * (MAX_STEPS * (1 + SHADOWS) + 4)));
+
     // Assign the calculated color to the pixel
     gl_FragColor = vec4(col, 1.0);
 }
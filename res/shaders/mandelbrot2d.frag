@@ -4,6 +4,7 @@
 
 uniform int MAX_ITER;
 uniform vec2 RES;
+uniform vec2 FRAG_OFFSET;
 uniform dvec2 OFFSET;
 uniform double ZOOM;
 uniform int DRAW_LINES;
@@ -11,10 +12,29 @@ uniform float PHI;
 uniform vec4 COLOR;
 uniform float POWER;
 uniform int PERTURBATION;
+uniform int PERT_LEN;
+uniform int SKIP;
+uniform dvec2 SA_A;
+uniform dvec2 SA_B;
+uniform dvec2 SA_C;
+uniform dvec2 REF_OFFSET;
+uniform float GLITCH_TOL;
+uniform int GLITCH_PASS;
 uniform int AA;
+uniform int STAGE;
+uniform int PERIODICITY;
+uniform int DEBUG_MODE;
+uniform double PERIOD_EPS;
+uniform sampler2D ITERATIONS;
+
+layout(binding = 0, offset = 0) uniform atomic_uint PERIODIC;
 
 out vec4 frag_color;
 
+// Iterations done for the current sample, the compute stage stores them instead of
+// the smooth count when DEBUG_MODE is on
+int work = 0;
+
 layout(std430, binding=2) buffer perturbation_array {
 	double PERT_ARR[];
 };
@@ -27,6 +47,13 @@ vec3 apply_color(float i)
 	return 0.5 - 0.5 * cos(i*POWER*0.025 + COLOR.rgb);
 }
 
+// Black to red to yellow to white as `t` goes from 0 to 1, the cost heatmap
+vec3 heat(float t)
+{
+	t = clamp(t, 0.0, 1.0);
+	return clamp(vec3(3.0 * t, 3.0 * t - 1.0, 3.0 * t - 2.0), 0.0, 1.0);
+}
+
 float compute(vec2 frag_coord)
 {
 	dvec2 c = 2.0 * frag_coord - RES.xy;
@@ -43,13 +70,33 @@ float compute(vec2 frag_coord)
 
 	dvec2 z = c;
 	int i = 0;
+	dvec2 saved = z;
+	int check = 1;
 	const float lim = 512.0;
 	while (dot(z, z) < lim && ++i < MAX_ITER)
 	{
+		work++;
 		dvec2 z0 = z;
 		for (int j = 1; j < POWER; j++)
 			z = zmul(z0, z);
 		z += c;
+
+		// Brent's cycle detection: an orbit back within PERIOD_EPS of the point saved
+		// at the last power of two iteration is periodic and the point is inside
+		if (bool(PERIODICITY))
+		{
+			dvec2 d = z - saved;
+			if (dot(d, d) < PERIOD_EPS)
+			{
+				atomicCounterIncrement(PERIODIC);
+				return 0.0;
+			}
+			if (i == check)
+			{
+				saved = z;
+				check *= 2;
+			}
+		}
 	}
 	if (i == MAX_ITER) return 0.0;
 
@@ -60,44 +107,94 @@ float compute(vec2 frag_coord)
 	return sl;
 }
 
-float perturbation(vec2 frag_coord)
+float perturbation(vec2 frag_coord, inout bool glitched)
 {
-	// Computing c value
+	// Computing c value relative to the reference, REF_OFFSET away from the view center
 	dvec2 dc = 2.0 * frag_coord - RES.xy;
 	dc = dc / min(RES.x, RES.y) / ZOOM;
 	mat2 rot = mat2(cos(PI*PHI), -sin(PI*PHI), sin(PI*PHI), cos(PI*PHI));
-	dc = rot*(dc);
-
-	dvec2 z = dvec2(0);
-	dvec2 dz = dvec2(0);
-	int i = 0;
+	dc = rot*(dc) - REF_OFFSET;
+
+	// z is the reference orbit Z_n, the pixel's value is z + dz.
+	// The first SKIP iterations are replaced by the series approximation
+	// dz = A*dc + B*dc^2 + C*dc^3, with SKIP = 1 this starts from Z_1 = c like compute()
+	dvec2 dc2 = zmul(dc, dc);
+	dvec2 dz = zmul(SA_A, dc) + zmul(SA_B, dc2) + zmul(SA_C, zmul(dc2, dc));
+	dvec2 z = dvec2(PERT_ARR[2*SKIP-2], PERT_ARR[2*SKIP-1]);
+	int n = SKIP;
+	int i = SKIP - 1;
 	const float lim = 512.0;
-	while (dot(dz, dz) < lim && i < MAX_ITER)
+	while (dot(z + dz, z + dz) < lim && ++i < MAX_ITER)
 	{
-		dz = zmul(dz + 2.0 * z, dz) + dc;
-		z = dvec2(PERT_ARR[2*i], PERT_ARR[2*i+1]);
-		i++;
+		work++;
+		// Pauldelbrot's criterion: the pixel got much closer to zero than the reference,
+		// dz lost its precision and the pixel has to be redrawn against another reference
+		if (dot(z + dz, z + dz) < GLITCH_TOL * dot(z, z))
+			glitched = true;
+
+		if (n == PERT_LEN)
+		{
+			// The reference escaped, continue with the full value
+			dz += z;
+			dc += OFFSET + REF_OFFSET;
+			z = dvec2(0);
+			n++;
+		}
+		dz = zmul(2.0 * z + dz, dz) + dc;
+		if (n < PERT_LEN)
+		{
+			z = dvec2(PERT_ARR[2*n], PERT_ARR[2*n+1]);
+			n++;
+		}
 	}
 	if (i == MAX_ITER) return 0.0;
 
 	// Smooth color
+	vec2 zf = vec2(z + dz);
 	float l = float(i);
-	vec2 dzf = vec2(dz);
-	float sl = l - log( log(dot(dzf, dzf)) / log(lim) ) / log(POWER);
+	float sl = l - log( log(dot(zf, zf)) / log(lim) ) / log(POWER);
 	return sl;
 }
 
-vec3 render(vec2 frag_coord)
+void main()
 {
-	float iterations = PERTURBATION < 1 ? compute(frag_coord) : perturbation(frag_coord);
-	vec3 col = apply_color(iterations);
-	return col;
-}
+	if (STAGE == 0)
+	{
+		// Compute stage: one AA sample per texel of a texture AA times the frame size
+		// Passes against other references redo only the samples still glitched,
+		// ITERATIONS is a copy of the texture drawn into
+		if (bool(GLITCH_PASS) && texelFetch(ITERATIONS, ivec2(gl_FragCoord.xy), 0).r >= 0.0)
+			discard;
+
+		vec2 frag = (gl_FragCoord.xy - 0.5) / float(AA) + 0.5 + FRAG_OFFSET;
+		bool glitched = false;
+		float iterations = PERTURBATION < 1 ? compute(frag) : perturbation(frag, glitched);
+		if (DEBUG_MODE != 0)
+			iterations = float(work);
+
+		// Glitched samples are stored as -1 - iterations
+		frag_color = vec4(glitched ? -1.0 - iterations : iterations, 0, 0, 1);
+		return;
+	}
+
+	if (DEBUG_MODE != 0)
+	{
+		// Cost view: iterations of all the samples of the pixel, raw or as a heatmap
+		float cost = 0.0;
+		for (int i = 0; i < AA; i++)
+		for (int j = 0; j < AA; j++)
+		{
+			float iterations = texelFetch(ITERATIONS, ivec2(gl_FragCoord.xy) * AA + ivec2(i, j), 0).r;
+			cost += iterations < 0.0 ? -1.0 - iterations : iterations;
+		}
+		frag_color = DEBUG_MODE == 1 ? vec4(cost, 0, 0, 1) : vec4(heat(cost / float(AA * AA * MAX_ITER)), 1);
+		return;
+	}
 
-void main() {
+	// Color stage: maps the stored iteration counts of the pixel's samples to RGB
 	if (bool(DRAW_LINES))
 	{
-		vec2 pos = gl_FragCoord.xy;
+		vec2 pos = gl_FragCoord.xy + FRAG_OFFSET;
 		if (int(pos.x) == int(RES.x / 2) || int(pos.y) == int(RES.y / 2))
 		{
 			frag_color = vec4(1, 0, 0, 1);
@@ -108,7 +205,10 @@ void main() {
 	vec3 col = vec3(0);
     for (int i = 0; i < AA; i++)
     for (int j = 0; j < AA; j++)
-        col += render(gl_FragCoord.xy + vec2(i, j) / float(AA));
+    {
+        float iterations = texelFetch(ITERATIONS, ivec2(gl_FragCoord.xy) * AA + ivec2(i, j), 0).r;
+        col += apply_color(iterations < 0.0 ? -1.0 - iterations : iterations);
+    }
     col /= float(AA*AA);
 	frag_color = vec4(col, 1);
 }
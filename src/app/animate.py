@@ -0,0 +1,115 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any
+
+from fractals.engines import Timeline, frame_name, load_state
+from util import RenderJob, encode_images, save_image, write_atomic
+
+from .batch import render_function
+
+__all__ = ["animation_manifest", "parse_frames", "render_animation", "run_animation"]
+
+
+def parse_frames(value: str, num_frames: int) -> range:
+    """Frames of a "START:STOP" slice like Python's, e.g. "0:600" or "600:", for one machine"""
+
+    start, _, stop = value.partition(":")
+    return range(num_frames)[slice(int(start) if start else None, int(stop) if stop else None)]
+
+
+def animation_manifest(
+    kind: str,
+    state: dict[str, Any],
+    timeline: dict[str, Any],
+    size: tuple[int, int],
+    image_format: str,
+    engine: str,
+) -> dict[str, Any]:
+    return {
+        "kind": kind,
+        "state": state,
+        "timeline": timeline,
+        "size": size,
+        "format": image_format,
+        "engine": engine,
+    }
+
+
+def _timeline(job: RenderJob) -> Timeline:
+    return Timeline.from_dict(job.manifest["state"], job.manifest["timeline"])
+
+
+def _render_frame(job: RenderJob, frame: int) -> str:
+    manifest = job.manifest
+    render = render_function(manifest["engine"])
+    timeline = _timeline(job)
+
+    image = render(manifest["kind"], timeline.frame_state(frame), tuple(manifest["size"]))
+    name = frame_name(frame, timeline.num_frames, manifest["format"])
+    return job.commit(name, lambda path: save_image(path, image))
+
+
+def run_animation(job: RenderJob, frames: range | None = None, workers: int | None = None) -> int:
+    """Renders the `frames` of an animation job not done yet on a process pool, all of them by
+    default, returns the number of failed frames.
+
+    Once every frame is done the video the manifest asks for, if any, is encoded from them."""
+
+    manifest = job.manifest
+    timeline = _timeline(job)
+    num_frames = timeline.num_frames
+    if frames is None:
+        frames = range(num_frames)
+    names = {frame: frame_name(frame, num_frames, manifest["format"]) for frame in frames}
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_render_frame, job, frame): frame for frame, name in names.items() if not job.is_done(name)
+        }
+        print(f"{len(names) - len(futures)} of {len(names)} frames already done")
+        for future in as_completed(futures):
+            frame = futures[future]
+            try:
+                print(f"{frame}/{num_frames} -> {future.result()}")
+            except Exception as error:
+                failed += 1
+                print(f"{frame}: {error}")
+
+    video = manifest.get("video")
+    all_frames = [frame_name(frame, num_frames, manifest["format"]) for frame in range(num_frames)]
+    if video and not failed and not job.pending(all_frames):
+        paths = [job.path(name) for name in all_frames]
+        write_atomic(video, lambda path: encode_images(paths, path, timeline.fps))
+        print(f"-> {video}")
+
+    return failed
+
+
+def render_animation(
+    state_file: str,
+    timeline_file: str,
+    size: tuple[int, int],
+    out_dir: str,
+    kind: str | None = None,
+    frames: str | None = None,
+    workers: int | None = None,
+    image_format: str = "png",
+    engine: str = "numpy",
+) -> int:
+    """Renders the frames of a timeline saved by 'Save Timeline' into the job directory
+    `out_dir`, returns the number of failed frames.
+
+    Every frame is computed from the timeline alone, so `frames` can split a long animation
+    between machines writing to the same directory. Rerunning the command, or 'resume',
+    skips the frames already done."""
+
+    kind, state = load_state(state_file, kind)
+    with open(timeline_file, "r") as f:
+        timeline = json.load(f)
+
+    manifest = animation_manifest(kind, state, timeline, size, image_format, engine)
+    job = RenderJob.open(os.path.abspath(out_dir), manifest)
+    num_frames = _timeline(job).num_frames
+    return run_animation(job, parse_frames(frames, num_frames) if frames else None, workers)
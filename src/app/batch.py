@@ -0,0 +1,112 @@
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+from fractals.engines import load_state, render_state
+from util import RenderJob, render_tiled, save_image, write_atomic
+
+__all__ = ["poster_manifest", "render_batch", "render_function", "render_poster"]
+
+
+def render_function(engine: str) -> Callable[..., np.ndarray]:
+    if engine == "gl":
+        # Imported here, the NumPy engine needs neither Qt nor PyOpenGL
+        from fractals.offscreen import render_state_gl
+
+        return render_state_gl
+    return render_state
+
+
+def _output_paths(filenames: list[str], out_dir: str, image_format: str) -> list[str]:
+    seen: dict[str, int] = {}
+    paths = []
+    for filename in filenames:
+        stem = Path(filename).stem
+        count = seen.get(stem, 0)
+        seen[stem] = count + 1
+        name = f"{stem}.{image_format}" if count == 0 else f"{stem}-{count}.{image_format}"
+        paths.append(os.path.join(out_dir, name))
+    return paths
+
+
+def poster_manifest(
+    output: str, kind: str, state: dict[str, Any], size: tuple[int, int], tile_size: int, engine: str
+) -> dict[str, Any]:
+    return {
+        "poster": os.path.abspath(output),
+        "kind": kind,
+        "state": state,
+        "size": size,
+        "tile_size": tile_size,
+        "engine": engine,
+    }
+
+
+def render_poster(job: RenderJob) -> str:
+    """Renders the poster of a job tile by tile, the tiles stay in the job directory until the
+    poster is written, so an interrupted render resumes from the last finished tile"""
+
+    manifest = job.manifest
+    kind, state, size = manifest["kind"], manifest["state"], tuple(manifest["size"])
+
+    # The engine is only loaded for missing tiles, a job rendered elsewhere is just assembled
+    def render_tile(window: tuple[int, int, int, int]) -> np.ndarray:
+        return render_function(manifest["engine"])(kind, state, size, window)
+
+    write_atomic(manifest["poster"], lambda path: render_tiled(render_tile, size, path, manifest["tile_size"], job))
+    shutil.rmtree(job.directory)
+    return manifest["poster"]
+
+
+def _render_job(
+    filename: str, output: str, size: tuple[int, int], kind: str | None, tile_size: int | None, engine: str
+) -> str:
+    kind, state = load_state(filename, kind)
+    if tile_size:
+        manifest = poster_manifest(output, kind, state, size, tile_size, engine)
+        return render_poster(RenderJob.open(f"{output}.job", manifest))
+
+    image = render_function(engine)(kind, state, size)
+    write_atomic(output, lambda path: save_image(path, image))
+    return output
+
+
+def render_batch(
+    filenames: list[str],
+    size: tuple[int, int],
+    out_dir: str,
+    kind: str | None = None,
+    workers: int | None = None,
+    image_format: str = "png",
+    tile_size: int | None = None,
+    engine: str = "numpy",
+) -> int:
+    """Renders saved states into `out_dir` on a process pool, returns the number of failed jobs.
+
+    With `tile_size` every image is rendered tile by tile into a .png or .npy file,
+    so its size is not limited by memory. Its tiles are kept in a job directory next to it
+    until it is done, running the command again resumes from them. The "gl" engine runs the fragment shaders in an
+    offscreen context of every worker, on Mesa llvmpipe where there is no GPU."""
+
+    os.makedirs(out_dir, exist_ok=True)
+    outputs = _output_paths(filenames, out_dir, image_format)
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_render_job, filename, output, size, kind, tile_size, engine): filename
+            for filename, output in zip(filenames, outputs)
+        }
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                print(f"{filename} -> {future.result()}")
+            except Exception as error:
+                failed += 1
+                print(f"{filename}: {error}")
+
+    return failed
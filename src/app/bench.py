@@ -0,0 +1,241 @@
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable
+
+import numpy as np
+
+from fractals.engines import ENGINES, clear_cache, load_state, render_state
+
+__all__ = ["CORPUS", "bench", "compare_results", "run_benchmark"]
+
+# The repository, the corpus files are relative to it so that the command runs from anywhere
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Saved states rendered by the benchmark as (name, fractal, file). The kind is explicit,
+# Burning Ship saves the same keys as Mandelbrot 2D.
+CORPUS = (
+    ("beautiful", "julia2d", "states/beautiful.json"),
+    ("bs-cool", "burningship2d", "states/bs-cool.json"),
+    ("test-state", "julia2d", "states/test-state.json"),
+    ("test-state2", "mandelbrot2d", "states/test-state2.json"),
+    ("julia2d-1", "julia2d", "states/julia2d/1.json"),
+    ("julia2d-2", "julia2d", "states/julia2d/2.json"),
+)
+
+# The initial views of the widgets, so that every fractal with an engine is covered
+_DEFAULT_2D = {
+    "max_iter": 100,
+    "zoom_factor": 1.0,
+    "central_lines": False,
+    "rotation_angle": 0.0,
+    "color": {"red": 1.0, "green": 1.0, "blue": 1.0, "alpha": 1.0},
+    "power": 2,
+    "offset": {"x": 0.0, "y": 0.0},
+    "antialiasing": False,
+}
+DEFAULT_STATES: dict[str, dict[str, Any]] = {
+    "mandelbrot2d": _DEFAULT_2D,
+    "julia2d": {**_DEFAULT_2D, "c_polar": {"arg": 3.141592653589793, "abs": 0.7}},
+    "burningship2d": _DEFAULT_2D,
+    "mandelbox": {
+        "max_iter": 20,
+        "h_angle": 0.0,
+        "v_angle": 0.0,
+        "offset": [0.0, 0.0, 50.0],
+        "bg_color": {"red": 45 / 255, "green": 45 / 255, "blue": 45 / 255, "alpha": 1.0},
+        "color": {"red": 1.0, "green": 1.0, "blue": 1.0, "alpha": 1.0},
+        "depth": 300,
+        "ao": 250,
+        "shadows": False,
+        "folding": 4.245,
+        "scale": 2.051,
+        "out_rad": 5.0,
+        "in_rad": 3.238,
+        "antialiasing": False,
+        "speed": 0.1,
+    },
+}
+_DEFAULT_3D = {
+    "zoom_factor": 3.0,
+    "h_angle": 0.0,
+    "v_angle": 0.0,
+    "color": {"red": 1.0, "green": 1.0, "blue": 1.0, "alpha": 1.0},
+    "bg_color": {"red": 45 / 255, "green": 45 / 255, "blue": 45 / 255, "alpha": 1.0},
+    "cut": False,
+    "depth": 400,
+    "shadows": True,
+    "antialiasing": False,
+}
+_DEFAULT_MANDELBROT_3D = {**_DEFAULT_3D, "max_iter": 10, "power": 9.0, "z_angle": 0.0, "ao": 150}
+_DEFAULT_JULIA_3D = {
+    **_DEFAULT_3D,
+    "max_iter": 7,
+    "power": 7.0,
+    "abs_c": 0.8776,
+    "argx_c": 2.0,
+    "argy_c": 2.67,
+    "rotate_y": 0.0,
+    "ao": 120,
+}
+DEFAULT_STATES.update(
+    {
+        "mandelbrot3d": _DEFAULT_MANDELBROT_3D,
+        "julia3d": _DEFAULT_JULIA_3D,
+        "mandelbrot4d": _DEFAULT_MANDELBROT_3D,
+        "julia4d": _DEFAULT_JULIA_3D,
+    }
+)
+
+SIZES = ((320, 180), (1280, 720))
+
+# Timed frames of every case, after one untimed warm-up frame
+REPEATS = 5
+
+# Allowed relative loss of Mpix/s or growth of peak RSS against the baseline
+THRESHOLD = 0.15
+
+# Headless engines by name as (render function, fractals it renders)
+BENCH_ENGINES: dict[str, tuple[Callable[..., np.ndarray], tuple[str, ...]]] = {
+    "numpy": (render_state, tuple(ENGINES)),
+}
+
+try:
+    from fractals.offscreen import WIDGETS, render_state_gl
+except ImportError:
+    # Without Qt and PyOpenGL only the NumPy engines are benchmarked
+    pass
+else:
+    BENCH_ENGINES["gl"] = (render_state_gl, tuple(WIDGETS))
+
+
+def _cases(sizes: tuple[tuple[int, int], ...]) -> list[dict[str, Any]]:
+    views = list(CORPUS)
+    views += [(f"default-{kind}", kind, None) for kind in DEFAULT_STATES]
+
+    return [
+        {"name": name, "kind": kind, "state": filename, "engine": engine, "size": list(size)}
+        for name, kind, filename in views
+        for engine, (_, kinds) in BENCH_ENGINES.items()
+        if kind in kinds
+        for size in sizes
+    ]
+
+
+def _run_case(case: dict[str, Any], repeats: int) -> dict[str, Any]:
+    """Renders one case in a fresh process, so that its peak RSS is its own"""
+
+    if case["state"] is None:
+        state = DEFAULT_STATES[case["kind"]]
+    else:
+        _, state = load_state(os.path.join(ROOT, case["state"]), case["kind"])
+    render, _ = BENCH_ENGINES[case["engine"]]
+    width, height = size = tuple(case["size"])
+
+    times = []
+    for frame in range(repeats + 1):
+        # Every frame is computed from scratch, not taken from the cache of recent views
+        clear_cache()
+        start = time.perf_counter()
+        render(case["kind"], state, size)
+        if frame:
+            times.append(time.perf_counter() - start)
+
+    p50, p95 = np.percentile(times, (50, 95))
+    return {
+        **case,
+        "frame_ms": {"p50": p50 * 1e3, "p95": p95 * 1e3, "min": min(times) * 1e3},
+        "mpix_s": width * height / p50 / 1e6,
+        # KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def _case_key(result: dict[str, Any]) -> tuple:
+    return (result["name"], result["engine"], tuple(result["size"]))
+
+
+def run_benchmark(
+    sizes: tuple[tuple[int, int], ...] = SIZES,
+    repeats: int = REPEATS,
+    log: Callable[[str], None] = print,
+) -> dict[str, Any]:
+    """Renders the corpus with every headless engine at every size, one process per case"""
+
+    results = []
+    context = get_context("spawn")
+    for case in _cases(sizes):
+        width, height = case["size"]
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            try:
+                result = executor.submit(_run_case, case, repeats).result()
+            except Exception as error:
+                # E.g. no OpenGL context on this machine, the other engines still run
+                log(f"{case['name']:<24} {case['engine']:<8} {width}x{height:<6} failed: {error}")
+                continue
+        results.append(result)
+
+        log(
+            f"{result['name']:<24} {result['engine']:<8} {width}x{height:<6} "
+            f"{result['mpix_s']:8.3f} Mpix/s  p50 {result['frame_ms']['p50']:9.1f} ms  "
+            f"p95 {result['frame_ms']['p95']:9.1f} ms  {result['peak_rss_mb']:7.1f} MB"
+        )
+
+    return {
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpus": os.cpu_count(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+        },
+        "repeats": repeats,
+        "results": results,
+    }
+
+
+def compare_results(current: dict[str, Any], baseline: dict[str, Any], threshold: float = THRESHOLD) -> list[str]:
+    """Regressions of `current` against `baseline`, cases missing from either are skipped"""
+
+    previous = {_case_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = previous.get(_case_key(result))
+        if old is None:
+            continue
+
+        name = "{} {} {}x{}".format(result["name"], result["engine"], *result["size"])
+        if result["mpix_s"] < old["mpix_s"] * (1 - threshold):
+            regressions.append(f"{name}: {result['mpix_s']:.3f} Mpix/s, baseline {old['mpix_s']:.3f}")
+        if result["peak_rss_mb"] > old["peak_rss_mb"] * (1 + threshold):
+            regressions.append(f"{name}: peak RSS {result['peak_rss_mb']:.1f} MB, baseline {old['peak_rss_mb']:.1f}")
+    return regressions
+
+
+def bench(
+    sizes: tuple[tuple[int, int], ...],
+    repeats: int,
+    out: str | None,
+    baseline: str | None,
+    threshold: float,
+) -> int:
+    """The `bench` command, returns the number of regressions against `baseline`"""
+
+    current = run_benchmark(sizes, repeats)
+    if out:
+        with open(out, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if not baseline:
+        return 0
+
+    with open(baseline, "r") as f:
+        regressions = compare_results(current, json.load(f), threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return len(regressions)
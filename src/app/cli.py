@@ -0,0 +1,183 @@
+import argparse
+import sys
+
+from fractals.engines import KINDS
+
+
+def _parse_size(value: str) -> tuple[int, int]:
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected WIDTHxHEIGHT, got {value!r}")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"Size must be positive, got {value!r}")
+    return (width, height)
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="py-fractals")
+    commands = parser.add_subparsers(dest="command")
+
+    commands.add_parser("gui", help="Start the interactive application (default)")
+
+    render = commands.add_parser("render", help="Render saved states without a display")
+    render.add_argument("states", nargs="+", help="State files written by 'Save State'")
+    render.add_argument("--size", type=_parse_size, default=(1920, 1080), help="Image size, e.g. 3840x2160")
+    render.add_argument("--out", default=".", help="Output directory")
+    render.add_argument("--fractal", choices=KINDS, help="Fractal of the states, guessed from the keys by default")
+    render.add_argument("--workers", type=int, help="Number of worker processes")
+    render.add_argument("--format", default="png", help="Image format (file extension)")
+    render.add_argument("--tile-size", type=int, help="Render in tiles of this size, for png and npy posters")
+    render.add_argument(
+        "--engine", choices=("numpy", "gl"), default="numpy", help="NumPy, or the shaders in an offscreen GL context"
+    )
+
+    animate = commands.add_parser("animate", help="Render the frames of a timeline without a display")
+    animate.add_argument("state", help="State file written by 'Save State'")
+    animate.add_argument("timeline", help="Timeline file written by 'Save Timeline'")
+    animate.add_argument("--size", type=_parse_size, default=(1920, 1080), help="Frame size, e.g. 3840x2160")
+    animate.add_argument("--out", default=".", help="Output directory")
+    animate.add_argument("--fractal", choices=KINDS, help="Fractal of the state, guessed from the keys by default")
+    animate.add_argument("--frames", help="Frames to render as START:STOP, to split the animation between machines")
+    animate.add_argument("--workers", type=int, help="Number of worker processes")
+    animate.add_argument("--format", default="png", help="Image format (file extension)")
+    animate.add_argument(
+        "--engine", choices=("numpy", "gl"), default="numpy", help="NumPy, or the shaders in an offscreen GL context"
+    )
+
+    resume = commands.add_parser("resume", help="Finish an interrupted animation or poster render")
+    resume.add_argument("job", help="Job directory: the output of 'animate', or the .job directory of a poster")
+    resume.add_argument("--workers", type=int, help="Number of worker processes")
+
+    farm = commands.add_parser("farm", help="Coordinate a render over workers on this and other machines")
+    farm.add_argument("state", help="State file written by 'Save State'")
+    spec = farm.add_mutually_exclusive_group(required=True)
+    spec.add_argument("--timeline", help="Render the frames of this timeline into --out")
+    spec.add_argument("--poster", help="Render this image in tiles of --tile-size")
+    farm.add_argument("--size", type=_parse_size, default=(1920, 1080), help="Frame or poster size, e.g. 3840x2160")
+    farm.add_argument("--tile-size", type=int, default=1024, help="Tile size of posters")
+    farm.add_argument("--out", default=".", help="Job directory of the frames")
+    farm.add_argument("--fractal", choices=KINDS, help="Fractal of the state, guessed from the keys by default")
+    farm.add_argument("--format", default="png", help="Image format of the frames (file extension)")
+    farm.add_argument(
+        "--engine", choices=("numpy", "gl"), default="numpy", help="NumPy, or the shaders in an offscreen GL context"
+    )
+    farm.add_argument("--listen", default="0.0.0.0:7531", help="host:port or unix:/path workers connect to")
+    farm.add_argument("--local-workers", type=int, default=0, help="Worker processes to start on this machine")
+
+    worker = commands.add_parser("worker", help="Render units for a farm coordinator")
+    worker.add_argument("address", help="host:port or unix:/path of the coordinator")
+
+    serve = commands.add_parser("serve", help="Serve 2D fractals as map tiles at /{fractal}/{z}/{x}/{y}.png")
+    serve.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    serve.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    serve.add_argument("--cache-dir", help="Directory of the disk cache, tiles are only kept in memory without it")
+    serve.add_argument("--memory-mb", type=float, default=256, help="Size of the memory cache")
+    serve.add_argument("--disk-mb", type=float, default=4096, help="Size of the disk cache")
+    serve.add_argument("--workers", type=int, help="Number of render processes")
+
+    bench = commands.add_parser("bench", help="Benchmark the headless engines on the saved states")
+    bench.add_argument("--size", type=_parse_size, action="append", help="Frame size, can be repeated")
+    bench.add_argument("--repeat", type=int, default=5, help="Timed frames per case")
+    bench.add_argument("--out", help="Write the results to this JSON file")
+    bench.add_argument("--baseline", help="Fail if slower than the results in this JSON file")
+    bench.add_argument("--threshold", type=float, default=0.15, help="Allowed relative regression")
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _build_parser().parse_args(argv)
+
+    match (args.command):
+        case None | "gui":
+            from app.main import main as gui_main
+
+            gui_main()
+
+        case "render":
+            from app.batch import render_batch
+
+            failed = render_batch(
+                filenames=args.states,
+                size=args.size,
+                out_dir=args.out,
+                kind=args.fractal,
+                workers=args.workers,
+                image_format=args.format,
+                tile_size=args.tile_size,
+                engine=args.engine,
+            )
+            sys.exit(1 if failed else 0)
+
+        case "animate":
+            from app.animate import render_animation
+
+            failed = render_animation(
+                state_file=args.state,
+                timeline_file=args.timeline,
+                size=args.size,
+                out_dir=args.out,
+                kind=args.fractal,
+                frames=args.frames,
+                workers=args.workers,
+                image_format=args.format,
+                engine=args.engine,
+            )
+            sys.exit(1 if failed else 0)
+
+        case "resume":
+            from app.jobs import resume_job
+
+            sys.exit(1 if resume_job(args.job, workers=args.workers) else 0)
+
+        case "farm":
+            from app.farm import run_farm
+
+            failed = run_farm(
+                state_file=args.state,
+                address=args.listen,
+                size=args.size,
+                timeline_file=args.timeline,
+                out_dir=args.out,
+                poster=args.poster,
+                tile_size=args.tile_size,
+                kind=args.fractal,
+                image_format=args.format,
+                engine=args.engine,
+                local_workers=args.local_workers,
+            )
+            sys.exit(1 if failed else 0)
+
+        case "worker":
+            from app.farm import run_worker
+
+            print(f"Rendered {run_worker(args.address)} units")
+
+        case "serve":
+            from app.tile_server import serve_tiles
+
+            serve_tiles(
+                host=args.host,
+                port=args.port,
+                cache_dir=args.cache_dir,
+                memory_mb=args.memory_mb,
+                disk_mb=args.disk_mb,
+                workers=args.workers,
+            )
+
+        case "bench":
+            from app.bench import SIZES, bench
+
+            regressions = bench(
+                sizes=tuple(args.size or SIZES),
+                repeats=args.repeat,
+                out=args.out,
+                baseline=args.baseline,
+                threshold=args.threshold,
+            )
+            sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+import base64
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from multiprocessing import get_context
+from multiprocessing.process import BaseProcess
+from typing import Any, TextIO
+
+import cv2
+import numpy as np
+
+from fractals.engines import Timeline, frame_name, load_state
+from util import RenderJob, poster_grid, save_image, tile_name
+
+from .animate import animation_manifest
+from .batch import poster_manifest, render_function, render_poster
+
+__all__ = ["Coordinator", "run_farm", "run_worker", "start_local_workers"]
+
+# A busy worker reports at this interval, ms are not needed, renders take seconds
+HEARTBEAT_INTERVAL = 5.0
+
+# A worker silent for this long is considered dead and its unit goes to another one
+HEARTBEAT_TIMEOUT = 30.0
+
+# Renders of a unit that fail before the unit is given up
+MAX_ATTEMPTS = 3
+
+
+def _listen(address: str) -> socket.socket:
+    """Listening socket of "host:port" or "unix:/path/to/socket" """
+
+    if address.startswith("unix:"):
+        path = address.removeprefix("unix:")
+        if os.path.exists(path):
+            os.remove(path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+        server.listen()
+        return server
+
+    host, port = address.rsplit(":", 1)
+    return socket.create_server((host, int(port)))
+
+
+def _connect(address: str) -> socket.socket:
+    if address.startswith("unix:"):
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(address.removeprefix("unix:"))
+        return client
+
+    host, port = address.rsplit(":", 1)
+    return socket.create_connection((host, int(port)))
+
+
+# The protocol is one JSON object per line, images go as base64 PNG
+def _send(stream: TextIO, message: dict[str, Any]) -> None:
+    stream.write(json.dumps(message) + "\n")
+    stream.flush()
+
+
+def _receive(stream: TextIO) -> dict[str, Any] | None:
+    line = stream.readline()
+    return json.loads(line) if line else None
+
+
+def _encode_png(rgb: np.ndarray) -> str:
+    ok, png = cv2.imencode(".png", np.ascontiguousarray(rgb[..., ::-1]))
+    if not ok:
+        raise ValueError("Could not encode the image")
+    return base64.b64encode(png.tobytes()).decode("ascii")
+
+
+def _decode_png(data: str) -> np.ndarray:
+    png = np.frombuffer(base64.b64decode(data), dtype=np.uint8)
+    return cv2.imdecode(png, cv2.IMREAD_COLOR)[..., ::-1]
+
+
+def _units(manifest: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Work units of a job by the name of the item they produce"""
+
+    if "timeline" in manifest:
+        timeline = Timeline.from_dict(manifest["state"], manifest["timeline"])
+        return {
+            frame_name(frame, timeline.num_frames, manifest["format"]): {"frame": frame}
+            for frame in range(timeline.num_frames)
+        }
+
+    windows = poster_grid(*manifest["size"], manifest["tile_size"], manifest["poster"])
+    return {tile_name(window): {"window": window} for window in windows}
+
+
+class Coordinator:
+    """Hands the units of an animation or poster job out to workers connected over a socket.
+
+    Finished units are committed to the job, so a restarted coordinator only hands out the
+    rest. A unit goes back to the queue when its worker disconnects or sends nothing for
+    HEARTBEAT_TIMEOUT, and is given up after MAX_ATTEMPTS failed renders."""
+
+    def __init__(self, job: RenderJob, address: str):
+        self._job = job
+        self._units = _units(job.manifest)
+        self._server = _listen(address)
+
+        self._lock = threading.Lock()
+        self._remaining = set(job.pending(list(self._units)))
+        self._attempts: dict[str, int] = {}
+        self.failed: list[str] = []
+
+        self._queue: queue.Queue[str] = queue.Queue()
+        for name in self._units:
+            if name in self._remaining:
+                self._queue.put(name)
+
+    @property
+    def address(self) -> str:
+        """Address workers connect to, with the actual port when listening on port 0"""
+
+        name = self._server.getsockname()
+        if isinstance(name, str):
+            return f"unix:{name}"
+        return f"{name[0]}:{name[1]}"
+
+    @property
+    def _finished(self) -> bool:
+        with self._lock:
+            return not self._remaining
+
+    def serve(self) -> int:
+        """Serves workers until every unit is done or given up, then assembles a poster.
+        Returns the number of units given up."""
+
+        print(f"{len(self._units) - len(self._remaining)} of {len(self._units)} units already done")
+
+        address = self.address
+        self._server.settimeout(1.0)
+        with self._server:
+            while not self._finished:
+                try:
+                    connection, _ = self._server.accept()
+                except socket.timeout:
+                    continue
+                connection.settimeout(None)
+                threading.Thread(target=self._serve_worker, args=(connection,), daemon=True).start()
+        if address.startswith("unix:"):
+            os.remove(address.removeprefix("unix:"))
+
+        if "poster" in self._job.manifest and not self.failed:
+            print(f"-> {render_poster(self._job)}")
+        return len(self.failed)
+
+    def _next_unit(self) -> str | None:
+        """Unit for an idle worker, waits while others are in flight, None once all are done"""
+
+        while not self._finished:
+            try:
+                name = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            with self._lock:
+                if name in self._remaining:
+                    return name
+        return None
+
+    def _requeue(self, name: str, error: str) -> None:
+        with self._lock:
+            self._attempts[name] = self._attempts.get(name, 0) + 1
+            if self._attempts[name] < MAX_ATTEMPTS:
+                self._queue.put(name)
+                return
+            self._remaining.discard(name)
+            self.failed.append(name)
+        print(f"{name}: given up, {error}")
+
+    def _commit(self, name: str, data: str) -> None:
+        image = _decode_png(data)
+        if name.endswith(".npy"):
+            self._job.commit(name, lambda path: np.save(path, image))
+        else:
+            self._job.commit(name, lambda path: save_image(path, image))
+        with self._lock:
+            self._remaining.discard(name)
+
+    def _serve_worker(self, connection: socket.socket) -> None:
+        with connection, connection.makefile("r") as reader, connection.makefile("w") as writer:
+            name = None
+            try:
+                connection.settimeout(HEARTBEAT_TIMEOUT)
+                hello = _receive(reader)
+                if hello is None:
+                    return
+                worker = hello["worker"]
+                _send(writer, {"type": "job", "manifest": self._job.manifest})
+                connection.settimeout(None)
+
+                while (name := self._next_unit()) is not None:
+                    _send(writer, {"type": "unit", "name": name, **self._units[name]})
+
+                    # Heartbeats until the result, silence past the timeout raises
+                    connection.settimeout(HEARTBEAT_TIMEOUT)
+                    while (message := _receive(reader)) is not None and message["type"] == "heartbeat":
+                        pass
+                    connection.settimeout(None)
+
+                    if message is None:
+                        raise ConnectionError("disconnected")
+                    if message["type"] == "error":
+                        self._requeue(name, message["error"])
+                    else:
+                        self._commit(name, message["image"])
+                        print(f"{worker} -> {self._job.path(name)}")
+                    name = None
+
+                _send(writer, {"type": "done"})
+            except Exception as error:
+                # The worker died, hung or sent garbage, e.g. a message without the expected
+                # keys, its unit goes to another one rather than staying leased forever
+                if name is not None:
+                    self._requeue(name, str(error))
+
+
+def _render_unit(manifest: dict[str, Any], timeline: Timeline | None, unit: dict[str, Any]) -> np.ndarray:
+    render = render_function(manifest["engine"])
+    size = tuple(manifest["size"])
+    if timeline is not None:
+        return render(manifest["kind"], timeline.frame_state(unit["frame"]), size)
+    return render(manifest["kind"], manifest["state"], size, tuple(unit["window"]))
+
+
+def run_worker(address: str) -> int:
+    """Renders units of the coordinator at `address` until it has none left, returns how many"""
+
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    rendered = 0
+
+    with _connect(address) as connection, connection.makefile("r") as reader, connection.makefile("w") as writer:
+        send_lock = threading.Lock()
+
+        def send(message: dict[str, Any]) -> None:
+            with send_lock:
+                _send(writer, message)
+
+        send({"type": "hello", "worker": worker})
+        job = _receive(reader)
+        if job is None:
+            return rendered
+        manifest = job["manifest"]
+        timeline = Timeline.from_dict(manifest["state"], manifest["timeline"]) if "timeline" in manifest else None
+
+        while (unit := _receive(reader)) is not None and unit["type"] == "unit":
+            stop = threading.Event()
+
+            def heartbeat() -> None:
+                while not stop.wait(HEARTBEAT_INTERVAL):
+                    send({"type": "heartbeat", "time": time.time()})
+
+            thread = threading.Thread(target=heartbeat, daemon=True)
+            thread.start()
+            try:
+                image = _render_unit(manifest, timeline, unit)
+                message = {"type": "result", "image": _encode_png(image)}
+            except Exception as error:
+                message = {"type": "error", "error": f"{type(error).__name__}: {error}"}
+            finally:
+                stop.set()
+                thread.join()
+
+            send(message)
+            if message["type"] == "result":
+                rendered += 1
+
+    return rendered
+
+
+def start_local_workers(address: str, count: int) -> list[BaseProcess]:
+    """Worker processes on this machine, for farms without other nodes and for testing"""
+
+    context = get_context("spawn")
+    workers = [context.Process(target=run_worker, args=(address,), daemon=True) for _ in range(count)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def run_farm(
+    state_file: str,
+    address: str,
+    size: tuple[int, int],
+    timeline_file: str | None = None,
+    out_dir: str = ".",
+    poster: str | None = None,
+    tile_size: int = 1024,
+    kind: str | None = None,
+    image_format: str = "png",
+    engine: str = "numpy",
+    local_workers: int = 0,
+) -> int:
+    """The `farm` command: frames of a timeline into the job directory `out_dir`, or a
+    `poster` in tiles, rendered by the workers that connect to `address`.
+
+    Returns the number of units given up. Rerunning it resumes the job like 'resume'."""
+
+    kind, state = load_state(state_file, kind)
+    if timeline_file is not None:
+        with open(timeline_file, "r") as f:
+            timeline = json.load(f)
+        manifest = animation_manifest(kind, state, timeline, size, image_format, engine)
+        job = RenderJob.open(os.path.abspath(out_dir), manifest)
+    else:
+        job = RenderJob.open(f"{poster}.job", poster_manifest(poster, kind, state, size, tile_size, engine))
+
+    coordinator = Coordinator(job, address)
+    print(f"Waiting for workers on {coordinator.address}")
+    workers = start_local_workers(coordinator.address, local_workers)
+    failed = coordinator.serve()
+    for worker in workers:
+        worker.join()
+    return failed
@@ -0,0 +1,17 @@
+from util import RenderJob
+
+from .animate import run_animation
+from .batch import render_poster
+
+__all__ = ["resume_job"]
+
+
+def resume_job(directory: str, workers: int | None = None) -> int:
+    """Finishes an interrupted animation or poster job, returns the number of failed items"""
+
+    job = RenderJob.load(directory)
+    if "timeline" in job.manifest:
+        return run_animation(job, workers=workers)
+
+    print(f"{directory} -> {render_poster(job)}")
+    return 0
@@ -1,5 +1,6 @@
 import sys
 
+from PySide6.QtCore import Qt
 from PySide6.QtGui import QSurfaceFormat
 from PySide6.QtWidgets import QApplication
 
@@ -8,13 +9,16 @@ from frontend import MainWindow
 
 
 def main():
-    app = QApplication(sys.argv)
-
+    # The global share context is created with QApplication and takes the default format
     format = QSurfaceFormat()
     format.setVersion(4, 3)
     format.setProfile(QSurfaceFormat.OpenGLContextProfile.CoreProfile)
     QSurfaceFormat.setDefaultFormat(format)
 
+    # Widgets share one set of linked shader programs
+    QApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+    app = QApplication(sys.argv)
+
     fractals = [
         Julia2D(name="Julia 2D", fragment_shader_path="res/shaders/julia2d.frag"),
         Mandelbrot2D(name="Mandelbrot 2D", fragment_shader_path="res/shaders/mandelbrot2d.frag"),
@@ -0,0 +1,353 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from math import log2, pi
+from typing import Any
+from urllib.parse import parse_qsl, urlsplit
+
+import cv2
+import numpy as np
+
+from fractals.engines import render_state
+from fractals.engines.registry import PERTURBATION_ZOOM
+from util import write_atomic
+
+__all__ = ["TileCache", "TileRenderer", "serve_tiles"]
+
+# Fractals served, the ones with 2D engines
+TILE_FRACTALS = ("mandelbrot2d", "julia2d", "burningship2d")
+
+TILE_SIZE = 256
+
+# Tiles of zoom 0 cover [-2, 2] x [-2, 2], the Decimal centers keep ~90 bits below that
+MAX_ZOOM = 80
+
+# Deepest level rendered with float64 pixel coordinates, whose digits run out past
+# PERTURBATION_ZOOM. Only Mandelbrot 2D of power 2 has a perturbation path beyond it.
+FLOAT_MAX_ZOOM = int(log2(2 * PERTURBATION_ZOOM))
+
+# Renders queued ahead of requests, prefetching stops while more are in flight
+MAX_PREFETCH = 16
+
+TILE_PATH = re.compile(r"/(?P<fractal>\w+)/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\.png")
+
+
+def tile_state(base: dict[str, Any], z: int, x: int, y: int) -> dict[str, Any]:
+    """Saved 2D state of the web map tile (z, x, y), rows counted from the top.
+
+    A tile is rendered as a view of its own, TILE_SIZE pixels across its center, rather than
+    a window of a 2^z times larger frame whose pixel coordinates float32 or even float64
+    could not hold. The exact center lets deep tiles of Mandelbrot 2D use perturbation."""
+
+    span = Decimal(4) / 2**z
+    center_x = Decimal(-2) + (x + Decimal("0.5")) * span
+    center_y = Decimal(2) - (y + Decimal("0.5")) * span
+    return {
+        **base,
+        # The frame spans 2 / zoom_factor along its smaller side
+        "zoom_factor": 2.0**z / 2,
+        "rotation_angle": 0.0,
+        "offset": {"x": float(center_x), "y": float(center_y)},
+        "center": {"x": str(center_x), "y": str(center_y)},
+    }
+
+
+def query_state(kind: str, query: dict[str, str]) -> dict[str, Any]:
+    """Everything but the position from the query, e.g. ?max_iter=1000&color=ff8800&power=3.
+    Julia 2D takes `arg` and `abs` of c. Raises ValueError on malformed values."""
+
+    color = query.get("color", "ffffff")
+    if not re.fullmatch(r"[0-9a-fA-F]{6}", color):
+        raise ValueError(f"Expected a color like ff8800, got {color!r}")
+    red, green, blue = (int(color[i : i + 2], 16) / 255 for i in (0, 2, 4))
+
+    state = {
+        "max_iter": int(query.get("max_iter", 500)),
+        "central_lines": False,
+        "color": {"red": red, "green": green, "blue": blue, "alpha": 1.0},
+        "power": float(query.get("power", 2)),
+        "antialiasing": query.get("aa", "0") == "1",
+        "periodicity": query.get("periodicity", "1") == "1",
+    }
+    if kind == "julia2d":
+        state["c_polar"] = {"arg": float(query.get("arg", pi)), "abs": float(query.get("abs", 0.7))}
+    return state
+
+
+def max_zoom(kind: str, base: dict[str, Any]) -> int:
+    """Deepest zoom level served for the fractal, deeper tiles would be blocks of equal pixels"""
+
+    if kind == "mandelbrot2d" and base["power"] == 2:
+        return MAX_ZOOM
+    return FLOAT_MAX_ZOOM
+
+
+def _tile_key(kind: str, z: int, x: int, y: int, base: dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps([kind, z, x, y, TILE_SIZE, base], sort_keys=True).encode()).hexdigest()
+
+
+def _render_png(kind: str, state: dict[str, Any]) -> bytes:
+    rgb = render_state(kind, state, (TILE_SIZE, TILE_SIZE))
+    ok, png = cv2.imencode(".png", np.ascontiguousarray(rgb[..., ::-1]))
+    if not ok:
+        raise ValueError("Could not encode the tile")
+    return png.tobytes()
+
+
+class TileCache:
+    """Encoded tiles by content key: an LRU in memory of at most `memory_bytes`, over a directory
+    of files named by the key, of at most `disk_bytes`, where the least recently used go first"""
+
+    def __init__(self, directory: str | None, memory_bytes: int, disk_bytes: int):
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_size = 0
+        self._memory_bytes = memory_bytes
+
+        self._directory = directory
+        self._disk_bytes = disk_bytes
+        self._disk_size = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_size = sum(size for _, _, size in self._disk_files())
+
+    def _path(self, key: str) -> str:
+        # Two levels keep directories small
+        return os.path.join(self._directory, key[:2], f"{key}.png")
+
+    def _disk_files(self) -> list[tuple[float, str, int]]:
+        files = []
+        for root, _, names in os.walk(self._directory):
+            for name in names:
+                # Not the temporary files of writes in progress
+                if name.endswith(".png") and ".tmp" not in name:
+                    stat = os.stat(os.path.join(root, name))
+                    files.append((stat.st_mtime, os.path.join(root, name), stat.st_size))
+        return files
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._memory:
+                return True
+        return self._directory is not None and os.path.exists(self._path(key))
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+
+        if self._directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # The mtime is the last use, eviction goes by it
+            os.utime(path)
+        except OSError:
+            return None
+
+        self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        self._remember(key, data)
+        if self._directory is None:
+            return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        def write(temp_path: str) -> None:
+            with open(temp_path, "wb") as f:
+                f.write(data)
+
+        try:
+            # Rewritten e.g. after the memory cache dropped it while the render was in flight
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+
+        write_atomic(path, write)
+        with self._lock:
+            self._disk_size += len(data) - replaced
+            evict = self._disk_size > self._disk_bytes
+        if evict:
+            self._evict_disk()
+
+    def _remember(self, key: str, data: bytes) -> None:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = data
+            self._memory_size += len(data)
+            while self._memory_size > self._memory_bytes and self._memory:
+                _, old = self._memory.popitem(last=False)
+                self._memory_size -= len(old)
+
+    def _evict_disk(self) -> None:
+        """Deletes the least recently used files until the cache is at 90% of its size, so that
+        the directory is not scanned on every put"""
+
+        files = sorted(self._disk_files())
+        size = sum(size for _, _, size in files)
+        for _, path, file_size in files:
+            if size <= self._disk_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= file_size
+        with self._lock:
+            self._disk_size = size
+
+
+class TileRenderer:
+    """Encoded tiles from the cache or rendered on a process pool.
+
+    Concurrent requests for a tile share one render. Every request also queues renders of
+    the neighbors of its tile and of the four tiles under it at the next zoom level, while
+    fewer than MAX_PREFETCH renders are in flight."""
+
+    def __init__(self, cache: TileCache, workers: int | None = None):
+        self._cache = cache
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, Future] = {}
+
+    def tile(self, key: str, kind: str, z: int, x: int, y: int, base: dict[str, Any]) -> bytes:
+        """PNG of a tile by its content key, raises the error of a failed render"""
+
+        data = self._cache.get(key)
+        if data is None:
+            data = self._render(key, kind, z, x, y, base).result()
+        self._prefetch(kind, z, x, y, base)
+        return data
+
+    def _render(self, key: str, kind: str, z: int, x: int, y: int, base: dict[str, Any]) -> Future:
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future
+            future = self._executor.submit(_render_png, kind, tile_state(base, z, x, y))
+            self._in_flight[key] = future
+
+        # Outside the lock, the callback of a future already done runs in this thread
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return future
+
+    def _finish(self, key: str, future: Future) -> None:
+        # Cached before it leaves the in-flight map, so that no request renders it again
+        try:
+            if not future.cancelled() and future.exception() is None:
+                self._cache.put(key, future.result())
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def _prefetch(self, kind: str, z: int, x: int, y: int, base: dict[str, Any]) -> None:
+        neighbors = [(z, x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+        if z < max_zoom(kind, base):
+            neighbors += [(z + 1, 2 * x + dx, 2 * y + dy) for dx in (0, 1) for dy in (0, 1)]
+
+        for tile_z, tile_x, tile_y in neighbors:
+            if not (0 <= tile_x < 2**tile_z and 0 <= tile_y < 2**tile_z):
+                continue
+            with self._lock:
+                if len(self._in_flight) >= MAX_PREFETCH:
+                    return
+            key = _tile_key(kind, tile_z, tile_x, tile_y, base)
+            if key not in self._cache:
+                self._render(key, kind, tile_z, tile_x, tile_y, base)
+
+    def close(self) -> None:
+        self._executor.shutdown(cancel_futures=True)
+
+
+class _TileHandler(BaseHTTPRequestHandler):
+    server: "_TileHTTPServer"
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        match = TILE_PATH.fullmatch(url.path)
+        if match is None or match["fractal"] not in TILE_FRACTALS:
+            self.send_error(404, f"Expected /{{{'|'.join(TILE_FRACTALS)}}}/z/x/y.png")
+            return
+
+        kind = match["fractal"]
+        z, x, y = int(match["z"]), int(match["x"]), int(match["y"])
+        try:
+            base = query_state(kind, dict(parse_qsl(url.query)))
+        except ValueError as error:
+            self.send_error(400, str(error))
+            return
+        if z > max_zoom(kind, base) or x >= 2**z or y >= 2**z:
+            self.send_error(404, f"No such tile, {kind} goes down to zoom level {max_zoom(kind, base)}")
+            return
+
+        # The key does not depend on the PNG, revalidations cost no render
+        key = _tile_key(kind, z, x, y, base)
+        etag = f'"{key}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        try:
+            data = self.server.renderer.tile(key, kind, z, x, y, base)
+        except Exception as error:
+            self.send_error(500, f"Render failed: {type(error).__name__}: {error}")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(data)))
+        # A tile never changes, its key covers everything it is rendered from
+        self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Served tiles are not logged, a map view requests dozens of them at once
+        pass
+
+
+class _TileHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], renderer: TileRenderer):
+        super().__init__(address, _TileHandler)
+        self.renderer = renderer
+
+
+def serve_tiles(
+    host: str,
+    port: int,
+    cache_dir: str | None,
+    memory_mb: float,
+    disk_mb: float,
+    workers: int | None = None,
+) -> None:
+    """The `serve` command, serves /{fractal}/{z}/{x}/{y}.png until interrupted"""
+
+    cache = TileCache(cache_dir, int(memory_mb * 2**20), int(disk_mb * 2**20))
+    renderer = TileRenderer(cache, workers)
+    with _TileHTTPServer((host, port), renderer) as server:
+        print(f"Serving tiles on http://{host}:{server.server_address[1]}/{{fractal}}/{{z}}/{{x}}/{{y}}.png")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            renderer.close()
@@ -1,9 +1,16 @@
-from .burning_ship_2d import BurningShip2D
-from .julia_2d import Julia2D
-from .julia_3d import Julia3D
-from .mandelbox import Mandelbox
-from .mandelbrot_2d import Mandelbrot2D
-from .mandelbrot_3d import Mandelbrot3D
+import importlib
+from typing import Any
+
+# The widgets need PySide6 and PyOpenGL, they are imported on first use so that the
+# headless engines in fractals.engines run on machines without Qt or a GL driver
+_WIDGETS = {
+    "BurningShip2D": "burning_ship_2d",
+    "Julia2D": "julia_2d",
+    "Mandelbrot2D": "mandelbrot_2d",
+    "Mandelbox": "mandelbox",
+    "Mandelbrot3D": "mandelbrot_3d",
+    "Julia3D": "julia_3d",
+}
 
 __all__ = [
     "BurningShip2D",
@@ -13,3 +20,9 @@ __all__ = [
     "Mandelbrot3D",
     "Julia3D",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _WIDGETS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{_WIDGETS[name]}", __name__), name)
@@ -5,10 +5,12 @@ from .colorable_fractal import ColorableFractal
 from .fractal_2d import Fractal2D
 from .fractal_3d import Fractal3D
 from .fractal_abc import FractalABC
+from .frame_timer import FrameTimer
 from .fragment_only_fractal import FragmentOnlyFractal
 from .iterable_fractal import IterableFractal
 from .screenshotable_fractal import ScreenshotableFractal
 from .stateful_fractal import StatefulFractal
+from .uniform_cache import UniformCache
 
 __all__ = [
     "AAFractal",
@@ -16,10 +18,12 @@ __all__ = [
     "Fractal2D",
     "Fractal3D",
     "FractalABC",
+    "FrameTimer",
     "ColorableFractal",
     "FragmentOnlyFractal",
     "IterableFractal",
     "ScreenshotableFractal",
     "BGColorableFractal",
     "StatefulFractal",
+    "UniformCache",
 ]
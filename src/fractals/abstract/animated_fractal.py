@@ -1,21 +1,24 @@
+import json
 import os
 from datetime import datetime
-from math import ceil
+from pathlib import Path
+from typing import Any
 
-from PySide6.QtGui import QImage
-from PySide6.QtWidgets import QFileDialog
+from PySide6.QtWidgets import QFileDialog, QMessageBox
 
 from frontend.components import ColoredButton, NamedSpinBox
 from frontend.constants import get_color
-from util import create_video_from_qimages, use_setter
+from util import RenderJob, encode_images, use_setter, write_atomic
 
-from .fractal_abc import FractalABC
+from ..engines import Timeline, frame_name
+from .stateful_fractal import StatefulFractal
 
 
-class AnimatedFractal(FractalABC):
+class AnimatedFractal(StatefulFractal):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._anim_params: dict
+        # Animated parameters by their path in the state: "use", "start", "end" and "easing"
+        self._anim_params: dict[str, dict[str, Any]]
         self._anim_duration: float = 1.0
 
     @property
@@ -33,6 +36,11 @@ class AnimatedFractal(FractalABC):
                 color=get_color("green"),
                 handlers=[self._record_animation],
             ),
+            ColoredButton(
+                name="Resume Recording",
+                color=get_color("green"),
+                handlers=[self._resume_recording],
+            ),
             ColoredButton(
                 name="Show Start State",
                 color=get_color("blue"),
@@ -43,6 +51,11 @@ class AnimatedFractal(FractalABC):
                 color=get_color("blue"),
                 handlers=[self._show_end_animation_state],
             ),
+            ColoredButton(
+                name="Save Timeline",
+                color=get_color("blue"),
+                handlers=[self._save_timeline],
+            ),
             NamedSpinBox(
                 name="Duration (Seconds)",
                 scope=(1, 1_000_000),
@@ -57,39 +70,80 @@ class AnimatedFractal(FractalABC):
             # ),
         ]
 
-    def _step_params(self) -> QImage:
-        steps = self.animation_duration * 60
-        for param, config in self._anim_params.items():
-            if not config["use"]:
-                continue
-            old_value = getattr(self, param)
-            diff = config["fspeed"](config["start"], config["end"], steps)
-            new_value = config["fstep"](old_value, diff)
-            use_setter(self, param, new_value)
+    def _timeline(self) -> Timeline:
+        """The checked parameters of the current state, see `py-fractals animate`"""
 
-        return self.grabFramebuffer()
+        params = {
+            path: (config["start"], config["end"], config["easing"])
+            for path, config in self._anim_params.items()
+            if config["use"]
+        }
+        return Timeline(self._state(), params, self.animation_duration)
 
     def _record_animation(self) -> None:
         folder_path = QFileDialog.getExistingDirectory(self, "Choose folder")
-        self._show_start_animation_state()
+        if not folder_path:
+            return
 
-        num_frames = ceil(self.animation_duration * 60)
-        frames = [self.grabFramebuffer()] + [self._step_params() for _ in range(num_frames)]
+        timeline = self._timeline()
         date = datetime.now().strftime("%m-%d-%Y_%H-%M-%S")
-        create_video_from_qimages(
-            qimages=frames,
-            output_file=os.path.join(folder_path, f"{date}.mp4"),
-            fps=60,
-        )
+
+        # Same job format as `py-fractals animate`, which can also finish it. The offscreen
+        # GL engine runs the shaders of the widget, so its frames match the recorded ones.
+        job_path = os.path.join(folder_path, date)
+        manifest = {
+            "kind": Path(self._fragment_shader_path).stem,
+            "state": self._state(),
+            "timeline": timeline.to_dict(),
+            "size": self._widget_size,
+            "format": "png",
+            "engine": "gl",
+            "video": f"{job_path}.mp4",
+        }
+        self._record_job(RenderJob.open(job_path, manifest))
+
+    def _resume_recording(self) -> None:
+        job_path = QFileDialog.getExistingDirectory(self, "Choose an interrupted recording")
+        if job_path:
+            self._record_job(RenderJob.load(job_path))
+
+    def _record_job(self, job: RenderJob) -> None:
+        """Renders the frames of `job` not done yet, then encodes the video from all of them"""
+
+        manifest = job.manifest
+        if tuple(manifest["size"]) != self._widget_size:
+            width, height = manifest["size"]
+            QMessageBox.warning(
+                self,
+                "Different size",
+                f"The recording is {width}x{height}, resize the window or use 'py-fractals resume'",
+            )
+            return
+
+        timeline = Timeline.from_dict(manifest["state"], manifest["timeline"])
+        names = [frame_name(frame, timeline.num_frames, manifest["format"]) for frame in range(timeline.num_frames)]
+
+        # Every finished frame is on disk, an interrupted recording resumes after the last one
+        for frame, name in enumerate(names):
+            if not job.is_done(name):
+                self._apply_state(timeline.frame_state(frame))
+                job.commit(name, self._save_frame)
+
+        paths = [job.path(name) for name in names]
+        write_atomic(manifest["video"], lambda path: encode_images(paths, path, timeline.fps))
+
+    def _save_frame(self, path: str) -> None:
+        if not self.grabFramebuffer().save(path):
+            raise OSError(f"Could not write image: {path}")
+
+    def _save_timeline(self) -> None:
+        filename, _ = QFileDialog.getSaveFileName(self, "Save Timeline", "", "JSON Files (*.json)")
+        if filename:
+            with open(filename, "w") as f:
+                json.dump(self._timeline().to_dict(), f)
 
     def _show_start_animation_state(self) -> None:
-        for param, config in self._anim_params.items():
-            if not config["use"]:
-                continue
-            use_setter(self, param, config["start"])
+        self._apply_state(self._timeline().state_at(0.0))
 
     def _show_end_animation_state(self) -> None:
-        for param, config in self._anim_params.items():
-            if not config["use"]:
-                continue
-            use_setter(self, param, config["end"])
+        self._apply_state(self._timeline().state_at(1.0))
@@ -1,18 +1,39 @@
+from functools import partial
+from math import ceil
 from typing import Any
 
-from PySide6.QtCore import QPointF, Qt
+import numpy as np
+import OpenGL.GL as gl
+from PySide6.QtCore import QPointF, Qt, QTimer
 from PySide6.QtGui import QCursor, QMouseEvent, QWheelEvent
+from PySide6.QtOpenGL import QOpenGLFramebufferObject
 
 from frontend.components import NamedCheckBox, NamedSlider
 from util import rotate_point, use_setter
 
+from ..engines.numpy_2d import PIXEL_SHIFT_TOLERANCE, period_eps
 from .fragment_only_fractal import FragmentOnlyFractal
 from .screenshotable_fractal import ScreenshotableFractal
 
 __all__ = ["Fractal2D"]
 
+# Progressive rendering passes as (resolution divisor, antialiasing), the first one is
+# drawn while the view is dragged or zoomed, the rest one by one once input stops
+PASSES = ((4, False), (2, False), (1, False), (1, True))
+
+# Input idle time before refinement starts, ms
+REFINE_DELAY = 150
+
+# Uniforms only the color stage reads, changing them does not recompute the iterations
+COLOR_UNIFORMS = ("COLOR", "DRAW_LINES")
+
+# Uniforms a pan changes, other changes always recompute the whole iteration texture
+PAN_UNIFORMS = ("OFFSET", "center")
+
 
 class Fractal2D(FragmentOnlyFractal, ScreenshotableFractal):
+    COST_CHANNELS = ("iterations",)
+
     def __init__(self, name: str, fragment_shader_path: str, *args, **kwargs):
         super().__init__(fragment_shader_path, name, *args, **kwargs)
 
@@ -23,6 +44,28 @@ class Fractal2D(FragmentOnlyFractal, ScreenshotableFractal):
 
         self._last_mouse_pos = self._current_mouse_pos
 
+        self._progressive = True
+        self._periodicity = True
+        # Samples the last compute stage stopped by cycle detection, read back on demand
+        self._periodic_samples: int | None = 0
+        self._pass = len(PASSES) - 1
+        # Bumped by every interaction, refinement passes of older ones are dropped
+        self._generation = 0
+        self._preview_fbo: QOpenGLFramebufferObject | None = None
+
+        # Smooth iteration counts of every AA sample and the uniforms they were computed with
+        self._iterations_fbo: QOpenGLFramebufferObject | None = None
+        self._computed: dict[str, Any] | None = None
+        # Target of the iteration texture shifts during pans, swapped with it afterwards
+        self._spare_fbo: QOpenGLFramebufferObject | None = None
+        # Part of the mouse drag smaller than a pixel, carried over to the next move
+        self._pan_remainder = QPointF(0.0, 0.0)
+
+        self._refine_timer = QTimer(self)
+        self._refine_timer.setSingleShot(True)
+        self._refine_timer.setInterval(REFINE_DELAY)
+        self._refine_timer.timeout.connect(lambda: self._refine(self._generation))
+
     @property
     def rotation_angle(self) -> float:
         return self._rotation_angle
@@ -50,6 +93,38 @@ class Fractal2D(FragmentOnlyFractal, ScreenshotableFractal):
         self._offset = new_value
         self.update()
 
+    @property
+    def progressive(self) -> bool:
+        return self._progressive
+
+    @progressive.setter
+    def progressive(self, new_value: bool) -> None:
+        self._progressive = new_value
+        self._pass = len(PASSES) - 1
+        self.update()
+
+    @property
+    def periodicity(self) -> bool:
+        return self._periodicity
+
+    @periodicity.setter
+    def periodicity(self, new_value: bool) -> None:
+        self._periodicity = new_value
+        self.update()
+
+    @property
+    def periodic_samples(self) -> int:
+        """Samples the last compute stage stopped as periodic, only the exposed strips
+        after a pan, zero when detection is off. Reading it waits for the GPU."""
+
+        if self._periodic_samples is None:
+            self.makeCurrent()
+            count = np.zeros(1, dtype=np.uint32)
+            gl.glBindBuffer(gl.GL_ATOMIC_COUNTER_BUFFER, self._periodic_counter)
+            gl.glGetBufferSubData(gl.GL_ATOMIC_COUNTER_BUFFER, 0, count.nbytes, count)
+            self._periodic_samples = int(count[0])
+        return self._periodic_samples
+
     @property
     def zoom_factor(self) -> float:
         return self._zoom_factor
@@ -72,6 +147,17 @@ class Fractal2D(FragmentOnlyFractal, ScreenshotableFractal):
                 initial=self.central_lines,
                 handlers=[lambda value: use_setter(self, "central_lines", value)],
             ),
+            NamedCheckBox(
+                name="Progressive Rendering",
+                initial=self.progressive,
+                handlers=[lambda value: use_setter(self, "progressive", value)],
+            ),
+            NamedCheckBox(
+                name="Periodicity Checking",
+                initial=self.periodicity,
+                handlers=[lambda value: use_setter(self, "periodicity", value)],
+            ),
+            *self._cost_controls(),
         ]
 
     def animation_controls(self) -> list[Any]:
@@ -85,7 +171,8 @@ class Fractal2D(FragmentOnlyFractal, ScreenshotableFractal):
 
                 diff = current_pos - last_pos
 
-                self.offset -= diff
+                self._interact()
+                self._move_view(-self._whole_pixels(diff))
 
         self._last_mouse_pos = self._current_mouse_pos
 
@@ -96,7 +183,7 @@ class Fractal2D(FragmentOnlyFractal, ScreenshotableFractal):
                 self.setCursor(QCursor(Qt.CursorShape.ClosedHandCursor))
 
             case Qt.MouseButton.RightButton:
-                self.offset += self._translate_point(QPointF(self._current_mouse_pos))
+                self._move_view(self._translate_point(QPointF(self._current_mouse_pos)))
 
     def mouseReleaseEvent(self, event: QMouseEvent) -> None:
         match (event.button()):
@@ -104,8 +191,202 @@ class Fractal2D(FragmentOnlyFractal, ScreenshotableFractal):
                 self.unsetCursor()
 
     def wheelEvent(self, event: QWheelEvent) -> None:
+        self._interact()
         self.zoom_factor *= 1.1 ** (event.angleDelta().y() / 100)
 
+    def _interact(self) -> None:
+        """Switches to the preview pass until input has been idle for REFINE_DELAY"""
+
+        if not self.progressive:
+            return
+
+        self._generation += 1
+        self._pass = 0
+        self._refine_timer.start()
+
+    def _refine(self, generation: int) -> None:
+        if generation != self._generation or self._pass == len(PASSES) - 1:
+            return
+
+        self._pass += 1
+        self.update()
+
+    def initializeGL(self) -> None:
+        super().initializeGL()
+
+        # Counter of the periodic samples, `PERIODIC` in the 2D shaders
+        self._periodic_counter = gl.glGenBuffers(1)
+        gl.glBindBuffer(gl.GL_ATOMIC_COUNTER_BUFFER, self._periodic_counter)
+        gl.glBufferData(gl.GL_ATOMIC_COUNTER_BUFFER, 4, np.zeros(1, dtype=np.uint32), gl.GL_DYNAMIC_READ)
+        gl.glBindBufferBase(gl.GL_ATOMIC_COUNTER_BUFFER, 0, self._periodic_counter)
+
+    def _uniform_values(self) -> dict[str, Any]:
+        return {
+            **super()._uniform_values(),
+            "PERIODICITY": int(self.periodicity),
+            "PERIOD_EPS": period_eps(self._render_size, self.zoom_factor),
+        }
+
+    def _reset_periodic_counter(self) -> None:
+        gl.glBindBuffer(gl.GL_ATOMIC_COUNTER_BUFFER, self._periodic_counter)
+        gl.glBufferSubData(gl.GL_ATOMIC_COUNTER_BUFFER, 0, 4, np.zeros(1, dtype=np.uint32))
+        self._periodic_samples = None
+
+    def _geometry(self, values: dict[str, Any]) -> dict[str, Any]:
+        """Everything the compute stage depends on, out of the frame's uniform `values`"""
+
+        return {key: value for key, value in values.items() if key not in COLOR_UNIFORMS}
+
+    def _render(self, **overrides: Any) -> None:
+        """Runs the compute stage into the iteration texture if the geometry changed since
+        the last frame, then the color stage into the bound framebuffer"""
+
+        target = gl.glGetIntegerv(gl.GL_DRAW_FRAMEBUFFER_BINDING)
+        gl.glUseProgram(self._program)
+
+        with self._frame_timer.setup():
+            values = {**self._uniform_values(), **overrides}
+        width, height = self._framebuffer_size
+        size = (width * values["AA"], height * values["AA"])
+
+        fbo = self._iterations_fbo
+        if fbo is None or (fbo.width(), fbo.height()) != size:
+            self._iterations_fbo = self._iterations_target(size)
+            self._computed = None
+
+        geometry = self._geometry(values)
+        if geometry != self._computed:
+            shift = self._texel_shift(self._computed, geometry, values["AA"])
+
+            with self._frame_timer.setup():
+                self._uniforms.update({**values, "STAGE": 0})
+            self._reset_periodic_counter()
+            if shift is None:
+                self._iterations_fbo.bind()
+                gl.glViewport(0, 0, *size)
+                self._draw()
+            else:
+                self._pan_iterations(shift)
+            self._computed = geometry
+
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, target)
+        gl.glViewport(0, 0, width, height)
+        gl.glActiveTexture(gl.GL_TEXTURE0)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self._iterations_fbo.texture())
+        with self._frame_timer.setup():
+            self._uniforms.update({**values, "STAGE": 1, "ITERATIONS": 0})
+        gl.glDrawElements(gl.GL_TRIANGLES, 6, gl.GL_UNSIGNED_INT, None)
+
+    @staticmethod
+    def _iterations_target(size: tuple[int, int]) -> QOpenGLFramebufferObject:
+        return QOpenGLFramebufferObject(
+            *size, QOpenGLFramebufferObject.Attachment.NoAttachment, gl.GL_TEXTURE_2D, gl.GL_R32F
+        )
+
+    def _texel_shift(self, old: dict[str, Any] | None, new: dict[str, Any], aa: int) -> tuple[int, int] | None:
+        """Whole texels the iteration texture moves by between two unrotated views that
+        differ only in their position, bottom-up like the texture, None for other changes"""
+
+        if old is None or new["PHI"]:
+            return None
+        if any(old.get(key) != value for key, value in new.items() if key not in PAN_UNIFORMS):
+            return None
+
+        if "center" in new:
+            delta = [float(a - b) for a, b in zip(new["center"], old["center"])]
+        else:
+            delta = [a - b for a, b in zip(new["OFFSET"], old["OFFSET"])]
+
+        # c = (2 frag - RES) / min(RES) / ZOOM + OFFSET, one texel is 1 / AA of frag
+        scale = min(new["RES"]) * new["ZOOM"] * aa / 2
+        shift = [-d * scale for d in delta]
+        texels = [round(s) for s in shift]
+        if any(abs(s - t) > PIXEL_SHIFT_TOLERANCE for s, t in zip(shift, texels)):
+            return None
+
+        width, height = self._iterations_fbo.width(), self._iterations_fbo.height()
+        if abs(texels[0]) >= width or abs(texels[1]) >= height:
+            return None
+        return tuple(texels)
+
+    def _pan_iterations(self, shift: tuple[int, int]) -> None:
+        """Moves the iteration texture by `shift` texels and computes only the exposed strips"""
+
+        dx, dy = shift
+        width, height = self._iterations_fbo.width(), self._iterations_fbo.height()
+
+        spare = self._spare_fbo
+        if spare is None or (spare.width(), spare.height()) != (width, height):
+            spare = self._iterations_target((width, height))
+
+        gl.glBindFramebuffer(gl.GL_READ_FRAMEBUFFER, self._iterations_fbo.handle())
+        gl.glBindFramebuffer(gl.GL_DRAW_FRAMEBUFFER, spare.handle())
+        gl.glBlitFramebuffer(0, 0, width, height, dx, dy, width + dx, height + dy, gl.GL_COLOR_BUFFER_BIT, gl.GL_NEAREST)
+        self._iterations_fbo, self._spare_fbo = spare, self._iterations_fbo
+
+        self._iterations_fbo.bind()
+        gl.glViewport(0, 0, width, height)
+        gl.glEnable(gl.GL_SCISSOR_TEST)
+
+        # The exposed columns over the full height and the exposed rows over the full width
+        if dx:
+            gl.glScissor(0 if dx > 0 else width + dx, 0, abs(dx), height)
+            self._draw()
+        if dy:
+            gl.glScissor(0, 0 if dy > 0 else height + dy, width, abs(dy))
+            self._draw()
+
+        gl.glDisable(gl.GL_SCISSOR_TEST)
+
+    def _whole_pixels(self, delta: QPointF) -> QPointF:
+        """Rounds a drag of an unrotated view to whole pixels of the current pass, so that
+        the iteration texture can be shifted instead of recomputed"""
+
+        if self.rotation_angle:
+            return delta
+
+        divisor, _ = PASSES[self._pass]
+        pixel = 2 / min(ceil(side / divisor) for side in self._widget_size) / self.zoom_factor
+
+        delta += self._pan_remainder
+        rounded = QPointF(round(delta.x() / pixel) * pixel, round(delta.y() / pixel) * pixel)
+        self._pan_remainder = delta - rounded
+        return rounded
+
+    def _paint(self) -> None:
+        divisor, antialiasing = PASSES[self._pass]
+        if self._tile is not None or (divisor == 1 and antialiasing):
+            super()._paint()
+            return
+
+        width, height = self._widget_size
+        size = (ceil(width / divisor), ceil(height / divisor))
+
+        if self._preview_fbo is None or (self._preview_fbo.width(), self._preview_fbo.height()) != size:
+            self._preview_fbo = QOpenGLFramebufferObject(*size)
+
+        # The whole frame as a single tile of the reduced size
+        self._preview_fbo.bind()
+        self._tile = ((0, 0, *size), size)
+        try:
+            self._render(**({} if antialiasing else {"AA": 1}))
+        finally:
+            self._tile = None
+
+        gl.glBindFramebuffer(gl.GL_READ_FRAMEBUFFER, self._preview_fbo.handle())
+        gl.glBindFramebuffer(gl.GL_DRAW_FRAMEBUFFER, self.defaultFramebufferObject())
+        gl.glBlitFramebuffer(0, 0, *size, 0, 0, width, height, gl.GL_COLOR_BUFFER_BIT, gl.GL_LINEAR)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.defaultFramebufferObject())
+
+        # Next pass after this one is on screen, unless the view moves again
+        if not self._refine_timer.isActive():
+            QTimer.singleShot(0, partial(self._refine, self._generation))
+
+    def _move_view(self, delta: QPointF) -> None:
+        """Shifts the view center by `delta` in fractal coordinates"""
+
+        self.offset += delta
+
     # def _setup_status_bar(self):
     #     self.add_status("MAX_ITER", "ITER: {}")
     #     self.add_status("OFFSET", "POSITION: {0:.16f}, {1:.16f}", unpack=True)
@@ -10,6 +10,8 @@ __all__ = ["Fractal3D"]
 
 
 class Fractal3D(FragmentOnlyFractal, ScreenshotableFractal):
+    COST_CHANNELS = ("march_steps", "shadow_steps", "de_calls")
+
     def __init__(self, name: str, fragment_shader_path: str, *args, **kwargs):
         super().__init__(fragment_shader_path, name, *args, **kwargs)
 
@@ -48,7 +50,7 @@ class Fractal3D(FragmentOnlyFractal, ScreenshotableFractal):
         self.update()
 
     def fractal_controls(self) -> list[Any]:
-        return ScreenshotableFractal.fractal_controls(self)
+        return ScreenshotableFractal.fractal_controls(self) + self._cost_controls()
 
     def animation_controls(self) -> list[Any]:
         return []
@@ -1,16 +1,182 @@
 from abc import abstractmethod
+from typing import Any
 
 import numpy as np
 import OpenGL.GL as gl
-from OpenGL.GL.shaders import compileProgram, compileShader
+from PySide6.QtOpenGL import QOpenGLFramebufferObject
+
+from frontend.components import NamedCheckBox
+from util import cost_summary, use_setter
 
 from .fractal_abc import FractalABC
+from .frame_timer import FrameTimer
+from .program_cache import cached_program, read_shader
+
+MAX_FRAME_COORDINATE = 1 << 20
+
+VERTEX_SHADER_PATH = "res/shaders/vertex_shader.glsl"
+
+# DEBUG_MODE of the shaders: colors, per pixel work as raw counts, work as a heatmap
+DEBUG_OFF, DEBUG_COUNTS, DEBUG_HEATMAP = 0, 1, 2
 
 
 class FragmentOnlyFractal(FractalABC):
+    # What the channels of `cost_map` count
+    COST_CHANNELS: tuple[str, ...] = ()
+
     def __init__(self, fragment_shader_path: str, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._fragment_shader_path = fragment_shader_path
+        self._cost_heatmap = False
+
+        # (window, frame size) of the tile being rendered, None when drawing the widget
+        self._tile: tuple[tuple[int, int, int, int], tuple[int, int]] | None = None
+
+    @property
+    def cost_heatmap(self) -> bool:
+        return self._cost_heatmap
+
+    @cost_heatmap.setter
+    def cost_heatmap(self, new_value: bool) -> None:
+        self._cost_heatmap = new_value
+        self.update()
+
+    def _cost_controls(self) -> list[Any]:
+        return [
+            NamedCheckBox(
+                name="Cost Heatmap",
+                initial=self.cost_heatmap,
+                handlers=[lambda value: use_setter(self, "cost_heatmap", value)],
+            ),
+        ]
+
+    @property
+    def _render_size(self) -> tuple[int, int]:
+        """Size of the whole frame, goes to the RES uniform"""
+
+        if self._tile is not None:
+            return self._tile[1]
+        return self._widget_size
+
+    @property
+    def _framebuffer_size(self) -> tuple[int, int]:
+        """Size of the framebuffer `paintGL` draws into, the tile or the widget"""
+
+        if self._tile is not None:
+            return self._tile[0][2:]
+        return self._widget_size
+
+    @property
+    def _frag_offset(self) -> tuple[int, int]:
+        """Position of the framebuffer origin in the frame, bottom-up like `gl_FragCoord`"""
+
+        if self._tile is None:
+            return (0, 0)
+        (x, y, _, h), (_, height) = self._tile
+        return (x, height - y - h)
+
+    def _uniform_values(self) -> dict[str, Any]:
+        """Uniforms of the fragment shader by name, subclasses extend the dict"""
+
+        return {
+            "RES": self._render_size,
+            "FRAG_OFFSET": self._frag_offset,
+            "DEBUG_MODE": DEBUG_HEATMAP if self.cost_heatmap else DEBUG_OFF,
+        }
+
+    def _draw(self) -> None:
+        gl.glDrawElements(gl.GL_TRIANGLES, 6, gl.GL_UNSIGNED_INT, None)
+
+    def _render(self, **overrides: Any) -> None:
+        """Draws the frame into the bound framebuffer, `overrides` replace uniform values"""
+
+        gl.glUseProgram(self._program)
+        gl.glViewport(0, 0, *self._framebuffer_size)
+
+        with self._frame_timer.setup():
+            self._uniforms.update({**self._uniform_values(), **overrides})
+        self._draw()
+
+    def paintGL(self) -> None:
+        self.makeCurrent()
+        self._frame_timer.begin()
+        try:
+            self._paint()
+        finally:
+            self._frame_timer.end()
+
+    def _paint(self) -> None:
+        """Draws the frame into the bound framebuffer. Subclasses extend this rather than
+        `paintGL`, which times every frame around it."""
+
+        self._render()
+
+    def frame_stats(self) -> dict[str, dict[str, float]]:
+        """Rolling p50 and p95 frame times in ms: "gpu" from timer queries, "cpu" of the
+        whole `paintGL` and "setup" of its Python uniform setup. Empty before the first frame."""
+
+        timer = getattr(self, "_frame_timer", None)
+        return timer.stats() if timer is not None else {}
+
+    def _grab_tile(self, window: tuple[int, int, int, int], size: tuple[int, int]) -> np.ndarray:
+        """Renders `window` of a frame of `size` into an RGB array.
+
+        The shaders add FRAG_OFFSET to `gl_FragCoord` and get RES of the whole frame,
+        so every tile samples the same points as the corresponding part of the frame."""
+
+        _, _, w, h = window
+
+        self.makeCurrent()
+        fbo = QOpenGLFramebufferObject(w, h)
+        fbo.bind()
+        self._tile = (window, size)
+        try:
+            self._paint()
+            gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)
+            pixels = gl.glReadPixels(0, 0, w, h, gl.GL_RGB, gl.GL_UNSIGNED_BYTE)
+        finally:
+            self._tile = None
+            fbo.release()
+            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.defaultFramebufferObject())
+            self.doneCurrent()
+
+        return np.frombuffer(pixels, dtype=np.uint8).reshape(h, w, 3)[::-1]
+
+    def cost_map(self, size: tuple[int, int] | None = None) -> np.ndarray:
+        """Work done for every pixel of a frame of `size`, the widget size by default.
+
+        Returns a float32 (height, width, len(COST_CHANNELS)) array, the counts of every
+        pixel are summed over its AA samples."""
+
+        width, height = size or self._widget_size
+
+        self.makeCurrent()
+        fbo = QOpenGLFramebufferObject(
+            width, height, QOpenGLFramebufferObject.Attachment.NoAttachment, gl.GL_TEXTURE_2D, gl.GL_RGBA32F
+        )
+        fbo.bind()
+        self._tile = ((0, 0, width, height), (width, height))
+        try:
+            self._render(DEBUG_MODE=DEBUG_COUNTS)
+            gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)
+            pixels = gl.glReadPixels(0, 0, width, height, gl.GL_RGB, gl.GL_FLOAT)
+        finally:
+            self._tile = None
+            fbo.release()
+            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.defaultFramebufferObject())
+            self.doneCurrent()
+
+        costs = np.frombuffer(pixels, dtype=np.float32).reshape(height, width, 3)[::-1]
+        return costs[..., : len(self.COST_CHANNELS)]
+
+    def cost_stats(self, size: tuple[int, int] | None = None, bins: int = 32) -> dict[str, dict[str, Any]]:
+        """Sum, mean, max and histogram of every channel of `cost_map`"""
+
+        return cost_summary(self.cost_map(size), self.COST_CHANNELS, bins)
+
+    def _max_tiled_size(self) -> tuple[int, int]:
+        # Frame coordinates are floats in the shaders, keep the AA sample offsets exact
+        return (MAX_FRAME_COORDINATE, MAX_FRAME_COORDINATE)
 
     def _fragment_shader_code(self) -> str:
         with open(self._fragment_shader_path) as fragment_shader_file:
@@ -35,14 +201,12 @@ class FragmentOnlyFractal(FractalABC):
         gl.glBindBuffer(gl.GL_ELEMENT_ARRAY_BUFFER, ebo)
         gl.glBufferData(gl.GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, gl.GL_STATIC_DRAW)
 
-        # Initialize shaders
-        with open("res/shaders/vertex_shader.glsl") as vertex_shader_file:
-            vertex_shader = compileShader(vertex_shader_file.read(), gl.GL_VERTEX_SHADER)
-        fragment_shader = compileShader(self._fragment_shader_code(), gl.GL_FRAGMENT_SHADER)
-
-        self._program = compileProgram(vertex_shader, fragment_shader)
+        # Initialize shaders, linked programs are shared between widgets and cached on disk
+        self._program, self._uniforms = cached_program(read_shader(VERTEX_SHADER_PATH), self._fragment_shader_code())
         gl.glUseProgram(self._program)
 
+        self._frame_timer = FrameTimer()
+
         # Data binding
         in_shader_pos = gl.glGetAttribLocation(self._program, "vertex_position")
         gl.glEnableVertexAttribArray(in_shader_pos)
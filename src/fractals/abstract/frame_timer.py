@@ -0,0 +1,88 @@
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Iterator
+
+import numpy as np
+import OpenGL.GL as gl
+
+__all__ = ["FrameTimer"]
+
+# Queries in flight, results are read a few frames late instead of waiting for the GPU
+QUERY_RING = 4
+
+# Frames the percentiles are taken over
+STATS_WINDOW = 120
+
+
+class FrameTimer:
+    """GPU time of frames from GL_TIME_ELAPSED queries, along with the CPU time of
+    `paintGL` and the part of it spent setting up uniforms.
+
+    Needs a current context. A query is only read once its result is available; when
+    all of them are in flight the frame's GPU time is skipped rather than waited for."""
+
+    def __init__(self):
+        self._free = list(gl.glGenQueries(QUERY_RING))
+        self._pending: deque[int] = deque()
+        self._query: int | None = None
+
+        self._frame_start = 0.0
+        self._setup = 0.0
+
+        self._gpu: deque[float] = deque(maxlen=STATS_WINDOW)
+        self._cpu: deque[float] = deque(maxlen=STATS_WINDOW)
+        self._setups: deque[float] = deque(maxlen=STATS_WINDOW)
+
+    def begin(self) -> None:
+        self._poll()
+        self._frame_start = perf_counter()
+        self._setup = 0.0
+
+        self._query = self._free.pop() if self._free else None
+        if self._query is not None:
+            gl.glBeginQuery(gl.GL_TIME_ELAPSED, self._query)
+
+    def end(self) -> None:
+        if self._query is not None:
+            gl.glEndQuery(gl.GL_TIME_ELAPSED)
+            self._pending.append(self._query)
+            self._query = None
+
+        self._cpu.append(perf_counter() - self._frame_start)
+        self._setups.append(self._setup)
+
+    @contextmanager
+    def setup(self) -> Iterator[None]:
+        """Adds the time spent in the block to the uniform setup time of the frame"""
+
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self._setup += perf_counter() - start
+
+    def _poll(self) -> None:
+        """Collects the results of finished queries, oldest first, without blocking"""
+
+        available = np.zeros(1, dtype=np.int32)
+        elapsed = np.zeros(1, dtype=np.uint64)
+        while self._pending:
+            query = self._pending[0]
+            gl.glGetQueryObjectiv(query, gl.GL_QUERY_RESULT_AVAILABLE, available)
+            if not available[0]:
+                break
+
+            gl.glGetQueryObjectui64v(query, gl.GL_QUERY_RESULT, elapsed)
+            self._gpu.append(int(elapsed[0]) * 1e-9)
+            self._free.append(self._pending.popleft())
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Rolling p50 and p95 of the GPU, CPU and uniform setup times of recent frames, ms"""
+
+        stats = {}
+        for name, times in (("gpu", self._gpu), ("cpu", self._cpu), ("setup", self._setups)):
+            if times:
+                p50, p95 = np.percentile(np.array(times) * 1e3, (50, 95))
+                stats[name] = {"p50": float(p50), "p95": float(p95)}
+        return stats
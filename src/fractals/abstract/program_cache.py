@@ -0,0 +1,138 @@
+import hashlib
+import os
+from functools import lru_cache
+
+import numpy as np
+import OpenGL.GL as gl
+from OpenGL.GL.shaders import compileShader
+from PySide6.QtGui import QOpenGLContext
+
+from .uniform_cache import UniformCache
+
+__all__ = ["cached_program", "read_shader"]
+
+# Program binaries are only valid for the driver that produced them, the key includes it
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "py-fractals", "programs")
+
+# Linked programs by source hash, shared by every context of the global share group.
+# Uniform values belong to the program, so the UniformCache is shared along with it.
+_programs: dict[str, tuple[int, UniformCache]] = {}
+
+
+@lru_cache(maxsize=None)
+def read_shader(path: str) -> str:
+    with open(path) as shader_file:
+        return shader_file.read()
+
+
+def _in_global_share_group() -> bool:
+    current = QOpenGLContext.currentContext()
+    shared = QOpenGLContext.globalShareContext()
+    return current is not None and shared is not None and QOpenGLContext.areSharing(current, shared)
+
+
+def _driver() -> bytes:
+    return b"|".join(gl.glGetString(name) or b"" for name in (gl.GL_VENDOR, gl.GL_RENDERER, gl.GL_VERSION))
+
+
+def _supports_binaries() -> bool:
+    try:
+        return gl.glGetIntegerv(gl.GL_NUM_PROGRAM_BINARY_FORMATS) > 0
+    except gl.GLError:
+        return False
+
+
+def _load_binary(path: str) -> int | None:
+    """Program restored from a binary saved by `_save_binary`, None if the driver rejects it"""
+
+    try:
+        with open(path, "rb") as binary_file:
+            data = binary_file.read()
+    except OSError:
+        return None
+
+    binary_format = int.from_bytes(data[:4], "little")
+    binary = np.frombuffer(data, dtype=np.uint8, offset=4)
+
+    program = gl.glCreateProgram()
+    try:
+        gl.glProgramBinary(program, binary_format, binary, binary.size)
+        if gl.glGetProgramiv(program, gl.GL_LINK_STATUS):
+            return program
+    except gl.GLError:
+        pass
+
+    # Driver updates invalidate old binaries, the caller links from source again
+    gl.glDeleteProgram(program)
+    return None
+
+
+def _save_binary(program: int, path: str) -> None:
+    length = int(gl.glGetProgramiv(program, gl.GL_PROGRAM_BINARY_LENGTH))
+    if not length:
+        return
+
+    binary = np.empty(length, dtype=np.uint8)
+    written = np.zeros(1, dtype=np.int32)
+    binary_format = np.zeros(1, dtype=np.uint32)
+    gl.glGetProgramBinary(program, length, written, binary_format, binary)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as binary_file:
+        binary_file.write(int(binary_format[0]).to_bytes(4, "little"))
+        binary_file.write(binary[: int(written[0])].tobytes())
+    os.replace(temp_path, path)
+
+
+def _link(vertex_source: str, fragment_source: str, retrievable: bool) -> int:
+    vertex_shader = compileShader(vertex_source, gl.GL_VERTEX_SHADER)
+    fragment_shader = compileShader(fragment_source, gl.GL_FRAGMENT_SHADER)
+
+    program = gl.glCreateProgram()
+    gl.glAttachShader(program, vertex_shader)
+    gl.glAttachShader(program, fragment_shader)
+    if retrievable:
+        gl.glProgramParameteri(program, gl.GL_PROGRAM_BINARY_RETRIEVABLE_HINT, gl.GL_TRUE)
+    gl.glLinkProgram(program)
+
+    gl.glDetachShader(program, vertex_shader)
+    gl.glDetachShader(program, fragment_shader)
+    gl.glDeleteShader(vertex_shader)
+    gl.glDeleteShader(fragment_shader)
+
+    if not gl.glGetProgramiv(program, gl.GL_LINK_STATUS):
+        log = gl.glGetProgramInfoLog(program)
+        gl.glDeleteProgram(program)
+        raise RuntimeError(f"Link failure: {log}")
+
+    return program
+
+
+def cached_program(vertex_source: str, fragment_source: str) -> tuple[int, UniformCache]:
+    """Linked program for the shader sources and its uniforms, in the current context.
+
+    Contexts of the global share group reuse one program per process. Otherwise the
+    program comes from the binary cache on disk, or is compiled and stored there."""
+
+    key = hashlib.sha256(f"{vertex_source}\0{fragment_source}".encode()).hexdigest()
+    shared = _in_global_share_group()
+    if shared and key in _programs:
+        return _programs[key]
+
+    binaries = _supports_binaries()
+    path = os.path.join(CACHE_DIR, hashlib.sha256(key.encode() + _driver()).hexdigest() + ".bin")
+
+    program = _load_binary(path) if binaries else None
+    if program is None:
+        program = _link(vertex_source, fragment_source, retrievable=binaries)
+        if binaries:
+            try:
+                _save_binary(program, path)
+            except OSError as e:
+                print(f"Can't cache shader program: {e}")
+
+    entry = (program, UniformCache(program))
+    if shared:
+        _programs[key] = entry
+    return entry
@@ -1,11 +1,13 @@
 import os
+from abc import abstractmethod
 from datetime import datetime
 
-from PySide6.QtWidgets import QFileDialog
+import numpy as np
+from PySide6.QtWidgets import QFileDialog, QMessageBox
 
-from frontend.components import ColoredButton, NamedCheckBox
+from frontend.components import ColoredButton, NamedCheckBox, NamedSpinBox
 from frontend.constants import get_color
-from util import use_setter
+from util import render_tiled, use_setter
 
 from .fractal_abc import FractalABC
 
@@ -14,6 +16,7 @@ class ScreenshotableFractal(FractalABC):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._high_screenshot_quality = False
+        self._poster_size = (7680, 4320)
 
     @property
     def high_screenshot_quality(self) -> bool:
@@ -23,6 +26,22 @@ class ScreenshotableFractal(FractalABC):
     def high_screenshot_quality(self, new_value: bool) -> None:
         self._high_screenshot_quality = new_value
 
+    @property
+    def poster_width(self) -> int:
+        return self._poster_size[0]
+
+    @poster_width.setter
+    def poster_width(self, new_value: int) -> None:
+        self._poster_size = (int(new_value), self._poster_size[1])
+
+    @property
+    def poster_height(self) -> int:
+        return self._poster_size[1]
+
+    @poster_height.setter
+    def poster_height(self, new_value: int) -> None:
+        self._poster_size = (self._poster_size[0], int(new_value))
+
     def fractal_controls(self):
         return [
             NamedCheckBox(
@@ -35,8 +54,35 @@ class ScreenshotableFractal(FractalABC):
                 color=get_color("blue"),
                 handlers=[self._take_screenshot],
             ),
+            NamedSpinBox(
+                name="Poster Width",
+                scope=(1, 1_000_000),
+                step=1,
+                initial=self.poster_width,
+                handlers=[lambda value: use_setter(self, "poster_width", value)],
+            ),
+            NamedSpinBox(
+                name="Poster Height",
+                scope=(1, 1_000_000),
+                step=1,
+                initial=self.poster_height,
+                handlers=[lambda value: use_setter(self, "poster_height", value)],
+            ),
+            ColoredButton(
+                name="Render Poster",
+                color=get_color("blue"),
+                handlers=[self._render_poster],
+            ),
         ]
 
+    @abstractmethod
+    def _grab_tile(self, window: tuple[int, int, int, int], size: tuple[int, int]) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def _max_tiled_size(self) -> tuple[int, int]:
+        pass
+
     def _take_screenshot(self) -> None:
         folder_path = QFileDialog.getExistingDirectory(self, "Choose folder")
         date = datetime.now().strftime("%m-%d-%Y_%H-%M-%S")
@@ -53,3 +99,24 @@ class ScreenshotableFractal(FractalABC):
         scr.save(path, "jpg")
 
         self.resize(old_size)
+
+    def _render_poster(self) -> None:
+        max_width, max_height = self._max_tiled_size()
+        if self.poster_width > max_width or self.poster_height > max_height:
+            QMessageBox.warning(
+                self,
+                "Poster is too large",
+                f"Posters are limited to {max_width}x{max_height}, use 'py-fractals render --tile-size'",
+            )
+            return
+
+        folder_path = QFileDialog.getExistingDirectory(self, "Choose folder")
+        if not folder_path:
+            return
+
+        date = datetime.now().strftime("%m-%d-%Y_%H-%M-%S")
+        render_tiled(
+            render_tile=lambda window: self._grab_tile(window, self._poster_size),
+            size=self._poster_size,
+            filename=os.path.join(folder_path, f"{date}.png"),
+        )
@@ -1,4 +1,6 @@
+import json
 from abc import abstractmethod
+from typing import Any
 
 from PySide6.QtGui import QColor
 from PySide6.QtWidgets import QFileDialog
@@ -14,12 +16,20 @@ class StatefulFractal(FractalABC):
         super().__init__(*args, **kwargs)
 
     @abstractmethod
+    def _state(self) -> dict[str, Any]:
+        """Properties of the fractal as a JSON serializable dict"""
+
     def _save_state(self, filename: str) -> None:
-        pass
+        with open(filename, "w") as f:
+            json.dump(self._state(), f)
 
     @abstractmethod
+    def _apply_state(self, state: dict[str, Any]) -> None:
+        """Sets the properties from a dict `_save_state` wrote"""
+
     def _load_state(self, filename: str) -> None:
-        pass
+        with open(filename, "r") as f:
+            self._apply_state(json.load(f))
 
     def fractal_controls(self):
         return [
@@ -0,0 +1,69 @@
+from typing import Any, Callable
+
+import OpenGL.GL as gl
+
+__all__ = ["UniformCache"]
+
+# glUniform* setter by the type glGetActiveUniform reports
+_SETTERS: dict[int, tuple[Callable[..., None], type]] = {
+    gl.GL_FLOAT: (gl.glUniform1f, float),
+    gl.GL_FLOAT_VEC2: (gl.glUniform2f, float),
+    gl.GL_FLOAT_VEC3: (gl.glUniform3f, float),
+    gl.GL_FLOAT_VEC4: (gl.glUniform4f, float),
+    gl.GL_DOUBLE: (gl.glUniform1d, float),
+    gl.GL_DOUBLE_VEC2: (gl.glUniform2d, float),
+    gl.GL_DOUBLE_VEC3: (gl.glUniform3d, float),
+    gl.GL_DOUBLE_VEC4: (gl.glUniform4d, float),
+    gl.GL_INT: (gl.glUniform1i, int),
+    gl.GL_INT_VEC2: (gl.glUniform2i, int),
+    gl.GL_INT_VEC3: (gl.glUniform3i, int),
+    gl.GL_INT_VEC4: (gl.glUniform4i, int),
+    gl.GL_BOOL: (gl.glUniform1i, int),
+    gl.GL_SAMPLER_2D: (gl.glUniform1i, int),
+}
+
+
+class UniformCache:
+    """Active uniforms of a linked program and the values they were last set to.
+
+    Locations and types are resolved once, `update` uploads only the values that
+    changed since the previous call. Uniforms the compiler dropped are ignored."""
+
+    def __init__(self, program: int):
+        self._program = program
+        self._uniforms: dict[str, tuple[int, Callable[..., None], type]] = {}
+        self._values: dict[str, tuple] = {}
+
+        for index in range(gl.glGetProgramiv(program, gl.GL_ACTIVE_UNIFORMS)):
+            name, _, kind = gl.glGetActiveUniform(program, index)
+            name = name.decode() if isinstance(name, bytes) else name
+            if kind not in _SETTERS:
+                continue
+
+            # Arrays are reported as NAME[0], only their first element is set here
+            name = name.removesuffix("[0]")
+            setter, cast = _SETTERS[kind]
+            self._uniforms[name] = (gl.glGetUniformLocation(program, name), setter, cast)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._uniforms
+
+    def update(self, values: dict[str, Any]) -> None:
+        """Uploads `values` by uniform name, the program has to be in use"""
+
+        for name, value in values.items():
+            if name not in self._uniforms:
+                continue
+
+            value = tuple(value) if isinstance(value, (tuple, list)) else (value,)
+            if self._values.get(name) == value:
+                continue
+
+            location, setter, cast = self._uniforms[name]
+            setter(location, *map(cast, value))
+            self._values[name] = value
+
+    def invalidate(self) -> None:
+        """Forgets the uploaded values, the next `update` sets everything again"""
+
+        self._values.clear()
@@ -1,7 +1,5 @@
-import json
 from typing import Any
 
-import OpenGL.GL as gl
 from PySide6.QtCore import QPointF
 
 from frontend.components import NamedSlider
@@ -48,8 +46,8 @@ class BurningShip2D(StatefulFractal, AAFractal, IterableFractal, ColorableFracta
             ]
         )
 
-    def _save_state(self, filename: str) -> None:
-        state = {
+    def _state(self) -> dict[str, Any]:
+        return {
             "max_iter": self.max_iter,
             "zoom_factor": self.zoom_factor,
             "central_lines": self.central_lines,
@@ -63,14 +61,10 @@ class BurningShip2D(StatefulFractal, AAFractal, IterableFractal, ColorableFracta
             "power": self.power,
             "offset": {"x": self.offset.x(), "y": self.offset.y()},
             "antialiasing": self.antialiasing,
+            "periodicity": self.periodicity,
         }
-        with open(filename, "w") as f:
-            json.dump(state, f)
-
-    def _load_state(self, filename: str) -> None:
-        with open(filename, "r") as f:
-            state = json.load(f)
 
+    def _apply_state(self, state: dict[str, Any]) -> None:
         self.max_iter = state["max_iter"]
         self.zoom_factor = state["zoom_factor"]
         self.central_lines = state["central_lines"]
@@ -84,35 +78,22 @@ class BurningShip2D(StatefulFractal, AAFractal, IterableFractal, ColorableFracta
         self.power = state["power"]
         self.offset = QPointF(state["offset"]["x"], state["offset"]["y"])
         self.antialiasing = state["antialiasing"]
+        self.periodicity = state.get("periodicity", False)
 
         self.update()
 
     def animation_controls(self) -> list[Any]:
         return super().animation_controls() + []
 
-    def paintGL(self) -> None:
-        self.makeCurrent()
-        gl.glUseProgram(self._program)
-        gl.glViewport(0, 0, *self._widget_size)
-
-        location = lambda key: gl.glGetUniformLocation(self._program, key)
-
-        gl.glUniform1i(location("MAX_ITER"), self.max_iter)
-        gl.glUniform2f(location("RES"), *self._widget_size)
-        gl.glUniform1d(location("ZOOM"), self.zoom_factor)
-        gl.glUniform1i(location("DRAW_LINES"), int(self.central_lines))
-        gl.glUniform1f(location("PHI"), self.rotation_angle)
-
-        gl.glUniform4f(
-            location("COLOR"),
-            self._color.redF(),
-            self._color.greenF(),
-            self._color.blueF(),
-            self._color.alphaF(),
-        )
-
-        gl.glUniform1f(location("POWER"), float(self.power))
-        gl.glUniform2d(location("OFFSET"), self.offset.x(), self.offset.y())
-        gl.glUniform1i(location("AA"), 2 if self.antialiasing else 1)
-
-        gl.glDrawElements(gl.GL_TRIANGLES, 6, gl.GL_UNSIGNED_INT, None)
+    def _uniform_values(self) -> dict[str, Any]:
+        return {
+            **super()._uniform_values(),
+            "MAX_ITER": self.max_iter,
+            "ZOOM": self.zoom_factor,
+            "DRAW_LINES": int(self.central_lines),
+            "PHI": self.rotation_angle,
+            "COLOR": self._color.getRgbF(),
+            "POWER": float(self.power),
+            "OFFSET": (self.offset.x(), self.offset.y()),
+            "AA": 2 if self.antialiasing else 1,
+        }
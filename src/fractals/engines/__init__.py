@@ -0,0 +1,23 @@
+from . import numpy_2d, numpy_3d, perturbation, subdivision
+from .reference_orbit import ReferenceOrbit, ReferenceOrbitCache, precision_for_zoom
+from .registry import ENGINES, clear_cache, render_state
+from .states import KINDS, infer_kind, load_state
+from .timeline import Timeline, frame_name
+
+__all__ = [
+    "ENGINES",
+    "KINDS",
+    "clear_cache",
+    "frame_name",
+    "infer_kind",
+    "load_state",
+    "numpy_2d",
+    "numpy_3d",
+    "perturbation",
+    "precision_for_zoom",
+    "ReferenceOrbit",
+    "ReferenceOrbitCache",
+    "render_state",
+    "subdivision",
+    "Timeline",
+]
@@ -0,0 +1,347 @@
+from math import ceil, cos, log, pi, sin
+
+import numpy as np
+
+__all__ = [
+    "FRACTALS",
+    "apply_color",
+    "colorize",
+    "complex_grid",
+    "escape_time",
+    "period_eps",
+    "pan_samples",
+    "pixel_deltas",
+    "pixel_shift",
+    "render",
+    "sample_iterations",
+    "to_rgb8",
+]
+
+FRACTALS = ("mandelbrot2d", "julia2d", "burningship2d")
+
+# Same bailout as `lim` in the 2D shaders
+ESCAPE_RADIUS_SQR = 512.0
+
+# Offsets that move a view by a pixel count this close to a whole number count as a pan
+PIXEL_SHIFT_TOLERANCE = 1e-3
+
+# Distance in pixels under which an orbit counts as returning to a point it visited
+PERIOD_TOLERANCE = 1e-3
+
+# Number of points iterated at once, bounds the temporary arrays of a tile
+BATCH_SIZE = 1 << 18
+
+
+def pixel_deltas(
+    res: tuple[int, int],
+    zoom: float,
+    phi: float,
+    window: tuple[int, int, int, int] | None = None,
+    sample: tuple[float, float] = (0.0, 0.0),
+) -> np.ndarray:
+    """Offsets of the pixels of `window` from the view center, rotated like in the shaders.
+
+    `window` is (x, y, width, height) in image coordinates with y growing downwards,
+    `sample` is the subpixel shift added to `gl_FragCoord` when antialiasing."""
+
+    width, height = res
+    x, y, w, h = window or (0, 0, width, height)
+
+    frag_x = np.arange(x, x + w, dtype=np.float64) + 0.5 + sample[0]
+    frag_y = (height - 1 - np.arange(y, y + h, dtype=np.float64)) + 0.5 + sample[1]
+
+    scale = 1.0 / (min(width, height) * zoom)
+    deltas = ((2.0 * frag_x - width) * scale)[np.newaxis, :] + 1j * ((2.0 * frag_y - height) * scale)[:, np.newaxis]
+
+    if phi:
+        deltas *= complex(cos(pi * phi), -sin(pi * phi))
+    return deltas
+
+
+def complex_grid(
+    res: tuple[int, int],
+    offset: tuple[float, float],
+    zoom: float,
+    phi: float,
+    window: tuple[int, int, int, int] | None = None,
+    sample: tuple[float, float] = (0.0, 0.0),
+) -> np.ndarray:
+    """Points of the complex plane under the pixels of `window`"""
+
+    return pixel_deltas(res, zoom, phi, window, sample) + complex(*offset)
+
+
+def period_eps(res: tuple[int, int], zoom: float) -> float:
+    """Squared distance under which an orbit is taken as periodic, PERIOD_EPS of the shaders.
+
+    Scaled with the pixel size, so that deeper views need closer returns."""
+
+    return (PERIOD_TOLERANCE * 2.0 / (min(res) * zoom)) ** 2
+
+
+def _in_cardioid_or_bulb(c: np.ndarray) -> np.ndarray:
+    x = c.real
+    c2 = x * x + c.imag * c.imag
+    return (256.0 * c2 * c2 - 96.0 * c2 + 32.0 * x - 3.0 < 0.0) | (16.0 * (c2 + 2.0 * x + 1.0) - 1.0 < 0.0)
+
+
+def _step(z: np.ndarray, c: np.ndarray | complex, power: int, burning: bool) -> np.ndarray:
+    if burning:
+        z = np.abs(z.real) - 1j * np.abs(z.imag)
+    if power == 2:
+        return z * z + c
+
+    z0 = z
+    for _ in range(power - 1):
+        z = z * z0
+    return z + c
+
+
+def _compact(keep: np.ndarray, z: np.ndarray, cs: np.ndarray | complex, idx: np.ndarray, saved: np.ndarray | None):
+    """The per point arrays of `_escape_time_batch` reduced to the points still iterated"""
+
+    if not isinstance(cs, complex):
+        cs = cs[keep]
+    if saved is not None:
+        saved = saved[keep]
+    return z[keep], cs, idx[keep], saved
+
+
+def _escape_time_batch(
+    fractal: str,
+    points: np.ndarray,
+    power: float,
+    max_iter: int,
+    c: complex,
+    out: np.ndarray,
+    period_eps: float,
+    periodic: np.ndarray | None,
+) -> None:
+    # The shaders multiply `z` by itself while `j < POWER`, i.e. ceil(POWER) - 1 times
+    int_power = max(1, ceil(power))
+    log_power = log(power) if power > 1 else 1.0
+    log_lim = log(ESCAPE_RADIUS_SQR)
+
+    out.fill(0.0)
+    z = points.copy()
+    idx = np.arange(points.size)
+
+    if fractal == "julia2d":
+        cs = complex(c)
+    else:
+        cs = points.copy()
+
+        if fractal == "mandelbrot2d" and power == 2:
+            keep = ~_in_cardioid_or_bulb(cs)
+            z, cs, idx = z[keep], cs[keep], idx[keep]
+
+    burning = fractal == "burningship2d"
+
+    # Brent's cycle detection: `z` is compared with the point saved at the last power of two
+    saved = z.copy() if period_eps else None
+    check = 1
+
+    for i in range(max_iter):
+        abs_sqr = z.real * z.real + z.imag * z.imag
+        escaped = abs_sqr >= ESCAPE_RADIUS_SQR
+
+        if escaped.any():
+            # Smooth color, see the end of `compute()` in the shaders
+            out[idx[escaped]] = i - np.log(np.log(abs_sqr[escaped]) / log_lim) / log_power
+
+            z, cs, idx, saved = _compact(~escaped, z, cs, idx, saved)
+
+        if i == max_iter - 1 or not idx.size:
+            break
+
+        z = _step(z, cs, int_power, burning)
+
+        if period_eps:
+            d = z - saved
+            cycled = d.real * d.real + d.imag * d.imag < period_eps
+            if cycled.any():
+                # Periodic orbits never escape, the points keep their zero
+                if periodic is not None:
+                    periodic[idx[cycled]] = True
+                z, cs, idx, saved = _compact(~cycled, z, cs, idx, saved)
+
+            if i + 1 == check:
+                saved = z.copy()
+                check *= 2
+
+
+def escape_time(
+    fractal: str,
+    points: np.ndarray,
+    power: float = 2.0,
+    max_iter: int = 100,
+    c: complex = 0j,
+    period_eps: float = 0.0,
+    periodic: np.ndarray | None = None,
+) -> np.ndarray:
+    """Smooth iteration counts of `points`, zero for points that do not escape.
+
+    For Mandelbrot and Burning Ship the points are the `c` values, for Julia they are
+    the starting `z` values and `c` is the Julia constant. A nonzero `period_eps` stops
+    orbits that return that close to an earlier point, and marks them in the boolean
+    `periodic` array of the shape of `points` if one is given."""
+
+    if fractal not in FRACTALS:
+        raise ValueError(f"Unknown fractal: {fractal}")
+
+    flat = np.ascontiguousarray(points, dtype=np.complex128).ravel()
+    result = np.empty(flat.size, dtype=np.float64)
+    cycled = np.zeros(flat.size, dtype=bool) if periodic is not None else None
+
+    for start in range(0, flat.size, BATCH_SIZE):
+        stop = start + BATCH_SIZE
+        _escape_time_batch(
+            fractal,
+            flat[start:stop],
+            power,
+            max_iter,
+            c,
+            result[start:stop],
+            period_eps,
+            None if cycled is None else cycled[start:stop],
+        )
+
+    if periodic is not None:
+        periodic[...] = cycled.reshape(np.shape(points))
+
+    return result.reshape(np.shape(points))
+
+
+def apply_color(iterations: np.ndarray, power: float, color: tuple[float, ...]) -> np.ndarray:
+    """Cosine palette of `apply_color()` in the shaders, returns float RGB in [0, 1]"""
+
+    phase = np.asarray(color[:3], dtype=np.float64)
+    return 0.5 - 0.5 * np.cos((iterations * power * 0.025)[..., np.newaxis] + phase)
+
+
+def to_rgb8(colors: np.ndarray) -> np.ndarray:
+    return np.rint(np.clip(colors, 0.0, 1.0) * 255.0).astype(np.uint8)
+
+
+def sample_iterations(
+    fractal: str,
+    res: tuple[int, int],
+    *,
+    offset: tuple[float, float] = (0.0, 0.0),
+    zoom: float = 1.0,
+    phi: float = 0.0,
+    power: float = 2.0,
+    max_iter: int = 100,
+    aa: int = 1,
+    c: complex = 0j,
+    window: tuple[int, int, int, int] | None = None,
+    periodicity: bool = False,
+) -> np.ndarray:
+    """Smooth iteration counts of every AA sample of `window` as an (aa * aa, h, w) array,
+    the compute stage of the 2D shaders. Color choices do not affect it."""
+
+    width, height = res
+    _, _, w, h = window or (0, 0, width, height)
+    eps = period_eps(res, zoom) if periodicity else 0.0
+
+    samples = np.empty((aa * aa, h, w), dtype=np.float64)
+    for i in range(aa):
+        for j in range(aa):
+            points = complex_grid(res, offset, zoom, phi, window, sample=(i / aa, j / aa))
+            samples[i * aa + j] = escape_time(fractal, points, power, max_iter, c, eps)
+
+    return samples
+
+
+def pixel_shift(
+    res: tuple[int, int], zoom: float, old_offset: tuple[float, float], new_offset: tuple[float, float]
+) -> tuple[int, int] | None:
+    """Whole pixels (x, y in image coordinates) the content of an unrotated view moves by
+    when its offset changes, None if the move is not a whole number of pixels"""
+
+    scale = min(res) * zoom / 2.0
+    dx = (old_offset[0] - new_offset[0]) * scale
+    dy = (new_offset[1] - old_offset[1]) * scale
+
+    shift = (round(dx), round(dy))
+    if abs(dx - shift[0]) > PIXEL_SHIFT_TOLERANCE or abs(dy - shift[1]) > PIXEL_SHIFT_TOLERANCE:
+        return None
+    return shift
+
+
+def pan_samples(
+    samples: np.ndarray, shift: tuple[int, int], fractal: str, res: tuple[int, int], **params
+) -> np.ndarray:
+    """Samples of the whole unrotated view after its content moved by `shift` pixels.
+
+    Pixels still on screen are copied from `samples` of the previous view, only the
+    exposed columns and rows are computed. `params` are the `sample_iterations`
+    arguments of the new view."""
+
+    width, height = res
+    dx, dy = shift
+    if abs(dx) >= width or abs(dy) >= height:
+        return sample_iterations(fractal, res, **params)
+
+    panned = np.empty_like(samples)
+    panned[:, max(dy, 0) : height + min(dy, 0), max(dx, 0) : width + min(dx, 0)] = samples[
+        :, max(-dy, 0) : height + min(-dy, 0), max(-dx, 0) : width + min(-dx, 0)
+    ]
+
+    # The exposed columns over the full height, then the rest of the exposed rows
+    x = 0 if dx > 0 else width + dx
+    if dx:
+        panned[:, :, x : x + abs(dx)] = sample_iterations(fractal, res, window=(x, 0, abs(dx), height), **params)
+    y = 0 if dy > 0 else height + dy
+    x0, x1 = max(dx, 0), width + min(dx, 0)
+    if dy and x1 > x0:
+        panned[:, y : y + abs(dy), x0:x1] = sample_iterations(fractal, res, window=(x0, y, x1 - x0, abs(dy)), **params)
+
+    return panned
+
+
+def colorize(samples: np.ndarray, power: float, color: tuple[float, ...]) -> np.ndarray:
+    """Color stage of the 2D shaders, averages the colors of the samples of every pixel"""
+
+    colors = np.zeros((*samples.shape[1:], 3), dtype=np.float64)
+    for sample in samples:
+        colors += apply_color(sample, power, color)
+    colors /= len(samples)
+
+    return to_rgb8(colors)
+
+
+def render(
+    fractal: str,
+    res: tuple[int, int],
+    *,
+    offset: tuple[float, float] = (0.0, 0.0),
+    zoom: float = 1.0,
+    phi: float = 0.0,
+    power: float = 2.0,
+    max_iter: int = 100,
+    aa: int = 1,
+    color: tuple[float, ...] = (1.0, 1.0, 1.0, 1.0),
+    c: complex = 0j,
+    window: tuple[int, int, int, int] | None = None,
+    periodicity: bool = False,
+) -> np.ndarray:
+    """Renders `window` of a `res` sized image into an RGB uint8 array.
+
+    Takes the uniforms the 2D fractals upload in `paintGL`: OFFSET, ZOOM, PHI, POWER,
+    MAX_ITER, AA, COLOR, PERIODICITY and C for Julia."""
+
+    samples = sample_iterations(
+        fractal,
+        res,
+        offset=offset,
+        zoom=zoom,
+        phi=phi,
+        power=power,
+        max_iter=max_iter,
+        aa=aa,
+        c=c,
+        window=window,
+        periodicity=periodicity,
+    )
+    return colorize(samples, power, color)
@@ -0,0 +1,495 @@
+from math import ceil, cos, sin
+from typing import Any, Callable
+
+import numpy as np
+
+from .numpy_2d import to_rgb8
+
+__all__ = [
+    "FRACTALS",
+    "bulb_distance",
+    "camera_rays",
+    "mandelbox_distance",
+    "normals",
+    "quaternion_distance",
+    "ray_march",
+    "render",
+    "rotation",
+]
+
+# Named after the fragment shaders, the 4d ones are the quaternion variants
+FRACTALS = ("mandelbox", "mandelbrot3d", "julia3d", "mandelbrot4d", "julia4d")
+
+# Bailout radius of the bulb and quaternion distance estimators
+BAILOUT = 2.0
+
+# Same as MAX_RAY_LENGTH in the 3D shaders
+MAX_RAY_LENGTH = 100.0
+
+# Rays marched at once, bounds the temporary arrays of a tile
+BATCH_SIZE = 1 << 16
+
+# Offset of the samples taken around a point for its normal, `e` in `get_normal()`
+NORMAL_EPSILON = 1e-5
+
+DistanceEstimator = Callable[[np.ndarray], np.ndarray]
+
+
+def _glsl_mat3(*columns: tuple[float, float, float]) -> np.ndarray:
+    # GLSL matrices are built from columns
+    return np.array(columns, dtype=np.float64).T
+
+
+def rotation(theta: float, phi: float) -> np.ndarray:
+    """`rotate_x(THETA) * rotate_y(PHI)` of the 3D shaders. They apply it as `v * RT`,
+    which for row vectors in NumPy is `v @ RT`."""
+
+    cx, sx = cos(theta), sin(theta)
+    cy, sy = cos(phi), sin(phi)
+    rotate_x = _glsl_mat3((1, 0, 0), (0, cx, -sx), (0, sx, cx))
+    rotate_y = _glsl_mat3((cy, 0, sy), (0, 1, 0), (-sy, 0, cy))
+    return rotate_x @ rotate_y
+
+
+def camera_rays(
+    res: tuple[int, int],
+    rotation_matrix: np.ndarray,
+    window: tuple[int, int, int, int] | None = None,
+    sample: tuple[float, float] = (0.0, 0.0),
+    uv_by_height: bool = False,
+) -> np.ndarray:
+    """Unit view directions of the pixels of `window` as an (h * w, 3) array, row by row.
+
+    `window` is (x, y, width, height) in image coordinates with y growing downwards,
+    `sample` is the subpixel shift added to `gl_FragCoord` when antialiasing. Shaders
+    that divide `uv` by RES.y rather than the smaller side need `uv_by_height`."""
+
+    width, height = res
+    x, y, w, h = window or (0, 0, width, height)
+
+    frag_x = np.arange(x, x + w, dtype=np.float64) + 0.5 + sample[0]
+    frag_y = (height - 1 - np.arange(y, y + h, dtype=np.float64)) + 0.5 + sample[1]
+
+    scale = 1.0 / (height if uv_by_height else min(width, height))
+    directions = np.empty((h, w, 3), dtype=np.float64)
+    directions[..., 0] = ((frag_x - 0.5 * width) * scale)[np.newaxis, :]
+    directions[..., 1] = ((frag_y - 0.5 * height) * scale)[:, np.newaxis]
+    directions[..., 2] = -1.0
+
+    directions = directions.reshape(-1, 3)
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    return directions @ rotation_matrix
+
+
+def mandelbox_distance(
+    points: np.ndarray, max_iter: int, folding: float, scale: float, out_rad: float, in_rad: float
+) -> np.ndarray:
+    """`get_mandelbox_distance()` of the shader for an (n, 3) array of points"""
+
+    out_rad_sqr, in_rad_sqr = out_rad * out_rad, in_rad * in_rad
+
+    z = points.copy()
+    dz = np.ones(len(points), dtype=np.float64)
+    for _ in range(max_iter):
+        # Box fold
+        z = np.clip(z, -folding, folding) * 2.0 - z
+
+        # Sphere fold: OUT_RAD^2 / IN_RAD^2 inside the inner sphere, OUT_RAD^2 / |z|^2
+        # between the spheres, nothing outside
+        zdot = np.einsum("ij,ij->i", z, z)
+        factor = out_rad_sqr / np.maximum(zdot, in_rad_sqr)
+        factor[(zdot >= in_rad_sqr) & (zdot >= out_rad_sqr)] = 1.0
+        z *= factor[:, np.newaxis]
+        dz *= factor
+
+        z = scale * z + points
+        dz = dz * abs(scale) + 1.0
+
+    return np.linalg.norm(z, axis=1) / np.abs(dz)
+
+
+def _escape_distance(
+    z: np.ndarray, c: np.ndarray, power: float, max_iter: int, step: Callable[[np.ndarray], np.ndarray]
+) -> np.ndarray:
+    """0.5 |z| log|z| / |z'| of orbits z -> step(z) + c stopped at BAILOUT, with the running
+    derivative |z'| -> power |z|^(power - 1) |z'| + 1 of the shaders.
+
+    `c` is a single point or one per orbit. Escaped orbits are dropped after every iteration."""
+
+    count = len(z)
+    final_zmod = np.empty(count, dtype=np.float64)
+    final_dzmod = np.empty(count, dtype=np.float64)
+
+    zmod = np.linalg.norm(z, axis=1)
+    dzmod = np.ones(count, dtype=np.float64)
+    idx = np.arange(count)
+    for _ in range(max_iter):
+        dzmod = power * zmod ** (power - 1.0) * dzmod + 1.0
+        z = step(z) + c
+        zmod = np.linalg.norm(z, axis=1)
+
+        escaped = zmod > BAILOUT
+        if escaped.any():
+            final_zmod[idx[escaped]] = zmod[escaped]
+            final_dzmod[idx[escaped]] = dzmod[escaped]
+
+            keep = ~escaped
+            z, zmod, dzmod, idx = z[keep], zmod[keep], dzmod[keep], idx[keep]
+            if c.ndim == 2:
+                c = c[keep]
+            if not idx.size:
+                break
+
+    final_zmod[idx] = zmod
+    final_dzmod[idx] = dzmod
+    return 0.5 * final_zmod / final_dzmod * np.log(final_zmod)
+
+
+def _polar_power(z: np.ndarray, power: float, a_shift: float, b_shift: float) -> np.ndarray:
+    """The spherical power of the bulb shaders, the angles turned by the shifts"""
+
+    r = np.linalg.norm(z, axis=1)
+    a = power * np.arctan2(z[:, 1], z[:, 0]) + a_shift
+    b = power * np.arcsin(np.clip(z[:, 2] / r, -1.0, 1.0)) + b_shift
+
+    rp = r**power
+    return np.stack((rp * np.cos(a) * np.cos(b), rp * np.sin(a) * np.cos(b), rp * np.sin(b)), axis=1)
+
+
+def _quaternion_power(z: np.ndarray, power: float) -> np.ndarray:
+    # The shaders multiply by `z` while `j < POWER`, i.e. ceil(POWER) - 1 times
+    z0 = z
+    for _ in range(max(1, ceil(power)) - 1):
+        a, b = z, z0
+        z = np.stack(
+            (
+                a[:, 0] * b[:, 0] - a[:, 1] * b[:, 1] - a[:, 2] * b[:, 2] - a[:, 3] * b[:, 3],
+                a[:, 1] * b[:, 0] + a[:, 0] * b[:, 1] + a[:, 2] * b[:, 3] - a[:, 3] * b[:, 2],
+                a[:, 2] * b[:, 0] + a[:, 0] * b[:, 2] + a[:, 3] * b[:, 1] - a[:, 1] * b[:, 3],
+                a[:, 3] * b[:, 0] + a[:, 0] * b[:, 3] + a[:, 1] * b[:, 2] - a[:, 2] * b[:, 1],
+            ),
+            axis=1,
+        )
+    return z
+
+
+def bulb_distance(
+    points: np.ndarray,
+    power: float,
+    max_iter: int,
+    rotate_y: float = 0.0,
+    cut: bool = False,
+    julia_c: tuple[float, float, float] | None = None,
+) -> np.ndarray:
+    """Distance estimate of the power-N Mandelbulb, `get_mandelbrot_distance()` of
+    mandelbrot3d.frag, or of its Julia set for `julia_c` like julia3d.frag.
+
+    `rotate_y` is ROTATE_Y, added to the second angle of the Mandelbulb and to the
+    first one of the Julia set as in the shaders. With `cut` the half y > 0 is removed."""
+
+    z = points[:, [0, 2, 1]]
+    if julia_c is None:
+        c, shifts = z, (0.0, rotate_y)
+    else:
+        c, shifts = np.asarray(julia_c, dtype=np.float64), (rotate_y, 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dist = _escape_distance(z, c, power, max_iter, lambda z: _polar_power(z, power, *shifts))
+    return np.maximum(dist, points[:, 1]) if cut else dist
+
+
+def quaternion_distance(
+    points: np.ndarray,
+    power: float,
+    max_iter: int,
+    cut: bool = False,
+    julia_c: tuple[float, float, float] | None = None,
+) -> np.ndarray:
+    """Distance estimate of the quaternion Mandelbrot set of mandelbrot4d.frag, or of the
+    quaternion Julia set of julia4d.frag for `julia_c`, sliced at the fourth coordinate 0"""
+
+    z = np.zeros((len(points), 4), dtype=np.float64)
+    z[:, :3] = points
+    if julia_c is None:
+        # The shader shifts the set to the center of the view
+        z[:, 0] -= 0.4
+        c = z
+    else:
+        c = np.array([*julia_c, 0.0], dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dist = _escape_distance(z, c, power, max_iter, lambda z: _quaternion_power(z, power))
+    return np.maximum(dist, points[:, 1]) if cut else dist
+
+
+def ray_march(
+    origins: np.ndarray,
+    directions: np.ndarray,
+    distance: DistanceEstimator,
+    max_steps: int,
+    ao_coef: float,
+    res: tuple[int, int],
+) -> tuple[np.ndarray, np.ndarray]:
+    """`ray_march()` of the 3D shaders for (n, 3) arrays of rays, returns the distances to
+    the hits, MAX_RAY_LENGTH for misses, and the ambient occlusion of every ray.
+
+    Only the rays still marching are evaluated, finished ones are dropped after every step."""
+
+    count = len(origins)
+    distances = np.full(count, MAX_RAY_LENGTH, dtype=np.float64)
+    ao = np.ones(count, dtype=np.float64)
+
+    positions = origins.copy()
+    directions = directions.copy()
+    travelled = np.zeros(count, dtype=np.float64)
+    idx = np.arange(count)
+    precision = 4.0 * max(res)
+
+    for step in range(max_steps):
+        if not idx.size:
+            break
+
+        dist = distance(positions)
+        travelled += dist
+
+        hit = dist < travelled / precision
+        if hit.any():
+            distances[idx[hit]] = travelled[hit]
+            ao[idx[hit]] = np.clip(1.0 - step / ao_coef, 0.0, 1.0)
+
+        # Rays that went too far keep MAX_RAY_LENGTH and no occlusion
+        keep = ~hit & (travelled <= MAX_RAY_LENGTH)
+        positions, directions, travelled, dist, idx = (
+            positions[keep],
+            directions[keep],
+            travelled[keep],
+            dist[keep],
+            idx[keep],
+        )
+        positions += dist[:, np.newaxis] * directions
+
+    return distances, ao
+
+
+def normals(points: np.ndarray, distance: DistanceEstimator) -> np.ndarray:
+    """`get_normal()` of the 3D shaders: the tetrahedron of distance samples around each point"""
+
+    e = np.array([[1, -1, -1], [-1, -1, 1], [-1, 1, -1], [1, 1, 1]], dtype=np.float64) * NORMAL_EPSILON
+
+    # All four samples of all points in one call
+    samples = distance((points[np.newaxis, :, :] + e[:, np.newaxis, :]).reshape(-1, 3)).reshape(4, -1)
+    gradient = np.einsum("kn,kj->nj", samples, e)
+    return gradient / np.linalg.norm(gradient, axis=1, keepdims=True)
+
+
+def _shade(
+    origins: np.ndarray,
+    directions: np.ndarray,
+    distance: DistanceEstimator,
+    res: tuple[int, int],
+    max_steps: int,
+    ao_coef: float,
+    shadows: bool,
+    light_source: tuple[float, float, float],
+    color: tuple[float, ...],
+    bg_color: tuple[float, ...],
+    ao_power: int,
+) -> np.ndarray:
+    """Colors of a batch of camera rays, `render()` of the 3D shaders"""
+
+    dist, ao = ray_march(origins, directions, distance, max_steps, ao_coef, res)
+    colors = np.empty((len(origins), 3), dtype=np.float64)
+    colors[:] = bg_color[:3]
+
+    hit = dist < MAX_RAY_LENGTH
+    if not hit.any():
+        return colors
+
+    # `get_light()`: diffuse light darkened where the way to the light source is blocked
+    positions = origins[hit] + directions[hit] * dist[hit, np.newaxis]
+    to_light = np.asarray(light_source, dtype=np.float64) - positions
+    light_distance = np.linalg.norm(to_light, axis=1)
+    light_direction = to_light / light_distance[:, np.newaxis]
+
+    normal = normals(positions, distance)
+    light = np.clip(np.einsum("ij,ij->i", normal, light_direction), 0.0, 1.0)
+    if shadows:
+        blocker, _ = ray_march(positions + normal * 0.001, light_direction, distance, max_steps, ao_coef, res)
+        light[blocker < light_distance] *= 0.3
+
+    shaded = 0.5 * light[:, np.newaxis] + 0.5 * np.asarray(color[:3], dtype=np.float64)
+    colors[hit] = shaded * (ao[hit] ** ao_power)[:, np.newaxis]
+    return colors
+
+
+def _render(
+    res: tuple[int, int],
+    window: tuple[int, int, int, int] | None,
+    aa: int,
+    origin: tuple[float, float, float],
+    rotation_matrix: np.ndarray,
+    uv_by_height: bool = False,
+    **shading,
+) -> np.ndarray:
+    width, height = res
+    _, _, w, h = window or (0, 0, width, height)
+
+    colors = np.zeros((h * w, 3), dtype=np.float64)
+    for i in range(aa):
+        for j in range(aa):
+            directions = camera_rays(res, rotation_matrix, window, (i / aa, j / aa), uv_by_height)
+            for start in range(0, len(directions), BATCH_SIZE):
+                batch = directions[start : start + BATCH_SIZE]
+                origins = np.broadcast_to(np.asarray(origin, dtype=np.float64), batch.shape)
+                colors[start : start + BATCH_SIZE] += _shade(origins, batch, res=res, **shading)
+    colors /= aa * aa
+
+    return to_rgb8(colors.reshape(h, w, 3))
+
+
+def _mandelbox_scene(
+    *,
+    offset: tuple[float, float, float] = (0.0, 0.0, 50.0),
+    h_angle: float = 0.0,
+    v_angle: float = 0.0,
+    max_iter: int = 20,
+    depth: int = 300,
+    ao: float = 250.0,
+    shadows: bool = False,
+    folding: float = 4.245,
+    scale: float = 2.051,
+    out_rad: float = 5.0,
+    in_rad: float = 3.238,
+    color: tuple[float, ...] = (1.0, 1.0, 1.0, 1.0),
+    bg_color: tuple[float, ...] = (45 / 255, 45 / 255, 45 / 255, 1.0),
+) -> dict[str, Any]:
+    return {
+        "origin": offset,
+        "rotation_matrix": rotation(v_angle, h_angle),
+        "distance": lambda points: mandelbox_distance(points, max_iter, folding, scale, out_rad, in_rad),
+        "max_steps": depth,
+        "ao_coef": ao,
+        "shadows": shadows,
+        "light_source": (0.0, 50.0, 50.0),
+        "color": color,
+        "bg_color": bg_color,
+        "ao_power": 3,
+    }
+
+
+def _orbit_camera(zoom: float, h_angle: float, v_angle: float) -> dict[str, Any]:
+    # The bulb shaders look at the origin from `vec3(0, 0, ZOOM) * RT`
+    rotation_matrix = rotation(v_angle, h_angle)
+    return {"origin": tuple(np.array([0.0, 0.0, zoom]) @ rotation_matrix), "rotation_matrix": rotation_matrix}
+
+
+def _bulb_scene(
+    fractal: str,
+    *,
+    zoom: float = 3.0,
+    h_angle: float = 0.0,
+    v_angle: float = 0.0,
+    max_iter: int = 10,
+    power: float = 9.0,
+    z_angle: float = 0.0,
+    cut: bool = False,
+    depth: int = 400,
+    ao: float = 150.0,
+    shadows: bool = True,
+    color: tuple[float, ...] = (1.0, 1.0, 1.0, 1.0),
+    bg_color: tuple[float, ...] = (45 / 255, 45 / 255, 45 / 255, 1.0),
+) -> dict[str, Any]:
+    """Mandelbrot 3D, `z_angle` is its ROTATE_Y. The quaternion shader has none."""
+
+    if fractal == "mandelbrot3d":
+        distance = lambda points: bulb_distance(points, power, max_iter, z_angle, cut)
+    else:
+        distance = lambda points: quaternion_distance(points, power, max_iter, cut)
+
+    return {
+        **_orbit_camera(zoom, h_angle, v_angle),
+        "uv_by_height": fractal == "mandelbrot4d",
+        "distance": distance,
+        "max_steps": depth,
+        "ao_coef": ao,
+        "shadows": shadows,
+        "light_source": (-2.0, 3.0, 0.0),
+        "color": color,
+        "bg_color": bg_color,
+        "ao_power": 3 if fractal == "mandelbrot3d" else 2,
+    }
+
+
+def _julia_scene(
+    fractal: str,
+    *,
+    zoom: float = 3.0,
+    h_angle: float = 0.0,
+    v_angle: float = 0.0,
+    max_iter: int = 7,
+    power: float = 7.0,
+    abs_c: float = 0.8776,
+    argx_c: float = 2.0,
+    argy_c: float = 2.67,
+    rotate_y: float = 0.0,
+    cut: bool = False,
+    depth: int = 400,
+    ao: float = 120.0,
+    shadows: bool = True,
+    color: tuple[float, ...] = (1.0, 1.0, 1.0, 1.0),
+    bg_color: tuple[float, ...] = (45 / 255, 45 / 255, 45 / 255, 1.0),
+) -> dict[str, Any]:
+    """Julia 3D, `c` is given in spherical coordinates like in the widget. The quaternion
+    shader has no ROTATE_Y."""
+
+    c = (
+        abs_c * cos(argx_c) * cos(argy_c),
+        abs_c * sin(argx_c) * cos(argy_c),
+        abs_c * sin(argy_c),
+    )
+    if fractal == "julia3d":
+        distance = lambda points: bulb_distance(points, power, max_iter, rotate_y, cut, julia_c=c)
+    else:
+        distance = lambda points: quaternion_distance(points, power, max_iter, cut, julia_c=c)
+
+    return {
+        **_orbit_camera(zoom, h_angle, v_angle),
+        "uv_by_height": True,
+        "distance": distance,
+        "max_steps": depth,
+        "ao_coef": ao,
+        "shadows": shadows,
+        "light_source": (-2.0, 3.0, 0.0),
+        "color": color,
+        "bg_color": bg_color,
+        "ao_power": 2,
+    }
+
+
+def render(
+    fractal: str,
+    res: tuple[int, int],
+    *,
+    aa: int = 1,
+    window: tuple[int, int, int, int] | None = None,
+    **params: Any,
+) -> np.ndarray:
+    """Renders `window` of a `res` sized image of a 3D fractal into an RGB uint8 array.
+
+    `params` are the properties of the widget: `h_angle` and `v_angle` for the camera,
+    `depth`, `ao`, `shadows`, `max_iter`, `color` and `bg_color` for all of them, then
+    `offset`, `folding`, `scale`, `out_rad` and `in_rad` for the Mandelbox, `zoom`,
+    `power` and `cut` for the bulbs, `z_angle` for Mandelbrot 3D and `abs_c`, `argx_c`,
+    `argy_c` and `rotate_y` for Julia 3D."""
+
+    match fractal:
+        case "mandelbox":
+            scene = _mandelbox_scene(**params)
+        case "mandelbrot3d" | "mandelbrot4d":
+            scene = _bulb_scene(fractal, **params)
+        case "julia3d" | "julia4d":
+            scene = _julia_scene(fractal, **params)
+        case _:
+            raise ValueError(f"Unknown fractal: {fractal}")
+
+    return _render(res, window, aa, **scene)
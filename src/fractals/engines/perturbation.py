@@ -0,0 +1,169 @@
+from decimal import Decimal
+from math import log
+
+import numpy as np
+
+from .numpy_2d import colorize, pixel_deltas
+from .reference_orbit import ReferenceOrbit, ReferenceOrbitCache, precision_for_zoom
+
+__all__ = ["GLITCH_TOLERANCE", "MAX_REFERENCES", "perturbed_escape_time", "render", "sample_iterations"]
+
+ESCAPE_RADIUS_SQR = 512.0
+
+# Pauldelbrot's criterion on squared values: |Z_n + dz_n|^2 < GLITCH_TOLERANCE * |Z_n|^2
+GLITCH_TOLERANCE = 1e-3
+
+# Extra references tried for the pixels that glitched against the view center
+MAX_REFERENCES = 8
+
+# References chosen for glitched pixels are shared by every frame and tile of a render
+_orbits = ReferenceOrbitCache(maxsize=32)
+
+
+def _iterate(dc: np.ndarray, orbit: ReferenceOrbit, reference: complex, max_iter: int) -> tuple[np.ndarray, np.ndarray]:
+    """Smooth iteration counts of pixels `dc` away from the orbit's center and their glitch
+    ratios |Z + dz|^2 / |Z|^2, infinite for pixels that did not glitch."""
+
+    iterations = np.zeros(dc.size, dtype=np.float64)
+    ratios = np.full(dc.size, np.inf)
+    if not dc.size:
+        return iterations, ratios
+
+    skip, (a, b, c) = orbit.series_skip(float(np.abs(dc).max()))
+    points = orbit.points[:, 0] + 1j * orbit.points[:, 1]
+    length = len(points)
+    log_lim = log(ESCAPE_RADIUS_SQR)
+
+    dc2 = dc * dc
+    dz = a * dc + b * dc2 + c * dc2 * dc
+    dc = dc.copy()
+    idx = np.arange(dc.size)
+    z = points[skip - 1]
+    n = skip
+    i = skip - 1
+
+    # Same loop as perturbation() in mandelbrot2d.frag
+    while idx.size:
+        w = z + dz
+        abs_sqr = w.real * w.real + w.imag * w.imag
+
+        escaped = abs_sqr >= ESCAPE_RADIUS_SQR
+        if escaped.any():
+            iterations[idx[escaped]] = i - np.log(np.log(abs_sqr[escaped]) / log_lim) / log(2.0)
+            keep = ~escaped
+            dz, dc, idx, abs_sqr = dz[keep], dc[keep], idx[keep], abs_sqr[keep]
+
+        z_sqr = z.real * z.real + z.imag * z.imag
+        glitched = abs_sqr < GLITCH_TOLERANCE * z_sqr
+        if glitched.any():
+            ratios[idx[glitched]] = np.minimum(ratios[idx[glitched]], abs_sqr[glitched] / z_sqr)
+
+        i += 1
+        if i >= max_iter:
+            break
+
+        if n == length:
+            # The reference escaped, continue with the full value
+            dz = dz + z
+            dc = dc + reference
+            z = 0j
+            n += 1
+
+        dz = (2.0 * z + dz) * dz + dc
+        if n < length:
+            z = points[n]
+            n += 1
+
+    return iterations, ratios
+
+
+def perturbed_escape_time(
+    deltas: np.ndarray,
+    center: tuple[Decimal, Decimal],
+    max_iter: int,
+    precision: int,
+    max_references: int = MAX_REFERENCES,
+    orbits: ReferenceOrbitCache | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Smooth iteration counts of the points `deltas` away from `center` for z^2 + c.
+
+    Pixels that glitch against a reference are iterated again against a new reference
+    placed on the most glitched of them, up to `max_references` times. Returns the
+    counts and the mask of pixels that were still glitched after that."""
+
+    orbits = orbits or _orbits
+    flat = np.ascontiguousarray(deltas, dtype=np.complex128).ravel()
+    iterations = np.empty(flat.size, dtype=np.float64)
+
+    pending = np.arange(flat.size)
+    reference_delta = 0j
+    reference_center = center
+
+    for attempt in range(max_references + 1):
+        orbit = orbits.get(reference_center, max_iter, 2, precision)
+        reference = complex(float(reference_center[0]), float(reference_center[1]))
+
+        result, ratios = _iterate(flat[pending] - reference_delta, orbit, reference, max_iter)
+        iterations[pending] = result
+
+        glitched = np.isfinite(ratios)
+        pending = pending[glitched]
+        if not pending.size or attempt == max_references:
+            break
+
+        reference_delta = complex(flat[pending[np.argmin(ratios[glitched])]])
+        reference_center = (
+            center[0] + Decimal(reference_delta.real),
+            center[1] + Decimal(reference_delta.imag),
+        )
+
+    unresolved = np.zeros(flat.size, dtype=bool)
+    unresolved[pending] = True
+    return iterations.reshape(np.shape(deltas)), unresolved.reshape(np.shape(deltas))
+
+
+def sample_iterations(
+    res: tuple[int, int],
+    *,
+    center: tuple[Decimal, Decimal],
+    zoom: float = 1.0,
+    phi: float = 0.0,
+    max_iter: int = 100,
+    aa: int = 1,
+    window: tuple[int, int, int, int] | None = None,
+    max_references: int = MAX_REFERENCES,
+) -> np.ndarray:
+    """Deep zoom counterpart of `numpy_2d.sample_iterations` for Mandelbrot 2D (power 2)"""
+
+    width, height = res
+    _, _, w, h = window or (0, 0, width, height)
+    precision = precision_for_zoom(zoom)
+
+    samples = np.empty((aa * aa, h, w), dtype=np.float64)
+    for i in range(aa):
+        for j in range(aa):
+            deltas = pixel_deltas(res, zoom, phi, window, sample=(i / aa, j / aa))
+            samples[i * aa + j], _ = perturbed_escape_time(deltas, center, max_iter, precision, max_references)
+
+    return samples
+
+
+def render(
+    res: tuple[int, int],
+    *,
+    center: tuple[Decimal, Decimal],
+    zoom: float = 1.0,
+    phi: float = 0.0,
+    max_iter: int = 100,
+    aa: int = 1,
+    color: tuple[float, ...] = (1.0, 1.0, 1.0, 1.0),
+    window: tuple[int, int, int, int] | None = None,
+    max_references: int = MAX_REFERENCES,
+) -> np.ndarray:
+    """Deep zoom Mandelbrot 2D (power 2) rendered by perturbation against `center`,
+    same output as `numpy_2d.render`."""
+
+    samples = sample_iterations(
+        res, center=center, zoom=zoom, phi=phi, max_iter=max_iter, aa=aa, window=window, max_references=max_references
+    )
+    return colorize(samples, 2.0, color)
@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from decimal import Decimal, localcontext
+from math import ceil, log10
+
+import numpy as np
+
+__all__ = ["ReferenceOrbit", "ReferenceOrbitCache", "precision_for_zoom"]
+
+# Same bailout as `lim` in the shaders
+ESCAPE_RADIUS_SQR = 512
+
+
+def precision_for_zoom(zoom: float) -> int:
+    """Decimal digits that resolve the pixels of a view at `zoom` with a safe margin."""
+
+    return max(20, ceil(log10(max(zoom, 1.0))) + 20)
+
+
+class ReferenceOrbit:
+    """Orbit Z_1, Z_2, ... of the view center, iterated at `precision` decimal digits.
+
+    `points` holds the orbit rounded to float64 as an (n, 2) array, it stops after the
+    first point that escapes or after `max_iter` points. `coefficients` holds the series
+    approximation delta_n = A_n dc + B_n dc^2 + C_n dc^3 of a pixel's offset from Z_n
+    as an (n, 3) complex array, valid for power 2."""
+
+    def __init__(self, center: tuple[Decimal, Decimal], max_iter: int, power: int, precision: int):
+        self.center = center
+        self.max_iter = max_iter
+        self.power = power
+        self.precision = precision
+        self.points = self._iterate()
+        self.coefficients = self._series_coefficients()
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _iterate(self) -> np.ndarray:
+        points = []
+        with localcontext() as context:
+            context.prec = self.precision
+
+            cx, cy = +self.center[0], +self.center[1]
+            x, y = Decimal(0), Decimal(0)
+
+            for _ in range(self.max_iter):
+                zx, zy = x, y
+                for _ in range(self.power - 1):
+                    x, y = x * zx - y * zy, x * zy + y * zx
+                x, y = x + cx, y + cy
+
+                points.append((float(x), float(y)))
+                if x * x + y * y >= ESCAPE_RADIUS_SQR:
+                    break
+
+        return np.array(points, dtype=np.float64).reshape(-1, 2)
+
+    def _series_coefficients(self) -> np.ndarray:
+        # delta_{n+1} = 2 Z_n delta_n + delta_n^2 + dc with delta_1 = dc
+        coefficients = np.zeros((len(self.points), 3), dtype=np.complex128)
+        a, b, c = 1 + 0j, 0j, 0j
+
+        with np.errstate(over="ignore", invalid="ignore"):
+            for n, (x, y) in enumerate(self.points):
+                coefficients[n] = (a, b, c)
+                z2 = 2 * complex(x, y)
+                a, b, c = z2 * a + 1, z2 * b + a * a, z2 * c + 2 * a * b
+
+        return coefficients
+
+    def series_skip(self, delta_max: float, tolerance: float = 1e-6) -> tuple[int, np.ndarray]:
+        """Number of the first orbit point a frame can start from and (A, B, C) at it.
+
+        `delta_max` is the largest |dc| in the frame. The series is trusted while the
+        cubic term stays below `tolerance` of the quadratic one for every pixel."""
+
+        a, b, c = np.abs(self.coefficients).T
+        with np.errstate(over="ignore", invalid="ignore"):
+            valid = np.isfinite(a * b * c) & (c * delta_max <= tolerance * b)
+
+        # The reference must not escape at the start point and at least one
+        # iteration has to remain, n = 1 is always exact: delta_1 = dc
+        valid[len(valid) - 1 :] = False
+        valid[max(self.max_iter - 1, 0) :] = False
+        valid[0] = True
+
+        invalid = np.flatnonzero(~valid)
+        n = int(invalid[0]) if invalid.size else len(valid)
+        return n, self.coefficients[n - 1]
+
+
+class ReferenceOrbitCache:
+    """Keeps the last few reference orbits by (center, max_iter, power).
+
+    An orbit computed at a higher precision is reused for shallower zooms."""
+
+    def __init__(self, maxsize: int = 8):
+        self._maxsize = maxsize
+        self._orbits: OrderedDict[tuple, ReferenceOrbit] = OrderedDict()
+
+    def get(self, center: tuple[Decimal, Decimal], max_iter: int, power: int, precision: int) -> ReferenceOrbit:
+        key = (center, max_iter, power)
+
+        orbit = self._orbits.get(key)
+        if orbit is None or orbit.precision < precision:
+            orbit = ReferenceOrbit(center, max_iter, power, precision)
+            self._orbits[key] = orbit
+
+        self._orbits.move_to_end(key)
+        while len(self._orbits) > self._maxsize:
+            self._orbits.popitem(last=False)
+
+        return orbit
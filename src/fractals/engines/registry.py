@@ -0,0 +1,135 @@
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Callable
+
+import numpy as np
+
+from . import numpy_2d, numpy_3d, perturbation, subdivision
+from .states import center_2d, params_2d, params_3d, params_mandelbox
+
+__all__ = ["ENGINES", "clear_cache", "render_state"]
+
+PERTURBATION_ZOOM = 1e12
+
+
+# Iteration counts of the last renders by (kind, res, window, center, subdivide, geometry). A view
+# with other colors reuses them, a pan of an unrotated view computes only the exposed strips.
+# Bounded by count and by bytes, so batch workers rendering large frames don't keep them alive.
+_recent_samples: OrderedDict[tuple, np.ndarray] = OrderedDict()
+RECENT_SAMPLES = 2
+RECENT_SAMPLES_BYTES = 64 * 2**20
+
+
+def clear_cache() -> None:
+    """Forgets the recent samples, the next render of any view starts from scratch"""
+
+    _recent_samples.clear()
+
+
+def _pan_source(key: tuple, geometry: dict[str, Any]) -> tuple[np.ndarray, tuple[int, int]] | None:
+    """Recent samples the view `key` is a whole pixel pan of, and the shift"""
+
+    kind, res, window, center, subdivide, _ = key
+    if window is not None or center is not None or geometry["phi"]:
+        return None
+
+    moved = {name: value for name, value in geometry.items() if name != "offset"}
+    for (*old_view, old_geometry), samples in reversed(_recent_samples.items()):
+        old_geometry = dict(old_geometry)
+        old_offset = old_geometry.pop("offset")
+        if (old_view, old_geometry) != ([kind, res, None, None, subdivide], moved):
+            continue
+
+        shift = numpy_2d.pixel_shift(res, geometry["zoom"], old_offset, geometry["offset"])
+        if shift is not None:
+            return samples, shift
+
+    return None
+
+
+def _samples_2d(
+    kind: str,
+    res: tuple[int, int],
+    window: tuple[int, int, int, int] | None,
+    center: tuple[Decimal, Decimal] | None,
+    subdivide: bool,
+    geometry: dict[str, Any],
+) -> np.ndarray:
+    key = (kind, res, window, center, subdivide, tuple(sorted(geometry.items())))
+    if key in _recent_samples:
+        _recent_samples.move_to_end(key)
+        return _recent_samples[key]
+
+    pan = _pan_source(key, geometry)
+    if pan is not None:
+        samples = numpy_2d.pan_samples(*pan, kind, res, **geometry)
+    elif center is None and subdivide and subdivision.pays_off(kind, res, window=window, **geometry):
+        samples = subdivision.sample_iterations(kind, res, window=window, **geometry)
+    elif center is None:
+        samples = numpy_2d.sample_iterations(kind, res, window=window, **geometry)
+    else:
+        deep = {name: value for name, value in geometry.items() if name not in ("offset", "power", "c", "periodicity")}
+        samples = perturbation.sample_iterations(res, center=center, window=window, **deep)
+
+    samples.flags.writeable = False
+    if samples.nbytes > RECENT_SAMPLES_BYTES:
+        return samples
+
+    _recent_samples[key] = samples
+    while (
+        len(_recent_samples) > RECENT_SAMPLES
+        or sum(cached.nbytes for cached in _recent_samples.values()) > RECENT_SAMPLES_BYTES
+    ):
+        _recent_samples.popitem(last=False)
+    return samples
+
+
+def _numpy_2d(kind: str) -> Callable[..., np.ndarray]:
+    def render(state: dict[str, Any], res: tuple[int, int], window: tuple[int, int, int, int] | None = None):
+        params = params_2d(kind, state)
+        color = params.pop("color")
+        params.setdefault("c", 0j)
+
+        # float64 pixel coordinates run out of digits past PERTURBATION_ZOOM
+        deep = state.get("perturbation") or params["zoom"] > PERTURBATION_ZOOM
+        center = center_2d(state) if kind == "mandelbrot2d" and params["power"] == 2 and deep else None
+
+        # Subdivision may fill sub-pixel filaments that brute force resolves, states opt in
+        subdivide = bool(state.get("subdivision", False))
+
+        samples = _samples_2d(kind, tuple(res), window and tuple(window), center, subdivide, params)
+        return numpy_2d.colorize(samples, params["power"], color)
+
+    return render
+
+
+def _numpy_mandelbox(
+    state: dict[str, Any], res: tuple[int, int], window: tuple[int, int, int, int] | None = None
+) -> np.ndarray:
+    return numpy_3d.render("mandelbox", tuple(res), window=window and tuple(window), **params_mandelbox(state))
+
+
+def _numpy_3d(kind: str) -> Callable[..., np.ndarray]:
+    def render(state: dict[str, Any], res: tuple[int, int], window: tuple[int, int, int, int] | None = None):
+        return numpy_3d.render(kind, tuple(res), window=window and tuple(window), **params_3d(kind, state))
+
+    return render
+
+
+# Headless engines by fractal kind, every engine returns an RGB uint8 array
+ENGINES: dict[str, Callable[..., np.ndarray]] = {
+    **{kind: _numpy_2d(kind) for kind in numpy_2d.FRACTALS},
+    "mandelbox": _numpy_mandelbox,
+    **{kind: _numpy_3d(kind) for kind in numpy_3d.FRACTALS if kind != "mandelbox"},
+}
+
+
+def render_state(
+    kind: str,
+    state: dict[str, Any],
+    res: tuple[int, int],
+    window: tuple[int, int, int, int] | None = None,
+) -> np.ndarray:
+    if kind not in ENGINES:
+        raise ValueError(f"No headless engine for {kind}")
+    return ENGINES[kind](state, res, window)
@@ -0,0 +1,128 @@
+import json
+from decimal import Decimal
+from math import cos, sin
+from typing import Any
+
+__all__ = ["KINDS", "center_2d", "infer_kind", "load_state", "params_2d", "params_3d", "params_mandelbox"]
+
+# Named after the fragment shaders in res/shaders
+KINDS = (
+    "mandelbrot2d",
+    "julia2d",
+    "burningship2d",
+    "mandelbrot3d",
+    "julia3d",
+    "mandelbrot4d",
+    "julia4d",
+    "mandelbox",
+)
+
+
+def infer_kind(state: dict[str, Any]) -> str:
+    """Guesses the fractal from the keys `_save_state` writes.
+
+    Mandelbrot 2D and Burning Ship save identical keys and the quaternion variants
+    save the same keys as the polar ones, so those default to Mandelbrot 2D and polar."""
+
+    if "kind" in state:
+        return state["kind"]
+    if "folding" in state:
+        return "mandelbox"
+    if "argx_c" in state:
+        return "julia3d"
+    if "z_angle" in state:
+        return "mandelbrot3d"
+    if "c_polar" in state:
+        return "julia2d"
+    return "mandelbrot2d"
+
+
+def load_state(filename: str, kind: str | None = None) -> tuple[str, dict[str, Any]]:
+    with open(filename, "r") as f:
+        state = json.load(f)
+
+    kind = kind or infer_kind(state)
+    if kind not in KINDS:
+        raise ValueError(f"Unknown fractal: {kind}")
+
+    return kind, state
+
+
+def _color(state: dict[str, Any], key: str = "color") -> tuple[float, float, float, float]:
+    color = state[key]
+    return (color["red"], color["green"], color["blue"], color["alpha"])
+
+
+def params_2d(kind: str, state: dict[str, Any]) -> dict[str, Any]:
+    """Maps a saved 2D state to the uniforms of `numpy_2d.render`"""
+
+    params = {
+        "offset": (state["offset"]["x"], state["offset"]["y"]),
+        "zoom": state["zoom_factor"],
+        "phi": state["rotation_angle"],
+        "power": float(state["power"]),
+        "max_iter": state["max_iter"],
+        "aa": 2 if state["antialiasing"] else 1,
+        "color": _color(state),
+        "periodicity": state.get("periodicity", False),
+    }
+    if kind == "julia2d":
+        r, a = state["c_polar"]["abs"], state["c_polar"]["arg"]
+        params["c"] = complex(r * cos(a), r * sin(a))
+    return params
+
+
+def params_mandelbox(state: dict[str, Any]) -> dict[str, Any]:
+    """Maps a saved Mandelbox state to the arguments of `numpy_3d.render`"""
+
+    return {
+        "offset": tuple(state["offset"]),
+        "h_angle": state["h_angle"],
+        "v_angle": state["v_angle"],
+        "max_iter": state["max_iter"],
+        "depth": state["depth"],
+        "ao": state["ao"],
+        "shadows": state["shadows"],
+        "folding": state["folding"],
+        "scale": state["scale"],
+        "out_rad": state["out_rad"],
+        "in_rad": state["in_rad"],
+        "aa": 2 if state["antialiasing"] else 1,
+        "color": _color(state),
+        "bg_color": _color(state, "bg_color"),
+    }
+
+
+def params_3d(kind: str, state: dict[str, Any]) -> dict[str, Any]:
+    """Maps a saved Mandelbrot 3D or Julia 3D state to the arguments of `numpy_3d.render`,
+    the quaternion variants save the same keys as the polar ones"""
+
+    params = {
+        "zoom": state["zoom_factor"],
+        "h_angle": state["h_angle"],
+        "v_angle": state["v_angle"],
+        "max_iter": state["max_iter"],
+        "power": float(state["power"]),
+        "cut": state["cut"],
+        "depth": state["depth"],
+        "ao": state["ao"],
+        "shadows": state["shadows"],
+        "aa": 2 if state["antialiasing"] else 1,
+        "color": _color(state),
+        "bg_color": _color(state, "bg_color"),
+    }
+    if kind in ("julia3d", "julia4d"):
+        params.update(
+            abs_c=state["abs_c"], argx_c=state["argx_c"], argy_c=state["argy_c"], rotate_y=state["rotate_y"]
+        )
+    else:
+        params["z_angle"] = state["z_angle"]
+    return params
+
+
+def center_2d(state: dict[str, Any]) -> tuple[Decimal, Decimal]:
+    """View center of a saved 2D state, with all the digits Mandelbrot 2D saves for deep zooms"""
+
+    if "center" in state:
+        return (Decimal(state["center"]["x"]), Decimal(state["center"]["y"]))
+    return (Decimal(state["offset"]["x"]), Decimal(state["offset"]["y"]))
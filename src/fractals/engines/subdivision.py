@@ -0,0 +1,234 @@
+import numpy as np
+
+from .numpy_2d import _in_cardioid_or_bulb, complex_grid, escape_time, period_eps
+
+__all__ = ["FRACTALS", "interior_coverage", "is_connected", "pays_off", "sample_iterations", "subdivided_escape_time"]
+
+# The escape-time level sets of these are connected and simply connected, a rectangle
+# whose border lies inside the set lies inside as a whole. Julia only for c in the set.
+FRACTALS = ("mandelbrot2d", "julia2d")
+
+# Rectangles this small are iterated pixel by pixel
+MIN_SIZE = 8
+
+# Spacing of the guard samples iterated inside a rectangle before it is filled, they catch
+# filaments of escaping points thinner than a pixel that slip between border samples
+GUARD_STRIDE = 2
+
+# Spacing of the samples of every filled rectangle iterated after the subdivision, off
+# the guard grid. One that escapes sends its whole rectangle to brute force.
+CHECK_STRIDE = 4
+
+# Subdivision only beats brute force on large frames with large interiors that brute force
+# iterates to `max_iter`, e.g. minibrots and Julia sets. Below this many pixels per sample
+# grid, or this much of such interior, its border and guard samples cost more than they save.
+MIN_PIXELS = 512 * 512
+MIN_COVERAGE = 0.3
+
+# Side of the coarse grid that measures the interior coverage
+COVERAGE_SAMPLES = 32
+
+
+def is_connected(fractal: str, power: float, max_iter: int, c: complex) -> bool:
+    """Whether `fractal` is connected at the escape-time resolution `max_iter`"""
+
+    if fractal == "mandelbrot2d":
+        return True
+    if fractal == "julia2d":
+        # The Julia set of c is connected iff c belongs to the Mandelbrot set of the same power
+        return escape_time("mandelbrot2d", np.array([c]), power, max_iter)[0] == 0.0
+    return False
+
+
+def interior_coverage(
+    fractal: str,
+    res: tuple[int, int],
+    *,
+    offset: tuple[float, float] = (0.0, 0.0),
+    zoom: float = 1.0,
+    phi: float = 0.0,
+    power: float = 2.0,
+    max_iter: int = 100,
+    c: complex = 0j,
+    window: tuple[int, int, int, int] | None = None,
+    periodicity: bool = False,
+) -> float:
+    """Fraction of a coarse grid over `window` that brute force iterates `max_iter` times.
+
+    Points of the main cardioid and period 2 bulb, and with `periodicity` orbits that
+    cycle, are cheap for brute force as well and do not count."""
+
+    points = complex_grid(res, offset, zoom, phi, window)
+    h, w = points.shape
+    points = points[:: max(1, h // COVERAGE_SAMPLES), :: max(1, w // COVERAGE_SAMPLES)]
+
+    periodic = np.zeros(points.shape, dtype=bool)
+    eps = period_eps(res, zoom) if periodicity else 0.0
+    interior = (escape_time(fractal, points, power, max_iter, c, eps, periodic) == 0.0) & ~periodic
+    if fractal == "mandelbrot2d" and power == 2:
+        interior &= ~_in_cardioid_or_bulb(points)
+    return float(interior.mean())
+
+
+def pays_off(
+    fractal: str,
+    res: tuple[int, int],
+    *,
+    offset: tuple[float, float] = (0.0, 0.0),
+    zoom: float = 1.0,
+    phi: float = 0.0,
+    power: float = 2.0,
+    max_iter: int = 100,
+    aa: int = 1,
+    c: complex = 0j,
+    window: tuple[int, int, int, int] | None = None,
+    periodicity: bool = False,
+) -> bool:
+    """Whether `sample_iterations` of the view is expected to be faster than brute force"""
+
+    width, height = res
+    _, _, w, h = window or (0, 0, width, height)
+    if fractal not in FRACTALS or w * h < MIN_PIXELS:
+        return False
+
+    geometry = dict(offset=offset, zoom=zoom, phi=phi, power=power, max_iter=max_iter, c=c, periodicity=periodicity)
+    return interior_coverage(fractal, res, window=window, **geometry) >= MIN_COVERAGE
+
+
+def _split(rect: tuple[int, int, int, int]) -> list[tuple[int, int, int, int]]:
+    """Halves of `rect` along its longer side, sharing the middle line"""
+
+    y0, x0, y1, x1 = rect
+    if y1 - y0 > x1 - x0:
+        ym = (y0 + y1) // 2
+        return [(y0, x0, ym + 1, x1), (ym, x0, y1, x1)]
+    xm = (x0 + x1) // 2
+    return [(y0, x0, y1, xm + 1), (y0, xm, y1, x1)]
+
+
+def subdivided_escape_time(
+    fractal: str,
+    points: np.ndarray,
+    power: float = 2.0,
+    max_iter: int = 100,
+    c: complex = 0j,
+    min_size: int = MIN_SIZE,
+    verify: bool = False,
+    period_eps: float = 0.0,
+) -> tuple[np.ndarray, np.ndarray]:
+    """`escape_time` of a 2D grid of `points` by Mariani–Silver subdivision, approximate.
+
+    Rectangles whose border and guard samples do not escape are filled with zeros
+    without iterating their interior, the rest is split until `min_size`. Returns the
+    smooth counts and the mask of filled pixels.
+
+    Filled rectangles are then checked on a sparse grid of CHECK_STRIDE, those with an
+    escaping sample are iterated pixel by pixel. A filament that slips between both the
+    guard and the check samples is still filled, so the result can differ from brute
+    force in a few pixels. With `verify` every filled pixel is iterated as well and any
+    that escape get their brute force values. `period_eps` is
+    passed on to `escape_time`."""
+
+    if fractal not in FRACTALS:
+        raise ValueError(f"Subdivision is not exact for {fractal}")
+
+    height, width = points.shape
+    out = np.zeros((height, width), dtype=np.float64)
+    known = np.zeros((height, width), dtype=bool)
+    filled = np.zeros((height, width), dtype=bool)
+
+    def iterate(mask: np.ndarray) -> None:
+        mask &= ~known
+        if mask.any():
+            out[mask] = escape_time(fractal, points[mask], power, max_iter, c, period_eps)
+            known[mask] = True
+
+    if not is_connected(fractal, power, max_iter, c):
+        iterate(np.ones((height, width), dtype=bool))
+        return out, filled
+
+    rects = [(0, 0, height, width)]
+    fills = []
+    brute = np.zeros((height, width), dtype=bool)
+    while rects or brute.any():
+        # One batch per level: the interiors of the small rectangles of the previous
+        # level, the borders of the rectangles of this one and their guard samples
+        batch = brute
+        for y0, x0, y1, x1 in rects:
+            batch[[y0, y1 - 1], x0:x1] = True
+            batch[y0:y1, [x0, x1 - 1]] = True
+            batch[y0 + 1 : y1 - 1 : GUARD_STRIDE, x0 + 1 : x1 - 1 : GUARD_STRIDE] = True
+        iterate(batch)
+
+        brute = np.zeros((height, width), dtype=bool)
+        next_rects = []
+        for rect in rects:
+            y0, x0, y1, x1 = rect
+            if y1 - y0 <= 2 or x1 - x0 <= 2:
+                continue
+
+            # Pixels not iterated yet are zero as well
+            if not out[y0:y1, x0:x1].any():
+                filled[y0:y1, x0:x1] |= ~known[y0:y1, x0:x1]
+                known[y0:y1, x0:x1] = True
+                fills.append(rect)
+            elif max(y1 - y0, x1 - x0) <= min_size:
+                brute[y0 + 1 : y1 - 1, x0 + 1 : x1 - 1] = True
+            else:
+                next_rects += _split(rect)
+
+        rects = next_rects
+
+    check = np.zeros((height, width), dtype=bool)
+    for y0, x0, y1, x1 in fills:
+        check[y0 + 2 : y1 - 1 : CHECK_STRIDE, x0 + 2 : x1 - 1 : CHECK_STRIDE] = True
+    check &= filled
+    if check.any():
+        escaped = np.zeros((height, width), dtype=bool)
+        escaped[check] = escape_time(fractal, points[check], power, max_iter, c, period_eps) != 0.0
+
+        redo = np.zeros((height, width), dtype=bool)
+        for y0, x0, y1, x1 in fills:
+            if escaped[y0:y1, x0:x1].any():
+                redo[y0:y1, x0:x1] |= filled[y0:y1, x0:x1]
+        if redo.any():
+            out[redo] = escape_time(fractal, points[redo], power, max_iter, c, period_eps)
+            filled &= ~redo
+
+    if verify and filled.any():
+        out[filled] = escape_time(fractal, points[filled], power, max_iter, c)
+
+    return out, filled
+
+
+def sample_iterations(
+    fractal: str,
+    res: tuple[int, int],
+    *,
+    offset: tuple[float, float] = (0.0, 0.0),
+    zoom: float = 1.0,
+    phi: float = 0.0,
+    power: float = 2.0,
+    max_iter: int = 100,
+    aa: int = 1,
+    c: complex = 0j,
+    window: tuple[int, int, int, int] | None = None,
+    verify: bool = False,
+    periodicity: bool = False,
+) -> np.ndarray:
+    """Same as `numpy_2d.sample_iterations` for Mandelbrot and Julia 2D, with every AA
+    sample grid computed by `subdivided_escape_time`. Approximate unless `verify`."""
+
+    width, height = res
+    _, _, w, h = window or (0, 0, width, height)
+    eps = period_eps(res, zoom) if periodicity else 0.0
+
+    samples = np.empty((aa * aa, h, w), dtype=np.float64)
+    for i in range(aa):
+        for j in range(aa):
+            points = complex_grid(res, offset, zoom, phi, window, sample=(i / aa, j / aa))
+            samples[i * aa + j], _ = subdivided_escape_time(
+                fractal, points, power, max_iter, c, verify=verify, period_eps=eps
+            )
+
+    return samples
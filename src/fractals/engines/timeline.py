@@ -0,0 +1,101 @@
+import copy
+from math import ceil
+from typing import Any
+
+import numpy as np
+
+__all__ = ["EASINGS", "FPS", "Timeline", "frame_name"]
+
+# Interpolations between the start and end of a parameter. Exponential keeps the ratio of
+# consecutive frames constant, which zooms need to look steady.
+EASINGS = ("linear", "exponential")
+LINEAR, EXPONENTIAL = range(len(EASINGS))
+
+FPS = 60
+
+
+def frame_name(frame: int, num_frames: int, image_format: str) -> str:
+    """File name of a frame, zero padded so that names sort in frame order"""
+
+    return f"frame_{frame:0{len(str(num_frames - 1))}d}.{image_format}"
+
+
+class Timeline:
+    """Parameters of a saved state going from a start to an end value over `duration` seconds.
+
+    Parameters are dotted paths into the state, e.g. "c_polar.arg". Their (start, end, easing)
+    rows are kept in one array and every frame is evaluated directly from it, so frames do
+    not depend on each other and can be rendered in any order, in any process."""
+
+    def __init__(
+        self,
+        state: dict[str, Any],
+        params: dict[str, tuple[float, float, str]],
+        duration: float,
+        fps: int = FPS,
+    ):
+        for path, (start, end, easing) in params.items():
+            if easing not in EASINGS:
+                raise ValueError(f"Unknown easing of {path}: {easing}")
+            # The ratio end / start is raised to fractional powers, it must be positive
+            if easing == "exponential" and not start * end > 0:
+                raise ValueError(f"Exponential easing of {path} needs nonzero start and end of one sign")
+
+        self._state = copy.deepcopy(state)
+        self._paths = [path.split(".") for path in params]
+        self._keys = np.array(
+            [(start, end, EASINGS.index(easing)) for start, end, easing in params.values()], dtype=np.float64
+        ).reshape(-1, 3)
+        self.duration = duration
+        self.fps = fps
+
+    @property
+    def num_frames(self) -> int:
+        """Frames of the video: the start state and one per 1 / fps seconds after it"""
+
+        return ceil(self.duration * self.fps) + 1
+
+    def values_at(self, t: float) -> np.ndarray:
+        """Values of all parameters at the fraction `t` of the animation, in the order given"""
+
+        start, end, easing = self._keys.T
+        t = min(max(t, 0.0), 1.0)
+
+        values = start + (end - start) * t
+        exponential = easing == EXPONENTIAL
+        values[exponential] = start[exponential] * (end[exponential] / start[exponential]) ** t
+        return values
+
+    def state_at(self, t: float) -> dict[str, Any]:
+        """Copy of the state with the parameters at the fraction `t` of the animation"""
+
+        state = copy.deepcopy(self._state)
+        for path, value in zip(self._paths, self.values_at(t)):
+            target = state
+            for key in path[:-1]:
+                target = target[key]
+            target[path[-1]] = float(value)
+        return state
+
+    def frame_state(self, frame: int) -> dict[str, Any]:
+        # The last frame may be shorter than 1 / fps, it ends exactly at `duration`
+        return self.state_at(frame / (self.duration * self.fps) if self.duration else 1.0)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "duration": self.duration,
+            "fps": self.fps,
+            "params": {
+                ".".join(path): {"start": start, "end": end, "easing": EASINGS[int(easing)]}
+                for path, (start, end, easing) in zip(self._paths, self._keys.tolist())
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict[str, Any], timeline: dict[str, Any]) -> "Timeline":
+        """Timeline of `to_dict` applied to a saved state"""
+
+        params = {
+            path: (key["start"], key["end"], key.get("easing", "linear")) for path, key in timeline["params"].items()
+        }
+        return cls(state, params, timeline["duration"], timeline.get("fps", FPS))
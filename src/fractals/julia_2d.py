@@ -1,8 +1,6 @@
-import json
-from math import cos, exp, pi, pow, sin
+from math import cos, exp, pi, sin
 from typing import Any
 
-import OpenGL.GL as gl
 from PySide6.QtCore import QPointF
 
 from frontend.components import AnimationParameterWidget, NamedSlider
@@ -26,18 +24,9 @@ class Julia2D(AnimatedFractal, StatefulFractal, AAFractal, IterableFractal, Colo
         self._power = 2.0
 
         self._anim_params = {
-            "arg_c": {
-                "fstep": lambda value, speed: value + speed,
-                "fspeed": lambda start, end, steps: (end - start) / steps,
-            },
-            "abs_c": {
-                "fstep": lambda value, speed: value + speed,
-                "fspeed": lambda start, end, steps: (end - start) / steps,
-            },
-            "zoom_factor": {
-                "fstep": lambda value, speed: value * speed,
-                "fspeed": lambda start, end, steps: pow(end / start, 1 / steps),
-            },
+            "c_polar.arg": {"easing": "linear"},
+            "c_polar.abs": {"easing": "linear"},
+            "zoom_factor": {"easing": "exponential"},
         }
 
     @property
@@ -72,8 +61,8 @@ class Julia2D(AnimatedFractal, StatefulFractal, AAFractal, IterableFractal, Colo
         self._power = new_value
         self.update()
 
-    def _save_state(self, filename: str) -> None:
-        state = {
+    def _state(self) -> dict[str, Any]:
+        return {
             "max_iter": self.max_iter,
             "zoom_factor": self.zoom_factor,
             "central_lines": self.central_lines,
@@ -87,15 +76,11 @@ class Julia2D(AnimatedFractal, StatefulFractal, AAFractal, IterableFractal, Colo
             "power": self.power,
             "offset": {"x": self.offset.x(), "y": self.offset.y()},
             "antialiasing": self.antialiasing,
+            "periodicity": self.periodicity,
             "c_polar": {"arg": self.arg_c, "abs": self.abs_c},
         }
-        with open(filename, "w") as f:
-            json.dump(state, f)
-
-    def _load_state(self, filename: str) -> None:
-        with open(filename, "r") as f:
-            state = json.load(f)
 
+    def _apply_state(self, state: dict[str, Any]) -> None:
         self.max_iter = state["max_iter"]
         self.zoom_factor = state["zoom_factor"]
         self.central_lines = state["central_lines"]
@@ -109,6 +94,7 @@ class Julia2D(AnimatedFractal, StatefulFractal, AAFractal, IterableFractal, Colo
         self.power = state["power"]
         self.offset = QPointF(state["offset"]["x"], state["offset"]["y"])
         self.antialiasing = state["antialiasing"]
+        self.periodicity = state.get("periodicity", False)
 
         self.arg_c = state["c_polar"]["arg"]
         self.abs_c = state["c_polar"]["abs"]
@@ -149,17 +135,17 @@ class Julia2D(AnimatedFractal, StatefulFractal, AAFractal, IterableFractal, Colo
             AnimationParameterWidget(
                 name="Arg(C)",
                 initial=0.1,
-                check_handlers=[lambda value: self._anim_params["arg_c"].__setitem__("use", value)],
-                start_handlers=[lambda value: self._anim_params["arg_c"].__setitem__("start", value)],
-                end_handlers=[lambda value: self._anim_params["arg_c"].__setitem__("end", value)],
+                check_handlers=[lambda value: self._anim_params["c_polar.arg"].__setitem__("use", value)],
+                start_handlers=[lambda value: self._anim_params["c_polar.arg"].__setitem__("start", value)],
+                end_handlers=[lambda value: self._anim_params["c_polar.arg"].__setitem__("end", value)],
                 step=0.1,
             ),
             AnimationParameterWidget(
                 name="Abs(C)",
                 initial=0.1,
-                check_handlers=[lambda value: self._anim_params["abs_c"].__setitem__("use", value)],
-                start_handlers=[lambda value: self._anim_params["abs_c"].__setitem__("start", value)],
-                end_handlers=[lambda value: self._anim_params["abs_c"].__setitem__("end", value)],
+                check_handlers=[lambda value: self._anim_params["c_polar.abs"].__setitem__("use", value)],
+                start_handlers=[lambda value: self._anim_params["c_polar.abs"].__setitem__("start", value)],
+                end_handlers=[lambda value: self._anim_params["c_polar.abs"].__setitem__("end", value)],
                 step=0.1,
             ),
             AnimationParameterWidget(
@@ -172,31 +158,16 @@ class Julia2D(AnimatedFractal, StatefulFractal, AAFractal, IterableFractal, Colo
             ),
         ]
 
-    def paintGL(self) -> None:
-        self.makeCurrent()
-        gl.glUseProgram(self._program)
-        gl.glViewport(0, 0, *self._widget_size)
-
-        location = lambda key: gl.glGetUniformLocation(self._program, key)
-
-        gl.glUniform1i(location("MAX_ITER"), self.max_iter)
-        gl.glUniform2f(location("RES"), *self._widget_size)
-        gl.glUniform1d(location("ZOOM"), self.zoom_factor)
-        gl.glUniform1i(location("DRAW_LINES"), int(self.central_lines))
-        gl.glUniform1f(location("PHI"), self.rotation_angle)
-
-        gl.glUniform4f(
-            location("COLOR"),
-            self._color.redF(),
-            self._color.greenF(),
-            self._color.blueF(),
-            self._color.alphaF(),
-        )
-
-        gl.glUniform1f(location("POWER"), float(self.power))
-        gl.glUniform2d(location("OFFSET"), self.offset.x(), self.offset.y())
-        gl.glUniform1i(location("AA"), 2 if self.antialiasing else 1)
-
-        gl.glUniform2d(location("C"), self.cartesian_c.real, self.cartesian_c.imag)
-
-        gl.glDrawElements(gl.GL_TRIANGLES, 6, gl.GL_UNSIGNED_INT, None)
+    def _uniform_values(self) -> dict[str, Any]:
+        return {
+            **super()._uniform_values(),
+            "MAX_ITER": self.max_iter,
+            "ZOOM": self.zoom_factor,
+            "DRAW_LINES": int(self.central_lines),
+            "PHI": self.rotation_angle,
+            "COLOR": self._color.getRgbF(),
+            "POWER": float(self.power),
+            "OFFSET": (self.offset.x(), self.offset.y()),
+            "AA": 2 if self.antialiasing else 1,
+            "C": (self.cartesian_c.real, self.cartesian_c.imag),
+        }
@@ -1,8 +1,6 @@
-import json
 from math import cos, pi, sin
 from typing import Any
 
-import OpenGL.GL as gl
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QColor
 
@@ -181,52 +179,31 @@ class Julia3D(StatefulFractal, AAFractal, IterableFractal, ColorableFractal, BGC
     def animation_controls(self) -> list[Any]:
         return []
 
-    def paintGL(self) -> None:
-        self.makeCurrent()
-        gl.glUseProgram(self._program)
-        gl.glViewport(0, 0, *self._widget_size)
-
-        location = lambda key: gl.glGetUniformLocation(self._program, key)
-
-        gl.glUniform1i(location("MAX_ITER"), self.max_iter)
-        gl.glUniform2f(location("RES"), *self._widget_size)
-        gl.glUniform1f(location("PHI"), self.h_angle)
-        gl.glUniform1f(location("THETA"), self.v_angle)
-
-        gl.glUniform4f(
-            location("COLOR"),
-            self.color.redF(),
-            self.color.greenF(),
-            self.color.blueF(),
-            self.color.alphaF(),
-        )
-
-        gl.glUniform4f(
-            location("BG_COLOR"),
-            self.bg_color.redF(),
-            self.bg_color.greenF(),
-            self.bg_color.blueF(),
-            self.bg_color.alphaF(),
-        )
-
-        gl.glUniform1f(location("ZOOM"), self.zoom_factor)
-        gl.glUniform1f(location("POWER"), float(self.power))
-        gl.glUniform1i(location("CUT"), self.cut)
-        gl.glUniform3f(location("C"), *self._get_c())
-        gl.glUniform1i(location("MAX_STEPS"), self.depth)
-        gl.glUniform1f(location("ROTATE_Y"), self.rotate_y)
-        gl.glUniform1f(location("AO_COEF"), self.ao)
-        gl.glUniform1i(location("SHADOWS"), int(self.shadows))
-        gl.glUniform1i(location("AA"), 2 if self.antialiasing else 1)
-
-        gl.glDrawElements(gl.GL_TRIANGLES, 6, gl.GL_UNSIGNED_INT, None)
+    def _uniform_values(self) -> dict[str, Any]:
+        return {
+            **super()._uniform_values(),
+            "MAX_ITER": self.max_iter,
+            "PHI": self.h_angle,
+            "THETA": self.v_angle,
+            "COLOR": self.color.getRgbF(),
+            "BG_COLOR": self.bg_color.getRgbF(),
+            "ZOOM": self.zoom_factor,
+            "POWER": float(self.power),
+            "CUT": self.cut,
+            "C": self._get_c(),
+            "MAX_STEPS": self.depth,
+            "ROTATE_Y": self.rotate_y,
+            "AO_COEF": self.ao,
+            "SHADOWS": int(self.shadows),
+            "AA": 2 if self.antialiasing else 1,
+        }
 
     def _get_c(self):
         a, b, r = self.argx_c, self.argy_c, self.abs_c
         return r * cos(a) * cos(b), r * sin(a) * cos(b), r * sin(b)
 
-    def _save_state(self, filename: str) -> None:
-        state = {
+    def _state(self) -> dict[str, Any]:
+        return {
             "max_iter": self.max_iter,
             "h_angle": self.h_angle,
             "v_angle": self.v_angle,
@@ -254,13 +231,8 @@ class Julia3D(StatefulFractal, AAFractal, IterableFractal, ColorableFractal, BGC
             "shadows": self.shadows,
             "antialiasing": self.antialiasing,
         }
-        with open(filename, "w") as f:
-            json.dump(state, f)
-
-    def _load_state(self, filename: str) -> None:
-        with open(filename, "r") as f:
-            state = json.load(f)
 
+    def _apply_state(self, state: dict[str, Any]) -> None:
         self.max_iter = state["max_iter"]
         self.h_angle = state["h_angle"]
         self.v_angle = state["v_angle"]
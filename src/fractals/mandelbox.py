@@ -1,8 +1,6 @@
-import json
 from math import cos, pi, sin
 from typing import Any
 
-import OpenGL.GL as gl
 from PySide6.QtCore import QEvent, Qt, QTimer
 from PySide6.QtGui import QColor, QCursor, QKeyEvent, QMouseEvent, QWheelEvent
 from PySide6.QtWidgets import QApplication, QInputDialog, QMessageBox
@@ -220,44 +218,28 @@ class Mandelbox(StatefulFractal, AAFractal, IterableFractal, ColorableFractal, B
                     for key in self._move_dict.keys():
                         self._move_dict[key] = False
 
-    def paintGL(self):
+    def _paint(self) -> None:
         self.do_move()
-
-        self.makeCurrent()
-        gl.glUseProgram(self._program)
-        gl.glViewport(0, 0, *self._widget_size)
-
-        location = lambda key: gl.glGetUniformLocation(self._program, key)
-
-        gl.glUniform1i(location("MAX_ITER"), self.max_iter)
-        gl.glUniform2f(location("RES"), *self._widget_size)
-        gl.glUniform1f(location("PHI"), self.h_angle)
-        gl.glUniform1f(location("THETA"), self.v_angle)
-        gl.glUniform3f(location("OFFSET"), *self.offset)
-        gl.glUniform4f(
-            location("BG_COLOR"),
-            self.bg_color.redF(),
-            self.bg_color.greenF(),
-            self.bg_color.blueF(),
-            self.bg_color.alphaF(),
-        )
-        gl.glUniform4f(
-            location("COLOR"),
-            self.color.redF(),
-            self.color.greenF(),
-            self.color.blueF(),
-            self.color.alphaF(),
-        )
-        gl.glUniform1i(location("MAX_STEPS"), self.depth)
-        gl.glUniform1f(location("AO_COEF"), self.ao)
-        gl.glUniform1i(location("SHADOWS"), int(self.shadows))
-        gl.glUniform1f(location("FOLDING"), self.folding)
-        gl.glUniform1f(location("SCALE"), self.scale)
-        gl.glUniform1f(location("OUT_RAD"), self.out_rad)
-        gl.glUniform1f(location("IN_RAD"), self.in_rad)
-        gl.glUniform1i(location("AA"), 2 if self.antialiasing else 1)
-
-        gl.glDrawElements(gl.GL_TRIANGLES, 6, gl.GL_UNSIGNED_INT, None)
+        super()._paint()
+
+    def _uniform_values(self) -> dict[str, Any]:
+        return {
+            **super()._uniform_values(),
+            "MAX_ITER": self.max_iter,
+            "PHI": self.h_angle,
+            "THETA": self.v_angle,
+            "OFFSET": self.offset,
+            "BG_COLOR": self.bg_color.getRgbF(),
+            "COLOR": self.color.getRgbF(),
+            "MAX_STEPS": self.depth,
+            "AO_COEF": self.ao,
+            "SHADOWS": int(self.shadows),
+            "FOLDING": self.folding,
+            "SCALE": self.scale,
+            "OUT_RAD": self.out_rad,
+            "IN_RAD": self.in_rad,
+            "AA": 2 if self.antialiasing else 1,
+        }
 
     def fractal_controls(self) -> list[Any]:
         return (
@@ -321,8 +303,8 @@ class Mandelbox(StatefulFractal, AAFractal, IterableFractal, ColorableFractal, B
     def animation_controls(self) -> list[Any]:
         return []
 
-    def _save_state(self, filename: str) -> None:
-        state = {
+    def _state(self) -> dict[str, Any]:
+        return {
             "max_iter": self.max_iter,
             "h_angle": self.h_angle,
             "v_angle": self.v_angle,
@@ -349,13 +331,8 @@ class Mandelbox(StatefulFractal, AAFractal, IterableFractal, ColorableFractal, B
             "antialiasing": self.antialiasing,
             "speed": self.speed,
         }
-        with open(filename, "w") as f:
-            json.dump(state, f)
-
-    def _load_state(self, filename: str) -> None:
-        with open(filename, "r") as f:
-            state = json.load(f)
 
+    def _apply_state(self, state: dict[str, Any]) -> None:
         self.max_iter = state["max_iter"]
         self.h_angle = state["h_angle"]
         self.v_angle = state["v_angle"]
@@ -1,5 +1,5 @@
-import json
-from math import cos, pi, sin
+from decimal import Decimal, localcontext
+from math import ceil, cos, hypot, pi, sin
 from typing import Any
 
 import numpy as np
@@ -16,6 +16,13 @@ from .abstract import (
     IterableFractal,
     StatefulFractal,
 )
+from .engines import ReferenceOrbit, ReferenceOrbitCache, numpy_2d, precision_for_zoom
+from .engines.perturbation import GLITCH_TOLERANCE, MAX_REFERENCES
+
+# Pans keep the reference points of the last frame, the shader takes their offset from the
+# view center. The main one moves to the view center once it is this many times the frame
+# radius away, where the series approximation would skip few iterations.
+REBASE_DISTANCE = 1.0
 
 
 class Mandelbrot2D(StatefulFractal, AAFractal, IterableFractal, ColorableFractal, Fractal2D):
@@ -25,19 +32,38 @@ class Mandelbrot2D(StatefulFractal, AAFractal, IterableFractal, ColorableFractal
         self._power = 2.0
 
         self._perturbation = False
-        self._perturbation_array = np.array([0] * 100_000, np.float64)
+
+        # View center with enough digits for deep zooms, `offset` is its float64 rounding
+        self._center = (Decimal(0), Decimal(0))
+        self._orbits = ReferenceOrbitCache(maxsize=MAX_REFERENCES + 1)
+        # Reference points of the last frame, the main one first, and the orbit parameters
+        # they were computed for
+        self._references: list[tuple[Decimal, Decimal]] = []
+        self._references_key: tuple[int, int, int] | None = None
+        self._uploaded_orbit: ReferenceOrbit | None = None
+        self._orbit_buffer_size = 0
 
     def initializeGL(self) -> None:
         super().initializeGL()
 
-        ssbo = gl.glGenBuffers(1)
-        gl.glBindBufferBase(gl.GL_SHADER_STORAGE_BUFFER, 2, ssbo)
-        gl.glBufferData(
-            gl.GL_SHADER_STORAGE_BUFFER,
-            self._perturbation_array.nbytes,
-            self._perturbation_array,
-            gl.GL_DYNAMIC_DRAW,
-        )
+        self._orbit_buffer = gl.glGenBuffers(1)
+        gl.glBindBufferBase(gl.GL_SHADER_STORAGE_BUFFER, 2, self._orbit_buffer)
+        self._uploaded_orbit = None
+        self._orbit_buffer_size = 0
+
+    @property
+    def offset(self) -> QPointF:
+        return self._offset
+
+    @offset.setter
+    def offset(self, new_value: QPointF) -> None:
+        self._center = (Decimal(new_value.x()), Decimal(new_value.y()))
+        self._offset = new_value
+        self.update()
+
+    @property
+    def center(self) -> tuple[Decimal, Decimal]:
+        return self._center
 
     @property
     def power(self) -> int:
@@ -82,67 +108,184 @@ class Mandelbrot2D(StatefulFractal, AAFractal, IterableFractal, ColorableFractal
     def animation_controls(self) -> list[Any]:
         return super().animation_controls() + []
 
-    def _update_perturbation_values(self):
-        n = self.max_iter
-        self._perturbation_array.fill(5)
-
-        def zsqr(clx) -> list:
-            return [clx[0] * clx[0] - clx[1] * clx[1], 2 * clx[0] * clx[1]]
-
-        z = [0, 0]
-        c = self.offset
-
-        i = 0
-        while i < n:
-            z = zsqr(z)
-            z[1] += c.y()
-            z[0] += c.x()
-            self._perturbation_array[2 * i] = z[0]
-            self._perturbation_array[2 * i + 1] = z[1]
-            i += 1
-            if z[0] * z[0] + z[1] * z[1] >= 512:
-                break
+    def _shifted_center(self, delta: complex) -> tuple[Decimal, Decimal]:
+        """The view center moved by `delta`, with the digits the zoom needs"""
+
+        with localcontext() as context:
+            context.prec = precision_for_zoom(self.zoom_factor)
+            return (self._center[0] + Decimal(delta.real), self._center[1] + Decimal(delta.imag))
 
-    def paintGL(self) -> None:
-        self.makeCurrent()
-        gl.glUseProgram(self._program)
-        gl.glViewport(0, 0, *self._widget_size)
-
-        location = lambda key: gl.glGetUniformLocation(self._program, key)
-
-        gl.glUniform1i(location("MAX_ITER"), self.max_iter)
-        gl.glUniform2f(location("RES"), *self._widget_size)
-        gl.glUniform1d(location("ZOOM"), self.zoom_factor)
-        gl.glUniform1i(location("DRAW_LINES"), int(self.central_lines))
-        gl.glUniform1f(location("PHI"), self.rotation_angle)
-
-        gl.glUniform4f(
-            location("COLOR"),
-            self._color.redF(),
-            self._color.greenF(),
-            self._color.blueF(),
-            self._color.alphaF(),
+    def _reference_delta(self, reference: tuple[Decimal, Decimal]) -> complex:
+        """Offset of a reference point from the view center, REF_OFFSET in the shader"""
+
+        return complex(float(reference[0] - self._center[0]), float(reference[1] - self._center[1]))
+
+    def _move_view(self, delta: QPointF) -> None:
+        # Accumulate in decimal, float64 offsets stop moving at deep zooms
+        self._center = self._shifted_center(complex(delta.x(), delta.y()))
+        self._offset = QPointF(float(self._center[0]), float(self._center[1]))
+        self.update()
+
+    def _upload_reference_orbit(self, center: tuple[Decimal, Decimal]) -> ReferenceOrbit:
+        orbit = self._orbits.get(
+            center,
+            self.max_iter,
+            ceil(self.power),
+            precision_for_zoom(self.zoom_factor),
         )
+        if orbit is self._uploaded_orbit:
+            return orbit
 
-        gl.glUniform1f(location("POWER"), float(self.power))
-        gl.glUniform2d(location("OFFSET"), self.offset.x(), self.offset.y())
-        gl.glUniform1i(location("AA"), 2 if self.antialiasing else 1)
+        gl.glBindBuffer(gl.GL_SHADER_STORAGE_BUFFER, self._orbit_buffer)
+        if orbit.points.nbytes > self._orbit_buffer_size:
+            self._orbit_buffer_size = max(orbit.points.nbytes, 2 * self._orbit_buffer_size)
+            gl.glBufferData(gl.GL_SHADER_STORAGE_BUFFER, self._orbit_buffer_size, None, gl.GL_DYNAMIC_DRAW)
 
-        gl.glUniform1i(location("PERTURBATION"), int(self.perturbation))
+        # Only the used prefix goes to the GPU, PERT_LEN tells the shader where it ends
+        gl.glBufferSubData(gl.GL_SHADER_STORAGE_BUFFER, 0, orbit.points.nbytes, orbit.points)
+        self._uploaded_orbit = orbit
+        return orbit
 
-        if self.perturbation:
-            self._update_perturbation_values()
-            gl.glBufferSubData(
-                gl.GL_SHADER_STORAGE_BUFFER,
-                0,
-                self._perturbation_array.nbytes,
-                self._perturbation_array,
-            )
+    @property
+    def _uses_perturbation(self) -> bool:
+        # The perturbation formula in the shader is written for z^2 + c
+        return self.perturbation and self.power == 2
+
+    def _uniform_values(self) -> dict[str, Any]:
+        return {
+            **super()._uniform_values(),
+            "MAX_ITER": self.max_iter,
+            "ZOOM": self.zoom_factor,
+            "DRAW_LINES": int(self.central_lines),
+            "PHI": self.rotation_angle,
+            "COLOR": self._color.getRgbF(),
+            "POWER": float(self.power),
+            "OFFSET": (self.offset.x(), self.offset.y()),
+            "AA": 2 if self.antialiasing else 1,
+            "PERTURBATION": int(self._uses_perturbation),
+            "GLITCH_TOL": GLITCH_TOLERANCE,
+        }
 
-        gl.glDrawElements(gl.GL_TRIANGLES, 6, gl.GL_UNSIGNED_INT, None)
+    def _geometry(self, values: dict[str, Any]) -> dict[str, Any]:
+        # Deep zoom pans can move the center by less than the float64 rounding of OFFSET
+        return {**super()._geometry(values), "center": self._center}
+
+    def _draw(self) -> None:
+        if self._uses_perturbation:
+            self._draw_perturbation()
+        else:
+            super()._draw()
+
+    def _set_reference(self, reference: tuple[Decimal, Decimal], delta_max: float) -> None:
+        """Uploads the orbit of the point `reference` and its offset from the view center"""
+
+        reference_delta = self._reference_delta(reference)
+        orbit = self._upload_reference_orbit(reference)
+        skip, (a, b, c) = orbit.series_skip(delta_max + abs(reference_delta))
+
+        with self._frame_timer.setup():
+            self._uniforms.update(
+                {
+                    "PERT_LEN": len(orbit),
+                    "REF_OFFSET": (reference_delta.real, reference_delta.imag),
+                    "SKIP": skip,
+                    "SA_A": (a.real, a.imag),
+                    "SA_B": (b.real, b.imag),
+                    "SA_C": (c.real, c.imag),
+                }
+            )
 
-    def _save_state(self, filename: str) -> None:
-        state = {
+    def _glitched_sample(self) -> tuple[int, int] | None:
+        """A texel of the iteration texture marked as glitched by the last pass, bottom-up"""
+
+        # Pans compute only the exposed strips, the scissor box
+        if gl.glIsEnabled(gl.GL_SCISSOR_TEST):
+            x, y, width, height = (int(v) for v in gl.glGetIntegerv(gl.GL_SCISSOR_BOX))
+        else:
+            x, y, width, height = 0, 0, self._iterations_fbo.width(), self._iterations_fbo.height()
+
+        gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 4)
+        pixels = gl.glReadPixels(x, y, width, height, gl.GL_RED, gl.GL_FLOAT)
+        iterations = np.frombuffer(pixels, dtype=np.float32).reshape(height, width)
+
+        ys, xs = np.nonzero(iterations < 0)
+        if not xs.size:
+            return None
+
+        # The one closest to the centroid lies well inside a glitched blob
+        i = np.argmin((xs - xs.mean()) ** 2 + (ys - ys.mean()) ** 2)
+        return x + int(xs[i]), y + int(ys[i])
+
+    def _sample_delta(self, x: int, y: int) -> complex:
+        """Offset of the texel (x, y) from the view center, `dc` in the shader"""
+
+        aa = self._iterations_fbo.width() // self._framebuffer_size[0]
+        width, height = self._render_size
+        frag_x, frag_y = self._frag_offset
+        window = (frag_x + x // aa, height - 1 - frag_y - y // aa, 1, 1)
+        sample = ((x % aa) / aa, (y % aa) / aa)
+        deltas = numpy_2d.pixel_deltas(self._render_size, self.zoom_factor, self.rotation_angle, window, sample)
+        return complex(deltas[0, 0])
+
+    def _glitch_mask(self) -> int:
+        """Copy of the iteration texture for the next glitch pass to read, it draws into the original"""
+
+        width, height = self._iterations_fbo.width(), self._iterations_fbo.height()
+        spare = self._spare_fbo
+        if spare is None or (spare.width(), spare.height()) != (width, height):
+            spare = self._spare_fbo = self._iterations_target((width, height))
+            self._iterations_fbo.bind()
+
+        source, target = self._iterations_fbo.texture(), spare.texture()
+        gl.glCopyImageSubData(
+            source, gl.GL_TEXTURE_2D, 0, 0, 0, 0, target, gl.GL_TEXTURE_2D, 0, 0, 0, 0, width, height, 1
+        )
+        return target
+
+    def _draw_perturbation(self) -> None:
+        # Distance from the view center to the farthest corner
+        width, height = self._render_size
+        delta_max = hypot(width, height) / min(width, height) / self.zoom_factor
+
+        # A pan keeps the references and their orbits, only zooms, max_iter and far moves
+        # compute new ones
+        key = (self.max_iter, ceil(self.power), precision_for_zoom(self.zoom_factor))
+        references = self._references
+        if key != self._references_key or abs(self._reference_delta(references[0])) > REBASE_DISTANCE * delta_max:
+            references = [self._center]
+            self._references_key = key
+        self._references = references[:1]
+
+        self._set_reference(references[0], delta_max)
+        super()._draw()
+
+        # Glitched samples are negative, every next pass recomputes only them against a
+        # reference placed on one, the other samples are discarded before iterating.
+        # The glitch references of the last frame still in view are tried first, their
+        # glitched blobs moved along with the view.
+        for i in range(1, MAX_REFERENCES + 1):
+            sample = self._glitched_sample()
+            if sample is None:
+                break
+            if i < len(references) and abs(self._reference_delta(references[i])) <= delta_max:
+                reference = references[i]
+            else:
+                reference = self._shifted_center(self._sample_delta(*sample))
+            self._references.append(reference)
+
+            self._set_reference(reference, delta_max)
+            gl.glActiveTexture(gl.GL_TEXTURE0)
+            gl.glBindTexture(gl.GL_TEXTURE_2D, self._glitch_mask())
+            with self._frame_timer.setup():
+                self._uniforms.update({"GLITCH_PASS": 1, "ITERATIONS": 0})
+            super()._draw()
+
+        # Other compute passes, e.g. without perturbation, draw every sample
+        with self._frame_timer.setup():
+            self._uniforms.update({"GLITCH_PASS": 0})
+
+    def _state(self) -> dict[str, Any]:
+        return {
             "max_iter": self.max_iter,
             "zoom_factor": self.zoom_factor,
             "central_lines": self.central_lines,
@@ -155,15 +298,13 @@ class Mandelbrot2D(StatefulFractal, AAFractal, IterableFractal, ColorableFractal
             },
             "power": self.power,
             "offset": {"x": self.offset.x(), "y": self.offset.y()},
+            "center": {"x": str(self._center[0]), "y": str(self._center[1])},
             "antialiasing": self.antialiasing,
+            "periodicity": self.periodicity,
+            "perturbation": self.perturbation,
         }
-        with open(filename, "w") as f:
-            json.dump(state, f)
-
-    def _load_state(self, filename: str) -> None:
-        with open(filename, "r") as f:
-            state = json.load(f)
 
+    def _apply_state(self, state: dict[str, Any]) -> None:
         self.max_iter = state["max_iter"]
         self.zoom_factor = state["zoom_factor"]
         self.central_lines = state["central_lines"]
@@ -176,6 +317,10 @@ class Mandelbrot2D(StatefulFractal, AAFractal, IterableFractal, ColorableFractal
 
         self.power = state["power"]
         self.offset = QPointF(state["offset"]["x"], state["offset"]["y"])
+        if "center" in state:
+            self._center = (Decimal(state["center"]["x"]), Decimal(state["center"]["y"]))
         self.antialiasing = state["antialiasing"]
+        self.periodicity = state.get("periodicity", False)
+        self.perturbation = state.get("perturbation", False)
 
         self.update()
@@ -1,8 +1,6 @@
-import json
 from math import pi
 from typing import Any
 
-import OpenGL.GL as gl
 from PySide6.QtGui import QColor
 
 from frontend.components import NamedCheckBox, NamedSlider
@@ -132,49 +130,26 @@ class Mandelbrot3D(StatefulFractal, AAFractal, IterableFractal, ColorableFractal
     def animation_controls(self) -> list[Any]:
         return super().animation_controls() + []
 
-    def paintGL(self) -> None:
-        self.makeCurrent()
-        gl.glUseProgram(self._program)
-        gl.glViewport(0, 0, *self._widget_size)
-
-        location = lambda key: gl.glGetUniformLocation(self._program, key)
-
-        gl.glUniform1i(location("MAX_ITER"), self.max_iter)
-        gl.glUniform2f(location("RES"), *self._widget_size)
-        gl.glUniform1f(location("ZOOM"), self.zoom_factor)
-        gl.glUniform1f(location("PHI"), self.h_angle)
-        gl.glUniform1f(location("THETA"), self.v_angle)
-
-        gl.glUniform4f(
-            location("COLOR"),
-            self.color.redF(),
-            self.color.greenF(),
-            self.color.blueF(),
-            self.color.alphaF(),
-        )
-
-        gl.glUniform1f(location("POWER"), float(self.power))
-        gl.glUniform1i(location("AA"), 2 if self.antialiasing else 1)
-
-        gl.glUniform4f(
-            location("BG_COLOR"),
-            self.bg_color.redF(),
-            self.bg_color.greenF(),
-            self.bg_color.blueF(),
-            self.bg_color.alphaF(),
-        )
-
-        gl.glUniform1i(location("CUT"), self.cut)
-        gl.glUniform1i(location("MAX_STEPS"), self.depth)
-
-        gl.glUniform1f(location("ROTATE_Y"), self.z_angle)
-        gl.glUniform1f(location("AO_COEF"), self.ao)
-        gl.glUniform1i(location("SHADOWS"), int(self.shadows))
-
-        gl.glDrawElements(gl.GL_TRIANGLES, 6, gl.GL_UNSIGNED_INT, None)
+    def _uniform_values(self) -> dict[str, Any]:
+        return {
+            **super()._uniform_values(),
+            "MAX_ITER": self.max_iter,
+            "ZOOM": self.zoom_factor,
+            "PHI": self.h_angle,
+            "THETA": self.v_angle,
+            "COLOR": self.color.getRgbF(),
+            "POWER": float(self.power),
+            "AA": 2 if self.antialiasing else 1,
+            "BG_COLOR": self.bg_color.getRgbF(),
+            "CUT": self.cut,
+            "MAX_STEPS": self.depth,
+            "ROTATE_Y": self.z_angle,
+            "AO_COEF": self.ao,
+            "SHADOWS": int(self.shadows),
+        }
 
-    def _save_state(self, filename: str) -> None:
-        state = {
+    def _state(self) -> dict[str, Any]:
+        return {
             "max_iter": self.max_iter,
             "zoom_factor": self.zoom_factor,
             "h_angle": self.h_angle,
@@ -199,13 +174,8 @@ class Mandelbrot3D(StatefulFractal, AAFractal, IterableFractal, ColorableFractal
             "ao": self.ao,
             "shadows": self.shadows,
         }
-        with open(filename, "w") as f:
-            json.dump(state, f)
-
-    def _load_state(self, filename: str) -> None:
-        with open(filename, "r") as f:
-            state = json.load(f)
 
+    def _apply_state(self, state: dict[str, Any]) -> None:
         self.max_iter = state["max_iter"]
         self.zoom_factor = state["zoom_factor"]
         self.h_angle = state["h_angle"]
@@ -0,0 +1,131 @@
+import os
+from typing import Any
+
+import numpy as np
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QOffscreenSurface, QOpenGLContext, QSurfaceFormat
+from PySide6.QtWidgets import QApplication
+
+from .abstract import FragmentOnlyFractal
+from .burning_ship_2d import BurningShip2D
+from .julia_2d import Julia2D
+from .julia_3d import Julia3D
+from .mandelbox import Mandelbox
+from .mandelbrot_2d import Mandelbrot2D
+from .mandelbrot_3d import Mandelbrot3D
+
+__all__ = ["OffscreenRenderer", "WIDGETS", "render_state_gl"]
+
+# Widget classes by fractal kind, the kind is also the name of the fragment shader
+WIDGETS: dict[str, type[FragmentOnlyFractal]] = {
+    "mandelbrot2d": Mandelbrot2D,
+    "julia2d": Julia2D,
+    "burningship2d": BurningShip2D,
+    "mandelbrot3d": Mandelbrot3D,
+    "julia3d": Julia3D,
+    "mandelbrot4d": Mandelbrot3D,
+    "julia4d": Julia3D,
+    "mandelbox": Mandelbox,
+}
+
+SHADER_DIR = "res/shaders"
+
+
+def _application() -> QApplication:
+    """The running application, or a new one that needs no display.
+
+    Without X11 or Wayland Qt takes the EGL platform, Mesa then creates surfaceless
+    contexts, on llvmpipe if there is no GPU. QT_QPA_PLATFORM and EGL_PLATFORM override it."""
+
+    app = QApplication.instance()
+    if app is not None:
+        return app
+
+    if not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")):
+        os.environ.setdefault("QT_QPA_PLATFORM", "minimalegl")
+        os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+    # The shaders need 4.3 for compute stages and atomic counters. The vertex shader and the
+    # 3D ones are GLSL 1.20 with gl_FragColor, which Mesa only compiles in a compatibility
+    # profile, core profiles reject them.
+    format = QSurfaceFormat()
+    format.setVersion(4, 3)
+    format.setProfile(QSurfaceFormat.OpenGLContextProfile.CompatibilityProfile)
+    QSurfaceFormat.setDefaultFormat(format)
+
+    QApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+    return QApplication([])
+
+
+class OffscreenRenderer:
+    """Renders saved states with the fragment shaders of the widgets, into NumPy arrays.
+
+    The widgets are never shown. Their GL setup runs in a context of the renderer, current
+    on an offscreen surface, and `_grab_tile` draws into an FBO of that context with the
+    uniforms the widget would set. `makeCurrent` of a widget Qt never initialized is a no-op
+    and its default framebuffer is 0, so the widget code works unchanged."""
+
+    def __init__(self):
+        self._app = _application()
+
+        self._context = QOpenGLContext()
+        self._context.setFormat(QSurfaceFormat.defaultFormat())
+        share_context = QOpenGLContext.globalShareContext()
+        if share_context is not None:
+            self._context.setShareContext(share_context)
+        if not self._context.create():
+            raise RuntimeError("Can't create an OpenGL context")
+
+        self._surface = QOffscreenSurface()
+        self._surface.setFormat(self._context.format())
+        self._surface.create()
+
+        self._widgets: dict[str, FragmentOnlyFractal] = {}
+
+    def _widget(self, kind: str) -> FragmentOnlyFractal:
+        widget = self._widgets.get(kind)
+        if widget is None:
+            if kind not in WIDGETS:
+                raise ValueError(f"Unknown fractal: {kind}")
+            widget = WIDGETS[kind](name=kind, fragment_shader_path=f"{SHADER_DIR}/{kind}.frag")
+            widget.initializeGL()
+            self._widgets[kind] = widget
+        return widget
+
+    def render(
+        self,
+        kind: str,
+        state: dict[str, Any],
+        res: tuple[int, int],
+        window: tuple[int, int, int, int] | None = None,
+    ) -> np.ndarray:
+        """Renders `window` of a `res` sized frame of a saved state into an RGB uint8 array"""
+
+        if not self._context.makeCurrent(self._surface):
+            raise RuntimeError("Can't make the OpenGL context current")
+        try:
+            widget = self._widget(kind)
+            widget._apply_state(state)
+            pixels = widget._grab_tile(window or (0, 0, *res), tuple(res))
+        finally:
+            self._context.doneCurrent()
+
+        return np.ascontiguousarray(pixels)
+
+
+# One renderer per process, created by the first render
+_renderer: OffscreenRenderer | None = None
+
+
+def render_state_gl(
+    kind: str,
+    state: dict[str, Any],
+    res: tuple[int, int],
+    window: tuple[int, int, int, int] | None = None,
+) -> np.ndarray:
+    """`engines.render_state` on the GPU, or on a software rasterizer without one"""
+
+    global _renderer
+    if _renderer is None:
+        _renderer = OffscreenRenderer()
+    return _renderer.render(kind, state, res, window)
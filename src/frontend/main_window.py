@@ -1,4 +1,4 @@
-from PySide6.QtCore import QSize, Qt
+from PySide6.QtCore import QSize, Qt, QTimer
 from PySide6.QtGui import QCursor, QIcon
 from PySide6.QtWidgets import (
     QComboBox,
@@ -9,14 +9,18 @@ from PySide6.QtWidgets import (
     QScrollArea,
     QSizePolicy,
     QSpacerItem,
+    QStatusBar,
     QTabWidget,
     QWidget,
 )
 
-from fractals.abstract import FractalABC
+from fractals.abstract import FractalABC, FragmentOnlyFractal
 
 from .components import VStackWidget
 
+# How often the frame times in the status bar are refreshed, ms
+FRAME_STATS_INTERVAL = 500
+
 
 class MainWindow(QMainWindow):
     def __init__(self, *args, **kwargs) -> None:
@@ -53,8 +57,28 @@ class MainWindow(QMainWindow):
 
         self.setCentralWidget(central_widget)
 
+        self._current_fractal: FractalABC | None = None
+        self.setStatusBar(QStatusBar())
+        self._frame_stats_timer = QTimer(self)
+        self._frame_stats_timer.setInterval(FRAME_STATS_INTERVAL)
+        self._frame_stats_timer.timeout.connect(self._show_frame_stats)
+        self._frame_stats_timer.start()
+
+    def _show_frame_stats(self) -> None:
+        if not isinstance(self._current_fractal, FragmentOnlyFractal):
+            return
+
+        stats = self._current_fractal.frame_stats()
+        parts = [
+            f"{label} {stats[name]['p50']:.2f} / {stats[name]['p95']:.2f} ms"
+            for name, label in (("gpu", "GPU"), ("cpu", "CPU"), ("setup", "Uniforms"))
+            if name in stats
+        ]
+        self.statusBar().showMessage("p50 / p95    " + "    ".join(parts) if parts else "")
+
     def _set_current_fractal(self, index: int) -> None:
         fractal: FractalABC = self._fractals_list.itemData(index)
+        self._current_fractal = fractal
 
         layout: QGridLayout = self._canvas_frame.layout()
         prev = layout.itemAtPosition(0, 0)
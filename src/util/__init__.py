@@ -1,9 +1,43 @@
-from .create_video import create_video_from_qimages
-from .geometry import rotate_point
+import importlib
+from typing import Any
+
+from .costs import cost_summary
+from .images import save_image
+from .png_writer import PNGWriter
+from .render_job import RenderJob, write_atomic
+from .tiles import poster_grid, render_tiled, tile_grid, tile_name
 from .use_setter import use_setter
+from .video_stream import VideoStreamWriter, encode_images
 
 __all__ = [
+    "cost_summary",
     "create_video_from_qimages",
+    "encode_images",
     "use_setter",
     "rotate_point",
+    "save_image",
+    "PNGWriter",
+    "poster_grid",
+    "RenderJob",
+    "render_tiled",
+    "tile_grid",
+    "tile_name",
+    "FrameConverter",
+    "qimage_view",
+    "VideoStreamWriter",
+    "write_atomic",
 ]
+
+# Helpers of Qt types, imported on first use so that the headless commands run without PySide6
+_QT_HELPERS = {
+    "create_video_from_qimages": "create_video",
+    "FrameConverter": "frames",
+    "qimage_view": "frames",
+    "rotate_point": "geometry",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _QT_HELPERS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{_QT_HELPERS[name]}", __name__), name)
@@ -0,0 +1,24 @@
+from typing import Any
+
+import numpy as np
+
+__all__ = ["cost_summary"]
+
+
+def cost_summary(costs: np.ndarray, channels: tuple[str, ...], bins: int = 32) -> dict[str, dict[str, Any]]:
+    """Totals of a per pixel work map of shape (height, width, len(channels)) by channel name.
+
+    Every channel gets its sum, mean and max and a histogram of `bins` bins over the
+    pixels as a (counts, edges) pair."""
+
+    summary = {}
+    for index, name in enumerate(channels):
+        values = costs[..., index]
+        counts, edges = np.histogram(values, bins=bins, range=(0.0, max(float(values.max()), 1.0)))
+        summary[name] = {
+            "sum": float(values.sum(dtype=np.float64)),
+            "mean": float(values.mean(dtype=np.float64)),
+            "max": float(values.max()),
+            "histogram": (counts, edges),
+        }
+    return summary
@@ -0,0 +1,65 @@
+import sys
+
+import cv2
+import numpy as np
+from PySide6.QtGui import QImage
+
+__all__ = ["FrameConverter", "qimage_view"]
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+# QImage format -> (bytes per pixel, cv2 conversion to BGR or None if already BGR)
+# 32-bit formats store 0xAARRGGBB words, so their byte order depends on the platform
+_FORMATS = {
+    QImage.Format.Format_RGBA8888: (4, cv2.COLOR_RGBA2BGR),
+    QImage.Format.Format_RGBA8888_Premultiplied: (4, cv2.COLOR_RGBA2BGR),
+    QImage.Format.Format_RGBX8888: (4, cv2.COLOR_RGBA2BGR),
+    QImage.Format.Format_RGB32: (4, cv2.COLOR_BGRA2BGR if _LITTLE_ENDIAN else cv2.COLOR_RGBA2BGR),
+    QImage.Format.Format_ARGB32: (4, cv2.COLOR_BGRA2BGR if _LITTLE_ENDIAN else cv2.COLOR_RGBA2BGR),
+    QImage.Format.Format_ARGB32_Premultiplied: (4, cv2.COLOR_BGRA2BGR if _LITTLE_ENDIAN else cv2.COLOR_RGBA2BGR),
+    QImage.Format.Format_RGB888: (3, cv2.COLOR_RGB2BGR),
+    QImage.Format.Format_BGR888: (3, None),
+    QImage.Format.Format_Grayscale8: (1, cv2.COLOR_GRAY2BGR),
+}
+
+
+def qimage_view(qimage: QImage) -> np.ndarray:
+    """Pixels of `qimage` as a (height, width, channels) view without copying.
+
+    Rows keep the `bytesPerLine()` stride of the image, the view is only valid
+    while `qimage` is alive and unchanged."""
+
+    if qimage.format() not in _FORMATS:
+        raise ValueError(f"Unsupported QImage format: {qimage.format()}")
+
+    channels, _ = _FORMATS[qimage.format()]
+    height, width, stride = qimage.height(), qimage.width(), qimage.bytesPerLine()
+
+    buffer = np.frombuffer(qimage.constBits(), dtype=np.uint8, count=qimage.sizeInBytes())
+    return buffer.reshape(height, stride)[:, : width * channels].reshape(height, width, channels)
+
+
+class FrameConverter:
+    """Converts QImages into BGR frames for OpenCV.
+
+    The output goes into one buffer that is reused while the frame size stays the
+    same, so the returned array is only valid until the next call."""
+
+    def __init__(self):
+        self._buffer: np.ndarray | None = None
+
+    def __call__(self, qimage: QImage) -> np.ndarray:
+        if qimage.format() not in _FORMATS:
+            qimage = qimage.convertToFormat(QImage.Format.Format_RGBA8888)
+
+        _, code = _FORMATS[qimage.format()]
+        shape = (qimage.height(), qimage.width(), 3)
+        if self._buffer is None or self._buffer.shape != shape:
+            self._buffer = np.empty(shape, dtype=np.uint8)
+
+        view = qimage_view(qimage)
+        if code is None:
+            np.copyto(self._buffer, view)
+        else:
+            cv2.cvtColor(view, code, dst=self._buffer)
+        return self._buffer
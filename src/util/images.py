@@ -0,0 +1,9 @@
+import cv2
+import numpy as np
+
+
+def save_image(filename: str, rgb: np.ndarray) -> None:
+    """Saves RGB uint8 array in the format given by the extension of `filename`."""
+
+    if not cv2.imwrite(filename, np.ascontiguousarray(rgb[..., ::-1])):
+        raise OSError(f"Could not write image: {filename}")
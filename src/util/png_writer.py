@@ -0,0 +1,73 @@
+import struct
+import zlib
+
+import numpy as np
+
+__all__ = ["PNGWriter"]
+
+_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_IDAT_SIZE = 1 << 16
+
+
+class PNGWriter:
+    """Writes an 8-bit RGB PNG strip by strip, so the image never has to be in memory at once."""
+
+    def __init__(self, filename: str, width: int, height: int, compression: int = 6):
+        self._width = width
+        self._height = height
+        self._rows_written = 0
+
+        self._file = open(filename, "wb")
+        self._compressor = zlib.compressobj(compression)
+        self._pending = bytearray()
+
+        self._file.write(_SIGNATURE)
+        self._write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+    def __enter__(self) -> "PNGWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes) -> None:
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(chunk_type)
+        self._file.write(data)
+        self._file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type))))
+
+    def _flush_pending(self, force: bool = False) -> None:
+        while len(self._pending) >= _IDAT_SIZE or (force and self._pending):
+            self._write_chunk(b"IDAT", bytes(self._pending[:_IDAT_SIZE]))
+            del self._pending[:_IDAT_SIZE]
+
+    def write_rows(self, rows: np.ndarray) -> None:
+        """Appends (n, width, 3) uint8 rows below the ones already written."""
+
+        if rows.shape[1:] != (self._width, 3):
+            raise ValueError(f"Expected rows of shape (n, {self._width}, 3), got {rows.shape}")
+        if self._rows_written + len(rows) > self._height:
+            raise ValueError("More rows than the image height")
+
+        # Every scanline starts with its filter type, 0 means no filter
+        scanlines = np.zeros((len(rows), 1 + self._width * 3), dtype=np.uint8)
+        scanlines[:, 1:] = rows.reshape(len(rows), -1)
+
+        self._pending += self._compressor.compress(scanlines.tobytes())
+        self._flush_pending()
+        self._rows_written += len(rows)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        if self._rows_written != self._height:
+            self._file.close()
+            raise ValueError(f"Only {self._rows_written} of {self._height} rows were written")
+
+        self._pending += self._compressor.flush()
+        self._flush_pending(force=True)
+        self._write_chunk(b"IEND", b"")
+        self._file.close()
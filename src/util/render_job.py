@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+from typing import Any, Callable
+
+__all__ = ["RenderJob", "write_atomic"]
+
+MANIFEST = "manifest.json"
+
+# Read size when hashing finished items
+HASH_CHUNK = 1 << 20
+
+
+def write_atomic(path: str, write: Callable[[str], None]) -> None:
+    """Calls `write` with a temporary path next to `path`, then moves the file over `path`.
+
+    The temporary path keeps the extension, writers that pick the format by it still work.
+    Readers see either the old file or the complete new one, never a partial write."""
+
+    root, ext = os.path.splitext(path)
+    temp_path = f"{root}.{os.getpid()}.tmp{ext}"
+    try:
+        write(temp_path)
+        with open(temp_path, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RenderJob:
+    """Directory of a long render that survives restarts: a manifest describing the render,
+    the finished items, e.g. frames or tiles, and a SHA-256 marker written after every item.
+
+    An item counts as done only if its marker matches its contents, anything a crash left
+    behind is rendered again. Items are independent files, so several processes or machines
+    can work on one job as long as they render different items."""
+
+    def __init__(self, directory: str, manifest: dict[str, Any]):
+        self.directory = directory
+        self.manifest = manifest
+
+    @classmethod
+    def open(cls, directory: str, manifest: dict[str, Any]) -> "RenderJob":
+        """The job in `directory`, started with `manifest` unless it exists. An existing job
+        must have been started with the same manifest."""
+
+        # Compared the way it is stored, tuples become lists
+        manifest = json.loads(json.dumps(manifest))
+        path = os.path.join(directory, MANIFEST)
+
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(path):
+            job = cls.load(directory)
+            if job.manifest != manifest:
+                raise ValueError(f"{directory} holds a different render job")
+            return job
+
+        def write(temp_path: str) -> None:
+            with open(temp_path, "w") as f:
+                json.dump(manifest, f, indent=2)
+
+        write_atomic(path, write)
+        return cls(directory, manifest)
+
+    @classmethod
+    def load(cls, directory: str) -> "RenderJob":
+        with open(os.path.join(directory, MANIFEST), "r") as f:
+            return cls(directory, json.load(f))
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _marker(self, name: str) -> str:
+        return self.path(f"{name}.sha256")
+
+    def is_done(self, name: str) -> bool:
+        try:
+            with open(self._marker(name), "r") as f:
+                expected = f.read().strip()
+            return _sha256(self.path(name)) == expected
+        except OSError:
+            return False
+
+    def pending(self, names: list[str]) -> list[str]:
+        return [name for name in names if not self.is_done(name)]
+
+    def commit(self, name: str, write: Callable[[str], None]) -> str:
+        """Writes the item `name` with `write(path)` and marks it done, returns its path"""
+
+        path = self.path(name)
+        write_atomic(path, write)
+        digest = _sha256(path)
+
+        def write_marker(temp_path: str) -> None:
+            with open(temp_path, "w") as f:
+                f.write(digest)
+
+        write_atomic(self._marker(name), write_marker)
+        return path
@@ -0,0 +1,89 @@
+from itertools import groupby
+from typing import Callable
+
+import numpy as np
+
+from .png_writer import PNGWriter
+from .render_job import RenderJob
+
+__all__ = ["poster_grid", "render_tiled", "tile_grid", "tile_name"]
+
+Window = tuple[int, int, int, int]
+
+
+def tile_grid(width: int, height: int, tile_size: int, tile_height: int | None = None) -> list[Window]:
+    """Splits an image into (x, y, width, height) tiles, row by row from the top left corner.
+    Tiles are `tile_size` squares unless `tile_height` is given."""
+
+    tile_height = tile_height or tile_size
+    return [
+        (x, y, min(tile_size, width - x), min(tile_height, height - y))
+        for y in range(0, height, tile_height)
+        for x in range(0, width, tile_size)
+    ]
+
+
+def poster_grid(width: int, height: int, tile_size: int, filename: str) -> list[Window]:
+    """Tiles `render_tiled` renders `filename` from. PNG rows are written top to bottom, so
+    PNG posters go in full width strips of at most `tile_size`² pixels, cut into columns of
+    `tile_size`, so that a strip fits in memory. Other formats use `tile_size` squares."""
+
+    if filename.endswith(".png"):
+        return tile_grid(width, height, tile_size, max(1, min(tile_size, tile_size**2 // width)))
+    return tile_grid(width, height, tile_size)
+
+
+def tile_name(window: Window) -> str:
+    """File name of a tile in a render job"""
+
+    return "tile_{}_{}_{}_{}.npy".format(*window)
+
+
+def _checkpointed(render_tile: Callable[[Window], np.ndarray], job: RenderJob) -> Callable[[Window], np.ndarray]:
+    """`render_tile` that keeps every tile in `job` and reuses the ones already there"""
+
+    def render(window: Window) -> np.ndarray:
+        name = tile_name(window)
+        if not job.is_done(name):
+            job.commit(name, lambda path: np.save(path, render_tile(window)))
+        return np.load(job.path(name))
+
+    return render
+
+
+def render_tiled(
+    render_tile: Callable[[Window], np.ndarray],
+    size: tuple[int, int],
+    filename: str,
+    tile_size: int = 1024,
+    job: RenderJob | None = None,
+) -> None:
+    """Renders an image of `size` tile by tile straight into `filename`.
+
+    `.png` files are streamed one strip of `poster_grid` at a time, about one tile's worth
+    of memory, `.npy` files are written through a memory map, one tile at a time. With a `job` every tile is also saved
+    in its directory, rerunning an interrupted render only renders the missing ones."""
+
+    width, height = size
+    if job is not None:
+        render_tile = _checkpointed(render_tile, job)
+
+    windows = poster_grid(width, height, tile_size, filename)
+    if filename.endswith(".npy"):
+        image = np.lib.format.open_memmap(filename, mode="w+", dtype=np.uint8, shape=(height, width, 3))
+        for x, y, w, h in windows:
+            image[y : y + h, x : x + w] = render_tile((x, y, w, h))
+        image.flush()
+        del image
+        return
+
+    if not filename.endswith(".png"):
+        raise ValueError(f"Tiled rendering supports .png and .npy files, got {filename}")
+
+    with PNGWriter(filename, width, height) as writer:
+        for _, row in groupby(windows, key=lambda window: window[1]):
+            row = list(row)
+            strip = np.empty((row[0][3], width, 3), dtype=np.uint8)
+            for x, y, w, h in row:
+                strip[:, x : x + w] = render_tile((x, y, w, h))
+            writer.write_rows(strip)
@@ -0,0 +1,90 @@
+import queue
+import threading
+from typing import Any, Callable
+
+import cv2
+import numpy as np
+
+__all__ = ["VideoStreamWriter", "encode_images"]
+
+_STOP = object()
+
+
+class VideoStreamWriter:
+    """Encodes frames into mp4 on a background thread while the caller keeps rendering.
+
+    At most `queue_size` frames wait for the encoder, `write` blocks when the queue is
+    full, so memory use does not depend on the length of the video. `convert` turns a
+    queued frame into a BGR uint8 array and runs on the encoder thread."""
+
+    def __init__(
+        self,
+        output_file: str,
+        fps: int = 60,
+        queue_size: int = 8,
+        convert: Callable[[Any], np.ndarray] | None = None,
+    ):
+        if not output_file.endswith(".mp4"):
+            raise ValueError(f"Expected an .mp4 output file, got {output_file}")
+
+        self._output_file = output_file
+        self._fps = fps
+        self._convert = convert
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._error: BaseException | None = None
+        self._frames_written = 0
+
+        self._thread = threading.Thread(target=self._encode, name="video-encoder", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "VideoStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def frames_written(self) -> int:
+        return self._frames_written
+
+    def write(self, frame: Any) -> None:
+        if self._error is not None:
+            raise RuntimeError("Video encoding failed") from self._error
+        self._queue.put(frame)
+
+    def close(self) -> None:
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self._error is not None:
+            raise RuntimeError("Video encoding failed") from self._error
+
+    def _encode(self) -> None:
+        writer = None
+        try:
+            while (frame := self._queue.get()) is not _STOP:
+                if self._error is not None:
+                    # Keep draining so the producer never blocks on a dead encoder
+                    continue
+                try:
+                    image = self._convert(frame) if self._convert else frame
+                    if writer is None:
+                        height, width = image.shape[:2]
+                        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+                        writer = cv2.VideoWriter(self._output_file, fourcc, self._fps, (width, height))
+                    writer.write(image)
+                    self._frames_written += 1
+                except BaseException as error:
+                    self._error = error
+        finally:
+            if writer is not None:
+                writer.release()
+
+
+def encode_images(filenames: list[str], output_file: str, fps: int = 60) -> None:
+    """Encodes image files into mp4 in the given order, they are read on the encoder thread"""
+
+    with VideoStreamWriter(output_file, fps=fps, convert=cv2.imread) as writer:
+        for filename in filenames:
+            writer.write(filename)
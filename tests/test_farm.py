@@ -0,0 +1,42 @@
+import json
+import os
+import socket
+import threading
+
+import numpy as np
+
+from app.batch import poster_manifest
+from app.farm import Coordinator, run_worker
+from fractals.engines import render_state
+from util import RenderJob
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_unit_of_disconnected_worker_is_requeued(tmp_path):
+    with open(os.path.join(ROOT, "states", "test-state.json"), "r") as f:
+        state = json.load(f)
+    output = str(tmp_path / "poster.npy")
+    job = RenderJob.open(f"{output}.job", poster_manifest(output, "mandelbrot2d", state, (64, 48), 32, "numpy"))
+
+    coordinator = Coordinator(job, "127.0.0.1:0")
+    host, port = coordinator.address.rsplit(":", 1)
+    server = threading.Thread(target=coordinator.serve, daemon=True)
+    server.start()
+
+    # Leases a unit and dies before sending the result
+    with socket.create_connection((host, int(port))) as connection, connection.makefile("rw") as stream:
+        stream.write(json.dumps({"type": "hello", "worker": "dying"}) + "\n")
+        stream.flush()
+        assert json.loads(stream.readline())["type"] == "job"
+        assert json.loads(stream.readline())["type"] == "unit"
+
+    # Without the requeue the leased unit never finishes, and neither do these
+    worker = threading.Thread(target=run_worker, args=(coordinator.address,), daemon=True)
+    worker.start()
+    worker.join(timeout=30)
+    server.join(timeout=30)
+
+    assert not worker.is_alive() and not server.is_alive()
+    assert coordinator.failed == []
+    np.testing.assert_array_equal(np.load(output), render_state("mandelbrot2d", state, (64, 48)))
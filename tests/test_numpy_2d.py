@@ -0,0 +1,53 @@
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from fractals.engines import numpy_2d, perturbation
+
+
+@pytest.mark.parametrize(
+    "fractal, params",
+    [
+        ("mandelbrot2d", {"offset": (-0.5, 0.0), "zoom": 1.0, "phi": 0.1}),
+        ("julia2d", {"offset": (0.0, 0.0), "zoom": 1.2, "c": -0.123 + 0.745j}),
+        ("burningship2d", {"offset": (-0.4, -0.5), "zoom": 0.8, "power": 3.0}),
+    ],
+)
+def test_window_is_slice_of_full_frame(fractal, params):
+    res = (64, 48)
+    full = numpy_2d.render(fractal, res, max_iter=200, aa=2, **params)
+    window = numpy_2d.render(fractal, res, max_iter=200, aa=2, window=(10, 5, 20, 30), **params)
+
+    np.testing.assert_array_equal(window, full[5:35, 10:30])
+
+
+@pytest.mark.parametrize("shift", [(3, 0), (0, -5), (-7, 2), (64, 1)])
+def test_pan_samples_match_full_recompute(shift):
+    res = (64, 64)
+    zoom = 1.0
+    old_offset = (-0.5, 0.0)
+    # Whole pixels are 1 / 32 here, the offsets stay exact in binary
+    pixel = 2.0 / (min(res) * zoom)
+    new_offset = (old_offset[0] - shift[0] * pixel, old_offset[1] + shift[1] * pixel)
+    params = {"zoom": zoom, "max_iter": 200, "aa": 2}
+
+    assert numpy_2d.pixel_shift(res, zoom, old_offset, new_offset) == shift
+
+    old = numpy_2d.sample_iterations("mandelbrot2d", res, offset=old_offset, **params)
+    panned = numpy_2d.pan_samples(old, shift, "mandelbrot2d", res, offset=new_offset, **params)
+    full = numpy_2d.sample_iterations("mandelbrot2d", res, offset=new_offset, **params)
+
+    np.testing.assert_array_equal(panned, full)
+
+
+@pytest.mark.parametrize("center, zoom", [((-0.75, 0.1), 4.0), ((-1.25, 0.0), 20.0)])
+def test_perturbation_matches_direct_iteration(center, zoom):
+    res = (64, 48)
+    decimal_center = (Decimal(str(center[0])), Decimal(str(center[1])))
+
+    deep = perturbation.sample_iterations(res, center=decimal_center, zoom=zoom, max_iter=500)
+    direct = numpy_2d.sample_iterations("mandelbrot2d", res, offset=center, zoom=zoom, max_iter=500)
+
+    np.testing.assert_array_equal(deep == 0.0, direct == 0.0)
+    np.testing.assert_allclose(deep, direct, atol=1e-3)
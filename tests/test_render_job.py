@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from util import RenderJob, poster_grid, render_tiled, tile_name
+
+
+def _gradient(window):
+    x, y, w, h = window
+    ys, xs = np.mgrid[y : y + h, x : x + w]
+    return np.stack([xs % 256, ys % 256, (xs + ys) % 256], axis=-1).astype(np.uint8)
+
+
+@pytest.mark.parametrize("filename", ["poster.npy", "poster.png"])
+def test_resume_renders_only_truncated_tile(tmp_path, filename):
+    size = (100, 70)
+    output = str(tmp_path / filename)
+    manifest = {"poster": output, "size": size, "tile_size": 32}
+
+    rendered = []
+
+    def render_tile(window):
+        rendered.append(window)
+        return _gradient(window)
+
+    job = RenderJob.open(str(tmp_path / "poster.job"), manifest)
+    render_tiled(render_tile, size, output, 32, job)
+    windows = poster_grid(*size, 32, filename)
+    assert rendered == windows
+
+    # A crash while writing leaves a partial tile behind, its marker no longer matches
+    truncated = windows[len(windows) // 2]
+    with open(job.path(tile_name(truncated)), "r+b") as f:
+        f.truncate(10)
+    assert job.pending([tile_name(window) for window in windows]) == [tile_name(truncated)]
+
+    rendered.clear()
+    render_tiled(render_tile, size, output, 32, RenderJob.open(job.directory, manifest))
+    assert rendered == [truncated]
+
+    if filename.endswith(".npy"):
+        np.testing.assert_array_equal(np.load(output), _gradient((0, 0, *size)))
+
+
+def test_open_rejects_other_manifest(tmp_path):
+    RenderJob.open(str(tmp_path), {"size": [100, 70]})
+
+    assert RenderJob.open(str(tmp_path), {"size": (100, 70)}).manifest == {"size": [100, 70]}
+    with pytest.raises(ValueError):
+        RenderJob.open(str(tmp_path), {"size": [200, 70]})
@@ -0,0 +1,44 @@
+import os
+
+from app.tile_server import TileCache
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = TileCache(None, memory_bytes=250, disk_bytes=0)
+    cache.put("a", b"a" * 100)
+    cache.put("b", b"b" * 100)
+    assert cache.get("a") == b"a" * 100
+
+    cache.put("c", b"c" * 100)
+
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.get("b") is None
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = TileCache(str(tmp_path), memory_bytes=0, disk_bytes=250)
+    cache.put("a1", b"a" * 100)
+    cache.put("b1", b"b" * 100)
+    # The mtime is the last use, "b1" was read after "a1"
+    os.utime(cache._path("a1"), (1000, 1000))
+    os.utime(cache._path("b1"), (2000, 2000))
+
+    cache.put("c1", b"c" * 100)
+
+    assert not os.path.exists(cache._path("a1"))
+    assert cache.get("a1") is None
+    assert cache.get("b1") == b"b" * 100
+    assert cache.get("c1") == b"c" * 100
+
+
+def test_disk_cache_is_reused_and_overwrites_are_not_counted_twice(tmp_path):
+    cache = TileCache(str(tmp_path), memory_bytes=0, disk_bytes=250)
+    for _ in range(3):
+        cache.put("a1", b"a" * 100)
+    cache.put("b1", b"b" * 100)
+    assert cache.get("a1") == b"a" * 100
+
+    reopened = TileCache(str(tmp_path), memory_bytes=0, disk_bytes=250)
+    assert reopened.get("a1") == b"a" * 100
+    assert reopened.get("b1") == b"b" * 100